@@ -1,10 +1,11 @@
 from django.contrib import admin
+from django.utils import timezone
 from django.utils.html import format_html
 from modeltranslation.admin import TranslationAdmin
 from .models import (
     PricingSettings, CleaningType, ExtraService, DryCleaningService,
     CleaningPrice, PromoText, Order, Review, Advantage, GalleryItem, CompanyInfo, DateDiscount,
-    CargoTariff, CargoOption, ShoeCleaningService, ServiceCategory
+    CargoTariff, CargoOption, ShoeCleaningService, ServiceCategory, OrderOutbox
 )
 
 
@@ -55,7 +56,7 @@ class DryCleaningServiceAdmin(admin.ModelAdmin):
 @admin.register(CleaningPrice)
 class CleaningPriceAdmin(admin.ModelAdmin):
     """Админка для цен уборки"""
-    list_display = ("level", "title", "area_from", "area_to", "old_price", "price", "is_active")
+    list_display = ("level", "title", "area_from", "area_to", "step_area", "old_price", "price", "is_active")
     list_filter = ("level", "is_active")
     search_fields = ("title",)
     list_editable = ("is_active", "price", "old_price")
@@ -64,8 +65,10 @@ class CleaningPriceAdmin(admin.ModelAdmin):
             "fields": ("level", "title", "is_active", "sort_order")
         }),
         ("Диапазон площади", {
-            "fields": ("area_from", "area_to"),
-            "description": "Оставьте пустым для диапазона без ограничений"
+            "fields": ("area_from", "area_to", "step_area"),
+            "description": "Диапазонов может быть сколько угодно: цена диапазона действует "
+                           "до его «Площадь до» включительно. Диапазон без «Площадь до» — "
+                           "цена за каждый шаг сверх последнего диапазона"
         }),
         ("Цены", {
             "fields": ("old_price", "price"),
@@ -130,6 +133,32 @@ class OrderAdmin(admin.ModelAdmin):
         return self.readonly_fields
 
 
+@admin.register(OrderOutbox)
+class OrderOutboxAdmin(admin.ModelAdmin):
+    """Админка outbox заявок: только просмотр и повтор отправки"""
+    list_display = ('id', 'order', 'kind', 'status', 'attempts', 'next_attempt_at', 'locked_at', 'created_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('order__id', 'order__name', 'order__phone', 'last_error')
+    list_select_related = ('order',)
+    readonly_fields = (
+        'order', 'kind', 'status', 'attempts', 'next_attempt_at', 'locked_at',
+        'last_error', 'created_at', 'processed_at'
+    )
+    actions = ('retry_now',)
+
+    def has_add_permission(self, request):
+        """Задачи создаются только вместе с заявкой"""
+        return False
+
+    @admin.action(description="Повторить отправку сейчас")
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status=OrderOutbox.STATUS_DONE).update(
+            status=OrderOutbox.STATUS_PENDING,
+            next_attempt_at=timezone.now(),
+            locked_at=None,
+        )
+        self.message_user(request, f"Поставлено в очередь: {updated}")
+
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
     """Админка для отзывов"""
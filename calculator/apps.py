@@ -8,3 +8,5 @@ class CalculatorConfig(AppConfig):
     def ready(self):
         # Import translation definitions so modeltranslation can register fields
         from . import translation  # noqa: F401
+        # Connect cache invalidation receivers
+        from . import signals  # noqa: F401
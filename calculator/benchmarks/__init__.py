@@ -0,0 +1,21 @@
+"""
+Бенчмарки, по модулю на задачу:
+
+    pricing  — расчёт цены: p50/p95 и запросы к БД на вызов с бюджетами
+               (команда bench_pricing)
+    sheets   — обращения к Google Sheets API на заявку и p99 создания заявки
+               при деградировавшем Sheets (команда bench_sheets)
+    server   — read-API каталога под ASGI и WSGI при медленных клиентах
+               (команда bench_asgi)
+    encoding — кодирование самых больших ответов API (команда bench_json)
+
+Модули импортируются по отдельности: бенчмарк цен не тянет за собой
+представления и ASGI/WSGI-приложения.
+"""
+from typing import List
+
+
+def percentile(samples: List[float], percent: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
@@ -0,0 +1,94 @@
+"""
+Кодирование самых больших ответов API: JsonResponse, FastJsonResponse с
+каждым доступным бэкендом и ответ из уже закодированных байтов.
+Используется командой bench_json.
+"""
+import functools
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+from django.http import JsonResponse
+
+from ..catalog import get_catalog
+from ..json_encoding import BACKENDS, FastJsonResponse, get_backend, json_dumps, orjson
+from ..services import get_catalog_snapshot
+from . import percentile
+
+@dataclass
+class EncodingBenchmarkResult:
+    payload: str
+    encoder: str
+    bytes: int
+    p50_us: float
+    p95_us: float
+
+    def as_dict(self) -> dict:
+        return {
+            "payload": self.payload,
+            "encoder": self.encoder,
+            "bytes": self.bytes,
+            "p50_us": round(self.p50_us, 1),
+            "p95_us": round(self.p95_us, 1),
+        }
+
+
+def _encoding_payloads() -> Dict[str, object]:
+    from ..views import _price_curve_payload, _services_payload, get_calculator_bootstrap
+
+    catalog = get_catalog()
+    return {
+        "calculator_bootstrap": get_calculator_bootstrap(),
+        "catalog": catalog,
+        "services": _services_payload(catalog),
+        "gallery": catalog["gallery"],
+        "price_curve": _price_curve_payload(get_catalog_snapshot()),
+    }
+
+
+def _encoders() -> Dict[str, Callable[[object], object]]:
+    encoders = {"django_json_response": lambda data: JsonResponse(data, safe=False)}
+    for name in BACKENDS:
+        if name == "orjson" and orjson is None:
+            continue
+        encoders[f"fast_{name}"] = lambda data, dumps=get_backend(name): FastJsonResponse(dumps(data))
+    return encoders
+
+
+def _encode_timings(call, iterations) -> List[float]:
+    for _ in range(min(10, iterations)):
+        call()
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - started) * 1_000_000)
+    return timings
+
+
+def run_encoding_benchmark(iterations: int = 200, top: int = 3) -> List[EncodingBenchmarkResult]:
+    """
+    Время сборки ответа (мкс) для top самых больших ответов API:
+    JsonResponse, FastJsonResponse с каждым установленным бэкендом и
+    pre_encoded — FastJsonResponse из байтов, как при попадании в кэш
+    """
+    payloads = _encoding_payloads()
+    sizes = {name: len(json_dumps(data)) for name, data in payloads.items()}
+    encoders = _encoders()
+
+    results = []
+    for name in sorted(payloads, key=sizes.get, reverse=True)[:top]:
+        data = payloads[name]
+        body = json_dumps(data)
+        calls = {encoder: functools.partial(encode, data) for encoder, encode in encoders.items()}
+        calls["pre_encoded"] = functools.partial(FastJsonResponse, body)
+        for encoder, call in calls.items():
+            timings = _encode_timings(call, iterations)
+            results.append(EncodingBenchmarkResult(
+                payload=name,
+                encoder=encoder,
+                bytes=len(call().content),
+                p50_us=percentile(timings, 50),
+                p95_us=percentile(timings, 95),
+            ))
+    return results
@@ -0,0 +1,229 @@
+"""
+Бенчмарки расчёта цены: p50/p95 и запросы к БД на вызов с бюджетами.
+
+Используется командой `python manage.py bench_pricing` и тестами
+(calculator/tests/test_pricing_benchmark.py). Бюджеты по умолчанию —
+DEFAULT_BUDGETS, переопределяются настройкой PRICING_BENCHMARK_BUDGETS
+или параметрами команды.
+"""
+import json
+import random
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Callable, Dict, List
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import CleaningPrice, DryCleaningService, ExtraService, PricingSettings
+from ..ratelimit import RateLimiter
+from ..services import (
+    CLEANING_LEVELS,
+    calculate_cleaning_price_by_level,
+    calculate_total_price,
+    get_catalog_snapshot,
+)
+from . import percentile
+
+# Бюджет: максимальный p95 (мс) и запросов к БД на вызов в прогретом состоянии
+DEFAULT_BUDGETS = {
+    "calculate_cleaning_price_by_level": {"p95_ms": 1.0, "queries": 0},
+    "calculate_total_price": {"p95_ms": 2.0, "queries": 0},
+    "price_api": {"p95_ms": 25.0, "queries": 0},
+    "rate_limit_allow": {"p95_ms": 0.05, "queries": 0},
+}
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    calls: int
+    p50_ms: float
+    p95_ms: float
+    queries_per_call: float
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "p50_ms": round(self.p50_ms, 4),
+            "p95_ms": round(self.p95_ms, 4),
+            "queries_per_call": self.queries_per_call,
+        }
+
+
+def seed_catalog() -> None:
+    """
+    Реалистичный каталог: 3 уровня по 4 ступени + шаг, доп. услуги и химчистка.
+    Пишет в текущую БД — команда вызывает его внутри отменяемой транзакции
+    """
+    PricingSettings.objects.update_or_create(
+        pk=1, defaults={"price_per_room": Decimal("150"), "price_per_bathroom": Decimal("250")}
+    )
+    CleaningPrice.objects.all().delete()
+    for offset, level in enumerate(CLEANING_LEVELS):
+        base = 1290 + offset * 600
+        for sort_order, (area_to, extra) in enumerate([(40, 0), (60, 260), (80, 520), (100, 790)]):
+            CleaningPrice.objects.create(
+                level=level, title=f"До {area_to} m²", area_to=area_to,
+                price=Decimal(base + extra),
+                old_price=Decimal(base + extra + 300) if sort_order == 0 else None,
+                sort_order=sort_order,
+            )
+        CleaningPrice.objects.create(
+            level=level, title="+10 m²", area_from=101, area_to=None,
+            price=Decimal(120 + offset * 40), sort_order=10,
+        )
+    ExtraService.objects.all().delete()
+    for name, price, price_type in [
+        ("Окна", "450", "fixed"), ("Холодильник", "390", "fixed"),
+        ("Духовка", "420", "fixed"), ("Балкон", "350", "fixed"),
+        ("Дезинфекция", "12.50", "per_m2"),
+    ]:
+        ExtraService.objects.create(name=name, price=Decimal(price), price_type=price_type)
+    DryCleaningService.objects.all().delete()
+    for name, price, unit in [
+        ("Диван", "990", "item"), ("Кресло", "490", "item"),
+        ("Матрас", "890", "item"), ("Ковёр", "120", "m2"),
+    ]:
+        DryCleaningService.objects.create(name=name, price=Decimal(price), unit=unit)
+
+
+def generate_requests(count: int, seed: int = 42) -> List[dict]:
+    """
+    Конфигурации как в трафике /api/price/: чаще всего квартиры 40–80 м²,
+    1–3 комнаты, basic; иногда доп. услуги и химчистка
+    """
+    snapshot = get_catalog_snapshot()
+    extra_ids = sorted(snapshot.extra_services)
+    dry_cleaning_services = snapshot.dry_cleaning_services
+    rng = random.Random(seed)
+    requests = []
+    for _ in range(count):
+        dry_cleaning = {}
+        if dry_cleaning_services and rng.random() < 0.2:
+            item_id = rng.choice(sorted(dry_cleaning_services))
+            unit = dry_cleaning_services[item_id].unit
+            dry_cleaning[item_id] = Decimal(rng.randint(4, 20) if unit == "m2" else rng.randint(1, 2))
+        requests.append({
+            # basic / general / general_plus
+            "level": rng.choices(CLEANING_LEVELS, weights=(6, 3, 1))[0],
+            "area": Decimal(int(rng.triangular(25, 160, 55))),
+            "rooms": rng.randint(1, 3),
+            "bathrooms": rng.randint(1, 2),
+            "extra_service_ids": rng.sample(extra_ids, rng.randint(0, min(2, len(extra_ids)))),
+            "dry_cleaning": dry_cleaning,
+        })
+    return requests
+
+
+def measure(name: str, calls: List[Callable[[], object]]) -> BenchmarkResult:
+    """Прогреть, замерить время каждого вызова, затем отдельно посчитать запросы"""
+    for call in calls[:10]:
+        call()
+
+    timings = []
+    for call in calls:
+        started = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    with CaptureQueriesContext(connection) as queries:
+        for call in calls:
+            call()
+
+    return BenchmarkResult(
+        name=name,
+        calls=len(calls),
+        p50_ms=percentile(timings, 50),
+        p95_ms=percentile(timings, 95),
+        queries_per_call=round(len(queries) / len(calls), 3),
+    )
+
+
+def _price_api_params(request: dict) -> dict:
+    return {
+        "level": request["level"],
+        "area": str(request["area"]),
+        "rooms": str(request["rooms"]),
+        "bathrooms": str(request["bathrooms"]),
+        "extra_services": json.dumps(request["extra_service_ids"]),
+        "dry_cleaning": json.dumps({str(k): str(v) for k, v in request["dry_cleaning"].items()}),
+    }
+
+
+def run_pricing_benchmarks(iterations: int = 1000, seed: int = 42) -> List[BenchmarkResult]:
+    """Прогнать все бенчмарки на текущем каталоге"""
+    requests = generate_requests(iterations, seed)
+    dry_cleaning_services = get_catalog_snapshot().dry_cleaning_services
+
+    cleaning_calls = [
+        (lambda r=r: calculate_cleaning_price_by_level(r["area"], r["level"]))
+        for r in requests
+    ]
+    total_calls = [
+        (lambda r=r: calculate_total_price(
+            rooms=r["rooms"],
+            bathrooms=r["bathrooms"],
+            area=r["area"],
+            cleaning_level=r["level"],
+            dry_cleaning_items=[dry_cleaning_services[i] for i in r["dry_cleaning"]],
+            dry_cleaning_areas=r["dry_cleaning"],
+        ))
+        for r in requests
+    ]
+
+    # localhost есть в ALLOWED_HOSTS, testserver — только в тестах
+    client = Client(SERVER_NAME="localhost")
+    url = reverse("calculator:price_api")
+    api_calls = [
+        (lambda params=_price_api_params(r): client.get(url, params))
+        for r in requests
+    ]
+
+    # Разрешающий путь лимитера: локальный bucket, общий бюджет — раз на пачку
+    limiter = RateLimiter("bench", per_minute=10 ** 9, burst=10 ** 9)
+    addresses = [f"10.0.{index // 256}.{index % 256}" for index in range(100)]
+    limit_calls = [
+        (lambda address=addresses[index % len(addresses)]: limiter.hit(address))
+        for index in range(iterations)
+    ]
+
+    # Бюджет лимитера не должен обрывать замер /api/price/
+    unlimited = {**settings.RATE_LIMITS, "price": {"per_minute": 10 ** 9, "burst": 10 ** 9}}
+    with override_settings(RATE_LIMITS=unlimited):
+        return [
+            measure("calculate_cleaning_price_by_level", cleaning_calls),
+            measure("calculate_total_price", total_calls),
+            measure("price_api", api_calls),
+            measure("rate_limit_allow", limit_calls),
+        ]
+
+
+def get_budgets(overrides: Dict[str, dict] = None) -> Dict[str, dict]:
+    """DEFAULT_BUDGETS + settings.PRICING_BENCHMARK_BUDGETS + overrides"""
+    budgets = {name: dict(budget) for name, budget in DEFAULT_BUDGETS.items()}
+    for source in (getattr(settings, "PRICING_BENCHMARK_BUDGETS", {}), overrides or {}):
+        for name, budget in source.items():
+            budgets.setdefault(name, {}).update(budget)
+    return budgets
+
+
+def check_budgets(results: List[BenchmarkResult], budgets: Dict[str, dict]) -> List[str]:
+    """Список нарушений бюджета (пустой — всё в пределах)"""
+    violations = []
+    for result in results:
+        budget = budgets.get(result.name, {})
+        if "p95_ms" in budget and result.p95_ms > budget["p95_ms"]:
+            violations.append(
+                f"{result.name}: p95 {result.p95_ms:.3f} ms > {budget['p95_ms']} ms"
+            )
+        if "queries" in budget and result.queries_per_call > budget["queries"]:
+            violations.append(
+                f"{result.name}: {result.queries_per_call} запросов на вызов > {budget['queries']}"
+            )
+    return violations
@@ -0,0 +1,196 @@
+"""
+Пропускная способность read-API каталога под ASGI (один воркер,
+async-представления) и под WSGI (sync-воркеры gunicorn) при одновременных
+медленных клиентах. Используется командой bench_asgi.
+
+ASGI/WSGI-приложения создаются внутри бенчмарка, а не при импорте модуля.
+"""
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from typing import List
+
+from django.test import Client, RequestFactory
+from django.urls import reverse
+
+from . import percentile
+
+# Read-API каталога из кэша: после прогрева ни один запрос не ходит в БД
+SERVER_BENCHMARK_URLS = (
+    "calculator:services_api",
+    "calculator:cargo_api",
+    "calculator:shoe_cleaning_api",
+    "calculator:advantages_api",
+    "calculator:company_info_api",
+    "calculator:calendar_discounts_api",
+)
+
+
+@dataclass
+class ServerBenchmarkResult:
+    name: str
+    clients: int
+    requests: int
+    seconds: float
+    requests_per_second: float
+    p50_ms: float
+    p99_ms: float
+    errors: int
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "clients": self.clients,
+            "requests": self.requests,
+            "seconds": round(self.seconds, 3),
+            "requests_per_second": round(self.requests_per_second, 1),
+            "p50_ms": round(self.p50_ms, 3),
+            "p99_ms": round(self.p99_ms, 3),
+            "errors": self.errors,
+        }
+
+
+def _server_result(name, clients, timings, errors, seconds) -> ServerBenchmarkResult:
+    return ServerBenchmarkResult(
+        name=name,
+        clients=clients,
+        requests=len(timings),
+        seconds=seconds,
+        requests_per_second=len(timings) / seconds if seconds else 0.0,
+        p50_ms=percentile(timings, 50),
+        p99_ms=percentile(timings, 99),
+        errors=errors,
+    )
+
+
+def _run_wsgi(paths, clients, requests_per_client, workers, client_delay) -> ServerBenchmarkResult:
+    """
+    gunicorn с sync-воркерами: воркер занят запросом всё время, пока
+    медленный клиент передаёт его (client_delay), поэтому одновременно
+    обслуживается не больше workers клиентов
+    """
+    from django.core.wsgi import get_wsgi_application
+
+    application = get_wsgi_application()
+    factory = RequestFactory(SERVER_NAME="localhost")
+    pool = threading.Semaphore(workers)
+    timings = []
+    errors = []
+
+    def client(offset):
+        for index in range(requests_per_client):
+            path = paths[(offset + index) % len(paths)]
+            statuses = []
+            started = time.perf_counter()
+            with pool:
+                time.sleep(client_delay)
+                body = application(
+                    factory.get(path).environ,
+                    lambda status, headers, exc_info=None: statuses.append(status),
+                )
+                try:
+                    b"".join(body)
+                finally:
+                    body.close()
+            timings.append((time.perf_counter() - started) * 1000)
+            if not statuses[0].startswith("200"):
+                errors.append(path)
+
+    threads = [threading.Thread(target=client, args=(offset,)) for offset in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return _server_result(
+        f"wsgi_{workers}_workers", clients, timings, len(errors), time.perf_counter() - started
+    )
+
+
+async def _asgi_request(application, scope, client_delay):
+    """Один запрос медленного клиента; возвращает статус ответа"""
+    received = False
+    messages = []
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            await asyncio.sleep(client_delay)
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Клиент не отключается, пока ответ не отправлен
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    await application(scope, receive, send)
+    return next(message["status"] for message in messages if message["type"] == "http.response.start")
+
+
+def _asgi_scope(path):
+    """HTTP-scope GET-запроса к localhost, как его передаёт uvicorn"""
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"localhost")],
+        "client": ("127.0.0.1", 0),
+        "server": ("localhost", 80),
+    }
+
+
+async def _run_asgi_clients(paths, clients, requests_per_client, client_delay):
+    from django.core.asgi import get_asgi_application
+
+    application = get_asgi_application()
+    timings = []
+    errors = []
+
+    async def client(offset):
+        for index in range(requests_per_client):
+            path = paths[(offset + index) % len(paths)]
+            started = time.perf_counter()
+            status = await _asgi_request(application, _asgi_scope(path), client_delay)
+            timings.append((time.perf_counter() - started) * 1000)
+            if status != 200:
+                errors.append(path)
+
+    await asyncio.gather(*(client(offset) for offset in range(clients)))
+    return timings, errors
+
+
+def _run_asgi(paths, clients, requests_per_client, client_delay) -> ServerBenchmarkResult:
+    """Один ASGI-воркер (uvicorn): медленные клиенты ждут в event loop, а не в воркере"""
+    started = time.perf_counter()
+    timings, errors = asyncio.run(_run_asgi_clients(paths, clients, requests_per_client, client_delay))
+    return _server_result("asgi_1_worker", clients, timings, len(errors), time.perf_counter() - started)
+
+
+def run_server_benchmark(
+    clients: int = 100, requests_per_client: int = 5, workers: int = 3, client_delay: float = 0.05
+) -> List[ServerBenchmarkResult]:
+    """
+    Пропускная способность read-API каталога при clients одновременных
+    клиентах, каждый передаёт запрос client_delay секунд (медленная
+    мобильная сеть). Сравнивает один ASGI-воркер с workers sync-воркерами
+    WSGI (gunicorn по умолчанию). Сервер моделируется в процессе: сеть не
+    используется, каталог прогревается заранее
+    """
+    paths = [reverse(name) for name in SERVER_BENCHMARK_URLS]
+    # Прогрев кэша каталога, скидок и записи о компании
+    http = Client(SERVER_NAME="localhost")
+    for path in paths:
+        http.get(path)
+
+    return [
+        _run_wsgi(paths, clients, requests_per_client, workers, client_delay),
+        _run_asgi(paths, clients, requests_per_client, client_delay),
+    ]
@@ -0,0 +1,234 @@
+"""
+Бенчмарки Google Sheets на локальной замене gspread, без сети.
+
+run_sheets_benchmark (команда bench_sheets) считает обращения к Sheets API
+на заявку, run_order_isolation_benchmark сравнивает p99 создания заявки
+при исправном и деградировавшем Sheets.
+"""
+import contextlib
+import datetime
+import io
+import json
+import threading
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import List
+
+from django.conf import settings
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from ..circuit_breaker import CircuitBreaker, CircuitOpen
+from ..fake_gspread import FakeCredentials, FakeGspread
+from ..google_sheets import (
+    REQUEST_BURST,
+    REQUESTS_PER_MINUTE,
+    SheetsClient,
+    TokenBucket,
+    send_orders_to_sheet,
+)
+from ..models import Order
+from . import percentile
+
+@dataclass
+class SheetsBenchmarkResult:
+    name: str
+    orders: int
+    api_calls: int
+    calls_per_order: float
+    # Сколько секунд заняла бы отправка всех заявок сразу при квоте
+    # GOOGLE_SHEETS_REQUESTS_PER_MINUTE (часы симулированные)
+    quota_seconds: float
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "orders": self.orders,
+            "api_calls": self.api_calls,
+            "calls_per_order": self.calls_per_order,
+            "quota_seconds": round(self.quota_seconds, 1),
+        }
+
+
+class _SimulatedClock:
+    """Часы для TokenBucket: sleep() только сдвигает время"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def sample_orders(count: int) -> List[Order]:
+    """Несохранённые заявки для строк таблицы (без обращений к БД)"""
+    created_at = datetime.datetime(2026, 1, 1, 10, 0)
+    return [
+        Order(
+            id=index + 1, name=f"Client {index}", phone="+420123456789",
+            cleaning_level="basic", area=Decimal("55"), rooms=2, bathrooms=1,
+            total_price=Decimal("1890"), created_at=created_at,
+        )
+        for index in range(count)
+    ]
+
+
+def _bench_breaker(name):
+    # Своё имя: бенчмарк не должен трогать состояние боевого предохранителя
+    breaker = CircuitBreaker(f"bench:{name}")
+    breaker.reset()
+    return breaker
+
+
+def _measure_sheets(name, orders, send) -> SheetsBenchmarkResult:
+    fake = FakeGspread()
+    breaker = _bench_breaker(name)
+    # Таблица уже существует: создание и заголовок не считаем
+    SheetsClient(
+        gspread_module=fake, credentials=FakeCredentials(), bucket=TokenBucket(1e9, 1e9), breaker=breaker
+    ).worksheet()
+    fake.calls.clear()
+
+    clock = _SimulatedClock()
+    bucket = TokenBucket(REQUESTS_PER_MINUTE / 60, REQUEST_BURST, clock=clock, sleep=clock.sleep)
+
+    def new_client():
+        return SheetsClient(gspread_module=fake, credentials=FakeCredentials(), bucket=bucket, breaker=breaker)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        send(orders, new_client)
+
+    return SheetsBenchmarkResult(
+        name=name,
+        orders=len(orders),
+        api_calls=fake.total_calls,
+        calls_per_order=round(fake.total_calls / len(orders), 3),
+        quota_seconds=clock.now,
+    )
+
+
+def run_sheets_benchmark(orders: int = 200, batch_size: int = 20) -> List[SheetsBenchmarkResult]:
+    """
+    Обращения к Sheets API на заявку:
+    per_order_connection — новое подключение на каждую заявку (как раньше),
+    shared_client — одно подключение, по строке за запрос,
+    batched — одно подключение, append_rows пачками по batch_size
+    """
+    sample = sample_orders(orders)
+
+    def per_order_connection(items, new_client):
+        for order in items:
+            send_orders_to_sheet([order], client=new_client())
+
+    def shared_client(items, new_client):
+        client = new_client()
+        for order in items:
+            send_orders_to_sheet([order], client=client)
+
+    def batched(items, new_client):
+        client = new_client()
+        for start in range(0, len(items), batch_size):
+            send_orders_to_sheet(items[start:start + batch_size], client=client)
+
+    return [
+        _measure_sheets("per_order_connection", sample, per_order_connection),
+        _measure_sheets("shared_client", sample, shared_client),
+        _measure_sheets("batched", sample, batched),
+    ]
+
+
+@dataclass
+class OrderLatencyResult:
+    name: str
+    orders: int
+    p50_ms: float
+    p99_ms: float
+    sheets_calls: int
+    sheets_errors: int
+    short_circuited: int
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "orders": self.orders,
+            "p50_ms": round(self.p50_ms, 4),
+            "p99_ms": round(self.p99_ms, 4),
+            "sheets_calls": self.sheets_calls,
+            "sheets_errors": self.sheets_errors,
+            "short_circuited": self.short_circuited,
+        }
+
+
+def _sheets_load(client, stop, counters):
+    """Фоновая отправка строк, как у process_outbox, пока не выставлен stop"""
+    orders = sample_orders(5)
+    while not stop.is_set():
+        try:
+            send_orders_to_sheet(orders, client=client)
+        except CircuitOpen:
+            counters["short_circuited"] += 1
+        except Exception:
+            pass
+        stop.wait(0.005)
+
+
+def _measure_orders(name, orders, fake) -> OrderLatencyResult:
+    client = SheetsClient(
+        gspread_module=fake, credentials=FakeCredentials(),
+        bucket=TokenBucket(1e9, 1e9), breaker=_bench_breaker(name),
+    )
+    # localhost есть в ALLOWED_HOSTS, testserver — только в тестах
+    http = Client(SERVER_NAME="localhost")
+    url = reverse("calculator:orders_api")
+    payload = json.dumps({
+        "name": "Bench", "phone": "+420123456789", "service_type": "cargo",
+        "level": "basic", "area": 1, "total_price": 500,
+    })
+
+    stop = threading.Event()
+    counters = {"short_circuited": 0}
+    worker = threading.Thread(target=_sheets_load, args=(client, stop, counters), daemon=True)
+    timings = []
+    unlimited = {**settings.RATE_LIMITS, "orders": {"per_minute": 10 ** 9, "burst": 10 ** 9}}
+    with contextlib.redirect_stdout(io.StringIO()), override_settings(RATE_LIMITS=unlimited):
+        worker.start()
+        try:
+            for _ in range(orders):
+                started = time.perf_counter()
+                http.post(url, payload, content_type="application/json")
+                timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            stop.set()
+            worker.join()
+
+    return OrderLatencyResult(
+        name=name,
+        orders=orders,
+        p50_ms=percentile(timings, 50),
+        p99_ms=percentile(timings, 99),
+        sheets_calls=fake.total_calls,
+        sheets_errors=fake.errors,
+        short_circuited=counters["short_circuited"],
+    )
+
+
+def run_order_isolation_benchmark(
+    orders: int = 200, latency: float = 0.5, error_rate: float = 0.5, seed: int = 42
+) -> List[OrderLatencyResult]:
+    """
+    p50/p99 POST /api/orders/, пока фоновый поток отправляет строки в
+    замену gspread: sheets_healthy — без задержек и ошибок, sheets_degraded —
+    каждый запрос latency секунд, доля ошибок error_rate. Заявка в Sheets не
+    ходит (outbox), поэтому p99 не должен заметно отличаться.
+    Создаёт заявки в текущей БД — команда вызывает его в отменяемой транзакции
+    """
+    return [
+        _measure_orders("sheets_healthy", orders, FakeGspread(seed=seed)),
+        _measure_orders(
+            "sheets_degraded", orders, FakeGspread(latency=latency, error_rate=error_rate, seed=seed)
+        ),
+    ]
@@ -0,0 +1,232 @@
+"""
+Каталог по языкам: переводимые данные (modeltranslation) в виде обычных
+словарей, собранные один раз для каждого языка и хранимые в кэше Django.
+
+API и шаблоны читают разделы каталога отсюда, а не из ORM. При сохранении
+или удалении модели в админке сбрасываются только разделы этой модели
+(для всех языков) и после коммита собираются заново. aget_catalog и
+aget_catalog_section — то же для async-представлений: кэш читается
+асинхронно, в поток уходит только сборка недостающих разделов.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import translation
+
+from .models import (
+    Advantage, CargoOption, CargoTariff, CleaningType, DryCleaningService,
+    ExtraService, GalleryItem, PromoText, ServiceCategory, ShoeCleaningService,
+)
+
+CATALOG_CACHE_PREFIX = "calculator:catalog"
+
+# Раздел может законно быть None (нет активной акции)
+_MISSING = object()
+
+
+def _image_url(image):
+    return image.url if image else None
+
+
+def _build_cleaning_types():
+    return [
+        {"id": item.id, "name": item.name, "image_url": _image_url(item.image)}
+        for item in CleaningType.objects.filter(is_active=True)
+    ]
+
+
+def _build_extra_services():
+    return list(ExtraService.objects.filter(is_active=True).values(
+        'id', 'name', 'price', 'price_type'
+    ))
+
+
+def _build_dry_cleaning_services():
+    return [
+        {
+            "id": item.id,
+            "name": item.name,
+            "price": item.price,
+            "unit": item.unit,
+            "image_url": _image_url(item.image),
+        }
+        for item in DryCleaningService.objects.filter(is_active=True)
+    ]
+
+
+def _build_cargo_tariffs():
+    return list(CargoTariff.objects.filter(is_active=True).values(
+        'id', 'name', 'price_per_hour', 'min_hours'
+    ))
+
+
+def _build_cargo_options():
+    return list(CargoOption.objects.filter(is_active=True).values(
+        'id', 'name', 'price'
+    ))
+
+
+def _build_shoe_cleaning_services():
+    return list(ShoeCleaningService.objects.filter(is_active=True).values(
+        'id', 'name', 'price_per_pair'
+    ))
+
+
+def _build_service_categories():
+    return {
+        item.slug: {
+            "slug": item.slug,
+            "title": item.title,
+            "description": item.description,
+            "image_url": _image_url(item.image),
+        }
+        for item in ServiceCategory.objects.filter(is_active=True)
+    }
+
+
+def _build_advantages():
+    return list(Advantage.objects.filter(is_active=True).values(
+        'id', 'title', 'description', 'icon'
+    ))
+
+
+def _build_gallery():
+    return list(GalleryItem.objects.filter(is_active=True).values(
+        'id', 'before_image', 'after_image', 'caption'
+    ))
+
+
+def _build_promo():
+    promo = PromoText.get_active()
+    return {"text": promo.text} if promo else None
+
+
+# Раздел каталога → (модель, сборщик)
+CATALOG_SECTIONS = {
+    "cleaning_types": (CleaningType, _build_cleaning_types),
+    "extra_services": (ExtraService, _build_extra_services),
+    "dry_cleaning_services": (DryCleaningService, _build_dry_cleaning_services),
+    "cargo_tariffs": (CargoTariff, _build_cargo_tariffs),
+    "cargo_options": (CargoOption, _build_cargo_options),
+    "shoe_cleaning_services": (ShoeCleaningService, _build_shoe_cleaning_services),
+    "service_categories": (ServiceCategory, _build_service_categories),
+    "advantages": (Advantage, _build_advantages),
+    "gallery": (GalleryItem, _build_gallery),
+    "promo": (PromoText, _build_promo),
+}
+
+CATALOG_SECTION_MODELS = tuple(dict.fromkeys(model for model, _ in CATALOG_SECTIONS.values()))
+
+
+def catalog_languages():
+    return [code for code, _ in settings.LANGUAGES]
+
+
+def _language(language=None):
+    language = language or translation.get_language() or settings.LANGUAGE_CODE
+    if language not in catalog_languages():
+        language = translation.get_supported_language_variant(language)
+    return language
+
+
+def _cache_key(section, language):
+    return f"{CATALOG_CACHE_PREFIX}:{language}:{section}"
+
+
+def _build_sections(sections, language):
+    with translation.override(language):
+        return {section: CATALOG_SECTIONS[section][1]() for section in sections}
+
+
+def get_catalog(language=None):
+    """Все разделы каталога для языка (по умолчанию — активного)"""
+    language = _language(language)
+    keys = {section: _cache_key(section, language) for section in CATALOG_SECTIONS}
+    cached = cache.get_many(keys.values())
+
+    catalog = {}
+    missing = []
+    for section, key in keys.items():
+        if key in cached:
+            catalog[section] = cached[key]
+        else:
+            missing.append(section)
+
+    if missing:
+        built = _build_sections(missing, language)
+        cache.set_many({keys[section]: value for section, value in built.items()}, timeout=None)
+        catalog.update(built)
+    return catalog
+
+
+def get_catalog_section(section, language=None):
+    """Один раздел каталога для языка"""
+    language = _language(language)
+    key = _cache_key(section, language)
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = _build_sections([section], language)[section]
+        cache.set(key, value, timeout=None)
+    return value
+
+
+async def aget_catalog(language=None):
+    """get_catalog для async-представлений"""
+    language = _language(language)
+    keys = {section: _cache_key(section, language) for section in CATALOG_SECTIONS}
+    cached = await cache.aget_many(keys.values())
+
+    catalog = {}
+    missing = []
+    for section, key in keys.items():
+        if key in cached:
+            catalog[section] = cached[key]
+        else:
+            missing.append(section)
+
+    if missing:
+        built = await sync_to_async(_build_sections)(missing, language)
+        await cache.aset_many({keys[section]: value for section, value in built.items()}, timeout=None)
+        catalog.update(built)
+    return catalog
+
+
+async def aget_catalog_section(section, language=None):
+    """get_catalog_section для async-представлений"""
+    language = _language(language)
+    key = _cache_key(section, language)
+    value = await cache.aget(key, _MISSING)
+    if value is _MISSING:
+        value = (await sync_to_async(_build_sections)([section], language))[section]
+        await cache.aset(key, value, timeout=None)
+    return value
+
+
+def rebuild_catalog_sections(sections):
+    """Собрать разделы заново для всех языков"""
+    for language in catalog_languages():
+        built = _build_sections(sections, language)
+        cache.set_many(
+            {_cache_key(section, language): value for section, value in built.items()},
+            timeout=None,
+        )
+
+
+def invalidate_catalog_model(model):
+    """
+    Модель изменилась: сбросить её разделы сразу (чтение до коммита соберёт
+    их заново) и пересобрать для всех языков после коммита
+    """
+    sections = [
+        section for section, (section_model, _) in CATALOG_SECTIONS.items()
+        if section_model is model
+    ]
+    if not sections:
+        return
+    cache.delete_many([
+        _cache_key(section, language)
+        for section in sections
+        for language in catalog_languages()
+    ])
+    transaction.on_commit(lambda: rebuild_catalog_sections(sections))
@@ -0,0 +1,156 @@
+"""
+Circuit breaker для внешних сервисов (Google Sheets).
+
+closed — вызовы проходят, успехи и ошибки считаются в окне window секунд;
+когда вызовов в окне не меньше min_calls, а доля ошибок не меньше
+failure_rate, цепь размыкается. open — вызовы сразу отклоняются
+(CircuitOpen) reset_timeout секунд. half-open — пропускается один пробный
+вызов (один на все процессы): успех замыкает цепь, ошибка снова размыкает.
+
+Состояние хранится в кэше Django cache_alias. В production это общий кэш
+без вытеснения (алиас state в CACHES), поэтому состояние одно у веб-воркеров
+и process_outbox. Счётчики окна — атомарные счётчики calculator.counters
+(при кэше в базе — таблица SharedCounter: incr у DatabaseCache не атомарен).
+С LocMemCache (локально) состояние своё в каждом процессе, stats() это
+показывает.
+"""
+import time
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from .counters import delete_counters, get_counters, incr_counter
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Exception):
+    """Вызов отклонён: цепь разомкнута. retry_after — через сколько секунд пробовать снова"""
+
+    def __init__(self, name, retry_after):
+        super().__init__(f"{name}: circuit open, retry in {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+
+    def __init__(self, name, failure_rate=0.5, min_calls=5, window=60, reset_timeout=30,
+                 cache_alias="default", clock=time.time):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self.cache_alias = cache_alias
+        self._clock = clock
+        self._prefix = f"calculator:breaker:{name}"
+
+    @property
+    def _cache(self):
+        return caches[self.cache_alias]
+
+    def _key(self, suffix):
+        return f"{self._prefix}:{suffix}"
+
+    def _counter_key(self, counter, now):
+        return self._key(f"{counter}:{int(now // self.window)}")
+
+    def _incr(self, counter, now):
+        return incr_counter(self.cache_alias, self._counter_key(counter, now), timeout=self.window * 2)
+
+    def _counts(self, now):
+        values = get_counters(self.cache_alias, [self._counter_key("calls", now), self._counter_key("failures", now)])
+        return (
+            values.get(self._counter_key("calls", now), 0),
+            values.get(self._counter_key("failures", now), 0),
+        )
+
+    def state(self):
+        opened_at = self._cache.get(self._key("opened_at"))
+        if opened_at is None:
+            return CLOSED
+        if self._clock() - opened_at < self.reset_timeout:
+            return OPEN
+        return HALF_OPEN
+
+    def stats(self):
+        """
+        Состояние и счётчики текущего окна. shared — видно ли состояние
+        другим процессам (False для LocMemCache)
+        """
+        calls, failures = self._counts(self._clock())
+        return {
+            "state": self.state(),
+            "calls": calls,
+            "failures": failures,
+            "shared": not isinstance(self._cache, LocMemCache),
+        }
+
+    def before_call(self):
+        """Пропустить вызов или поднять CircuitOpen"""
+        opened_at = self._cache.get(self._key("opened_at"))
+        if opened_at is None:
+            return
+        now = self._clock()
+        elapsed = now - opened_at
+        if elapsed < self.reset_timeout:
+            raise CircuitOpen(self.name, self.reset_timeout - elapsed)
+        # half-open: пробный вызов забирает тот, кто первым добавит ключ
+        if not self._cache.add(self._key("trial"), now, timeout=self.reset_timeout):
+            raise CircuitOpen(self.name, self.reset_timeout)
+
+    def _tripped(self):
+        """
+        None — цепь замкнута; 'trial' — идёт пробный вызов, его результат
+        замыкает цепь или снова размыкает; 'open' — разомкнута, результаты
+        вызовов, начатых до размыкания, не учитываются
+        """
+        values = self._cache.get_many([self._key("opened_at"), self._key("trial")])
+        if self._key("opened_at") not in values:
+            return None
+        return "trial" if self._key("trial") in values else "open"
+
+    def record_success(self):
+        now = self._clock()
+        tripped = self._tripped()
+        if tripped == "trial":
+            self.reset()
+        elif tripped is None:
+            self._incr("calls", now)
+
+    def record_failure(self):
+        now = self._clock()
+        tripped = self._tripped()
+        if tripped == "trial":
+            self._open(now)
+        if tripped is not None:
+            return
+        calls = self._incr("calls", now)
+        failures = self._incr("failures", now)
+        if calls >= self.min_calls and failures / calls >= self.failure_rate:
+            self._open(now)
+
+    def _open(self, now):
+        self._cache.set(self._key("opened_at"), now, timeout=None)
+        self._cache.delete(self._key("trial"))
+        delete_counters(self.cache_alias, [self._counter_key("calls", now), self._counter_key("failures", now)])
+
+    def reset(self):
+        """Замкнуть цепь и обнулить счётчики"""
+        now = self._clock()
+        self._cache.delete_many([self._key("opened_at"), self._key("trial")])
+        delete_counters(self.cache_alias, [self._counter_key("calls", now), self._counter_key("failures", now)])
+
+    def call(self, func, *args, **kwargs):
+        """Вызвать func через предохранитель"""
+        self.before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
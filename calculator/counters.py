@@ -0,0 +1,109 @@
+"""
+Общие атомарные счётчики процессов: бюджеты rate limit, счётчики breaker'а.
+
+incr_counter(cache_alias, key, delta, timeout) — прибавить delta и вернуть
+новое значение; get_counters и delete_counters читают и удаляют счётчики. Для Redis и LocMemCache это cache.add + cache.incr: incr у
+них атомарен. У DatabaseCache incr — get и set отдельными запросами, и
+параллельные воркеры теряют приращения; поэтому при кэше в базе счётчик —
+строка SharedCounter, а приращение — один UPDATE ... RETURNING (PostgreSQL,
+SQLite 3.35+).
+
+Счётчик живёт timeout секунд с создания. Истёкшие строки удаляет процесс,
+создавший новый счётчик, не чаще раза в PURGE_INTERVAL секунд.
+"""
+import time
+from datetime import timedelta
+
+from django.core.cache import caches
+from django.core.cache.backends.db import DatabaseCache
+from django.db import connections, router
+from django.utils import timezone
+
+from .models import SharedCounter
+
+# Как часто процесс удаляет истёкшие строки SharedCounter (сек)
+PURGE_INTERVAL = 60
+
+_last_purge = 0.0
+
+
+def uses_database(cache_alias):
+    """Счётчики cache_alias хранятся в таблице SharedCounter"""
+    return isinstance(caches[cache_alias], DatabaseCache)
+
+
+def incr_counter(cache_alias, key, delta=1, timeout=60):
+    """Атомарно прибавить delta к счётчику key и вернуть новое значение"""
+    if uses_database(cache_alias):
+        return _db_incr(key, delta, timeout)
+    cache = caches[cache_alias]
+    cache.add(key, 0, timeout=timeout)
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # Ключ истёк между add и incr
+        cache.set(key, delta, timeout=timeout)
+        return delta
+
+
+def get_counters(cache_alias, keys):
+    """Значения живых счётчиков из keys: {ключ: значение}"""
+    if uses_database(cache_alias):
+        return dict(
+            SharedCounter.objects.filter(key__in=keys, expires_at__gt=timezone.now())
+            .values_list("key", "value")
+        )
+    return caches[cache_alias].get_many(keys)
+
+
+def delete_counters(cache_alias, keys):
+    """Удалить счётчики keys"""
+    if uses_database(cache_alias):
+        SharedCounter.objects.filter(key__in=keys).delete()
+    else:
+        caches[cache_alias].delete_many(keys)
+
+
+def _db_incr(key, delta, timeout):
+    connection = connections[router.db_for_write(SharedCounter)]
+    quote = connection.ops.quote_name
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=timeout)
+    # Истёкший счётчик начинается заново. Все выражения SET читают значения
+    # строки до обновления
+    sql = (
+        "UPDATE {table} SET "
+        "{value} = CASE WHEN {expires} <= %s THEN %s ELSE {value} + %s END, "
+        "{expires} = CASE WHEN {expires} <= %s THEN %s ELSE {expires} END "
+        "WHERE {key} = %s RETURNING {value}"
+    ).format(
+        table=quote(SharedCounter._meta.db_table),
+        value=quote("value"),
+        expires=quote("expires_at"),
+        key=quote("key"),
+    )
+    now_value = connection.ops.adapt_datetimefield_value(now)
+    expires_value = connection.ops.adapt_datetimefield_value(expires_at)
+    params = [now_value, delta, delta, now_value, expires_value, key]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+        if row is None:
+            # Строки ещё нет. Если её одновременно создал другой процесс,
+            # вставка пропускается, и UPDATE ниже увеличит его строку
+            SharedCounter.objects.using(connection.alias).bulk_create(
+                [SharedCounter(key=key, value=0, expires_at=expires_at)], ignore_conflicts=True
+            )
+            _purge_expired(connection.alias, now)
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+    return row[0]
+
+
+def _purge_expired(using, now):
+    global _last_purge
+    if time.monotonic() - _last_purge < PURGE_INTERVAL:
+        return
+    _last_purge = time.monotonic()
+    SharedCounter.objects.using(using).filter(expires_at__lte=now).delete()
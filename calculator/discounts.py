@@ -0,0 +1,170 @@
+"""
+Скидки календаря: максимальная скидка на каждую дату.
+
+Максимум считается в базе (GROUP BY date), результат кэшируется помесячно
+в кэше Django. Ключ месяца включает поколение скидок — сигнал на изменение
+DateDiscount увеличивает его, и все месяцы собираются заново при следующем
+чтении (так учитывается и перенос скидки на другую дату).
+aget_calendar_discounts — то же для async-представлений.
+"""
+import datetime
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db.models import Max
+
+from .models import DateDiscount
+
+CALENDAR_DISCOUNTS_CACHE_PREFIX = "calculator:calendar_discounts"
+CALENDAR_DISCOUNTS_GENERATION_KEY = f"{CALENDAR_DISCOUNTS_CACHE_PREFIX}:generation"
+
+# Окно по умолчанию — 2 месяца вперёд от сегодняшнего дня
+DEFAULT_WINDOW_DAYS = 60
+# Самое длинное окно, которое можно запросить за раз
+MAX_WINDOW_DAYS = 366
+
+
+class DiscountWindowError(ValueError):
+    """Некорректное окно дат"""
+
+
+def get_discounts_generation() -> int:
+    """Текущее поколение скидок (без запросов к БД)"""
+    generation = cache.get(CALENDAR_DISCOUNTS_GENERATION_KEY)
+    if generation is None:
+        # Как у версии каталога: после очистки кэша не совпадёт со старыми ключами
+        cache.add(CALENDAR_DISCOUNTS_GENERATION_KEY, time.time_ns() // 1000, timeout=None)
+        generation = cache.get(CALENDAR_DISCOUNTS_GENERATION_KEY)
+    return generation
+
+
+def bump_discounts_generation() -> int:
+    """Сбросить помесячный кэш (вызывается сигналами DateDiscount)"""
+    try:
+        return cache.incr(CALENDAR_DISCOUNTS_GENERATION_KEY)
+    except ValueError:
+        get_discounts_generation()
+        return cache.incr(CALENDAR_DISCOUNTS_GENERATION_KEY)
+
+
+def _month_start(day):
+    return day.replace(day=1)
+
+
+def _next_month(month):
+    return (month + datetime.timedelta(days=32)).replace(day=1)
+
+
+def _months(start, end):
+    month = _month_start(start)
+    while month <= end:
+        yield month
+        month = _next_month(month)
+
+
+def _cache_key(generation, month):
+    return f"{CALENDAR_DISCOUNTS_CACHE_PREFIX}:{generation}:{month:%Y-%m}"
+
+
+def _load_months(months):
+    """
+    Скидки за месяцы (по возрастанию) одним запросом:
+    {месяц: {'2026-01-10': 20, ...}}
+    """
+    result = {month: {} for month in months}
+    rows = (
+        DateDiscount.objects
+        .filter(is_active=True, date__gte=months[0], date__lt=_next_month(months[-1]))
+        .values('date')
+        .annotate(max_percent=Max('discount_percent'))
+        .order_by('date')
+    )
+    for row in rows:
+        # Между недостающими месяцами может оказаться закэшированный — он
+        # тоже попадает в диапазон запроса и просто перезаписывается
+        month = result.setdefault(_month_start(row['date']), {})
+        month[row['date'].strftime('%Y-%m-%d')] = row['max_percent']
+    return result
+
+
+def _month_keys(generation, start, end):
+    return {month: _cache_key(generation, month) for month in _months(start, end)}
+
+
+def _window(by_month, start, end):
+    start_str, end_str = start.isoformat(), end.isoformat()
+    return {
+        date_str: percent
+        for month in sorted(by_month)
+        for date_str, percent in by_month[month].items()
+        if start_str <= date_str <= end_str
+    }
+
+
+def get_calendar_discounts(start, end):
+    """Максимальная скидка по датам в окне [start, end]: {'2026-01-10': 20, ...}"""
+    keys = _month_keys(get_discounts_generation(), start, end)
+    cached = cache.get_many(keys.values())
+
+    by_month = {month: cached[key] for month, key in keys.items() if key in cached}
+    missing = [month for month in keys if month not in by_month]
+    if missing:
+        loaded = _load_months(missing)
+        cache.set_many({keys[month]: value for month, value in loaded.items()}, timeout=None)
+        by_month.update(loaded)
+    return _window(by_month, start, end)
+
+
+async def aget_calendar_discounts(start, end):
+    """get_calendar_discounts для async-представлений"""
+    generation = await cache.aget(CALENDAR_DISCOUNTS_GENERATION_KEY)
+    if generation is None:
+        generation = await sync_to_async(get_discounts_generation)()
+    keys = _month_keys(generation, start, end)
+    cached = await cache.aget_many(keys.values())
+
+    by_month = {month: cached[key] for month, key in keys.items() if key in cached}
+    missing = [month for month in keys if month not in by_month]
+    if missing:
+        loaded = await sync_to_async(_load_months)(missing)
+        await cache.aset_many({keys[month]: value for month, value in loaded.items()}, timeout=None)
+        by_month.update(loaded)
+    return _window(by_month, start, end)
+
+
+def get_date_discount(day):
+    """Скидка календаря на одну дату (0, если скидки нет или дата не задана)"""
+    if day is None:
+        return 0
+    return get_calendar_discounts(day, day).get(day.isoformat(), 0)
+
+
+def parse_discount_window(params, today):
+    """
+    Окно дат из параметров запроса: ?month=YYYY-MM или ?from=&to=
+    (YYYY-MM-DD, любой из концов можно опустить). Без параметров —
+    DEFAULT_WINDOW_DAYS от сегодня. Окно не длиннее MAX_WINDOW_DAYS
+    """
+    month = params.get('month')
+    if month:
+        try:
+            start = datetime.datetime.strptime(month, '%Y-%m').date()
+        except ValueError:
+            raise DiscountWindowError("month должен быть в формате YYYY-MM")
+        return start, _next_month(start) - datetime.timedelta(days=1)
+
+    try:
+        start = datetime.date.fromisoformat(params['from']) if params.get('from') else today
+        end = (
+            datetime.date.fromisoformat(params['to']) if params.get('to')
+            else start + datetime.timedelta(days=DEFAULT_WINDOW_DAYS)
+        )
+    except ValueError:
+        raise DiscountWindowError("from и to должны быть в формате YYYY-MM-DD")
+
+    if end < start:
+        raise DiscountWindowError("to не может быть раньше from")
+    if (end - start).days > MAX_WINDOW_DAYS:
+        raise DiscountWindowError(f"Окно не длиннее {MAX_WINDOW_DAYS} дней")
+    return start, end
@@ -0,0 +1,127 @@
+"""
+Локальная замена gspread для тестов и бенчмарков: таблицы в памяти и
+счётчик обращений к API, без сети.
+
+    fake = FakeGspread()
+    client = SheetsClient(gspread_module=fake, credentials=FakeCredentials())
+    send_orders_to_sheet(orders, client=client)
+    fake.calls  # Counter({'append_rows': 1, 'open': 1, ...})
+
+Реализована только та часть интерфейса gspread, которую использует
+calculator.google_sheets. Для проверки деградации можно задать задержку
+каждого запроса и долю запросов, завершающихся ошибкой квоты:
+
+    fake = FakeGspread(latency=0.5, error_rate=0.3)
+"""
+import random
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+
+class SpreadsheetNotFound(Exception):
+    """Как gspread.exceptions.SpreadsheetNotFound"""
+
+
+class FakeAPIError(Exception):
+    """Как gspread.exceptions.APIError (429 / 5xx)"""
+
+
+class FakeCredentials:
+    """Учётные данные сервисного аккаунта (для share при создании таблицы)"""
+    service_account_email = "fake@yourclean.iam.gserviceaccount.com"
+
+
+class FakeWorksheet:
+
+    def __init__(self, api):
+        self._api = api
+        self.rows = []
+
+    def row_values(self, row):
+        self._api.count("row_values")
+        return list(self.rows[row - 1]) if row <= len(self.rows) else []
+
+    def col_values(self, col):
+        self._api.count("col_values")
+        return [row[col - 1] if col <= len(row) else "" for row in self.rows]
+
+    def append_row(self, values, value_input_option="RAW"):
+        self._api.count("append_row")
+        self.rows.append(list(values))
+
+    def append_rows(self, values, value_input_option="RAW"):
+        self._api.count("append_rows")
+        self.rows.extend(list(row) for row in values)
+
+
+class FakeSpreadsheet:
+
+    def __init__(self, api, title):
+        self._api = api
+        self.title = title
+        self.sheet1 = FakeWorksheet(api)
+
+    def share(self, value, perm_type, role):
+        self._api.count("share")
+
+
+class FakeClient:
+
+    def __init__(self, api):
+        self._api = api
+
+    def open(self, title):
+        self._api.count("open")
+        try:
+            return self._api.spreadsheets[title]
+        except KeyError:
+            raise SpreadsheetNotFound(title)
+
+    def create(self, title):
+        self._api.count("create")
+        spreadsheet = self._api.spreadsheets[title] = FakeSpreadsheet(self._api, title)
+        return spreadsheet
+
+
+class FakeGspread:
+    """
+    Вместо модуля gspread: authorize() и exceptions.SpreadsheetNotFound.
+    calls — сколько раз вызывался каждый метод API (authorize — получение токена)
+    """
+    exceptions = SimpleNamespace(SpreadsheetNotFound=SpreadsheetNotFound)
+
+    def __init__(self, latency=0.0, error_rate=0.0, seed=None, sleep=time.sleep):
+        self.calls = Counter()
+        self.errors = 0
+        self.spreadsheets = {}
+        self.latency = latency
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    def count(self, method):
+        """Учесть запрос к API; с latency/error_rate — медленный или с ошибкой"""
+        with self._lock:
+            self.calls[method] += 1
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        if self.latency:
+            self._sleep(self.latency)
+        if failed:
+            raise FakeAPIError(f"429 Quota exceeded ({method})")
+
+    @property
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    def authorize(self, credentials):
+        self.count("authorize")
+        return FakeClient(self)
+
+    def worksheet(self, title):
+        """Первый лист таблицы (для проверок в тестах)"""
+        return self.spreadsheets[title].sheet1
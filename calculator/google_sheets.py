@@ -1,6 +1,11 @@
 import os
+import threading
+import time
+
 from django.conf import settings
 
+from .circuit_breaker import CircuitBreaker
+
 DEFAULT_SCOPE = [
     "https://spreadsheets.google.com/feeds",
     "https://www.googleapis.com/auth/drive",
@@ -36,58 +41,223 @@ CREDENTIALS_PATH = getattr(
 )
 
 
-def append_to_google_sheet(order):
-    """Append order data into a Google Sheet using a service account."""
+# Sheets API quota (per minute per user) and the burst we allow ourselves
+REQUESTS_PER_MINUTE = getattr(settings, "GOOGLE_SHEETS_REQUESTS_PER_MINUTE", 60)
+REQUEST_BURST = getattr(settings, "GOOGLE_SHEETS_REQUEST_BURST", 5)
+# Rows per append_rows request
+MAX_ROWS_PER_APPEND = 500
 
-    try:
-        import gspread
-        from gspread.exceptions import APIError, SpreadsheetNotFound
-        from oauth2client.service_account import ServiceAccountCredentials
-    except ImportError:
-        print("Google Sheets libraries not installed (gspread, oauth2client). Skipping.")
-        return
+BREAKER_NAME = "google_sheets"
+BREAKER_OPTIONS = {
+    "failure_rate": getattr(settings, "GOOGLE_SHEETS_BREAKER_FAILURE_RATE", 0.5),
+    "min_calls": getattr(settings, "GOOGLE_SHEETS_BREAKER_MIN_CALLS", 5),
+    "window": getattr(settings, "GOOGLE_SHEETS_BREAKER_WINDOW", 60),
+    "reset_timeout": getattr(settings, "GOOGLE_SHEETS_BREAKER_RESET_TIMEOUT", 30),
+    "cache_alias": getattr(settings, "GOOGLE_SHEETS_BREAKER_CACHE", "default"),
+}
 
-    if not os.path.exists(CREDENTIALS_PATH):
-        print(f"Credentials file not found at {CREDENTIALS_PATH}. Skipping Google Sheets.")
-        return
 
-    try:
-        creds = ServiceAccountCredentials.from_json_keyfile_name(CREDENTIALS_PATH, DEFAULT_SCOPE)
-        client = gspread.authorize(creds)
+class SheetsUnavailable(Exception):
+    """Google Sheets can't be used: libraries or credentials are missing."""
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: refills at `rate` tokens per second and holds
+    at most `capacity`. acquire() blocks until a token is available.
+    """
+
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Take `tokens`, waiting for the refill if needed. Returns seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            self._sleep(delay)
+            waited += delay
+
+
+class SheetsClient:
+    """
+    Long-lived Google Sheets connection.
+
+    Credentials (and the access token they hold), the authorized gspread
+    client and the worksheet handle are created on first use and reused;
+    the header row is checked once per connection. Every API request takes
+    a token from `bucket` first, so bursts of orders stay within the quota.
+    After a failed request the connection is dropped and reopened lazily.
+
+    Operations go through `breaker` (shared by name via the Django cache):
+    while Sheets keeps failing they raise CircuitOpen immediately instead
+    of authorizing and calling the API.
+
+    `gspread_module` and `credentials` default to the real gspread and the
+    service account from CREDENTIALS_PATH; calculator.fake_gspread provides
+    an in-memory replacement for tests and benchmarks.
+    """
+
+    def __init__(self, gspread_module=None, credentials=None, sheet_name=SHEET_NAME, bucket=None, breaker=None):
+        self._gspread = gspread_module
+        self._credentials = credentials
+        self.sheet_name = sheet_name
+        self.bucket = bucket or TokenBucket(REQUESTS_PER_MINUTE / 60, REQUEST_BURST)
+        self.breaker = breaker or CircuitBreaker(BREAKER_NAME, **BREAKER_OPTIONS)
+        self._client = None
+        self._sheet = None
+        self._lock = threading.RLock()
+
+    def _load_backend(self):
+        if self._gspread is not None:
+            return self._gspread
 
         try:
-            sheet = client.open(SHEET_NAME).sheet1
-        except SpreadsheetNotFound:
-            print(f"Spreadsheet '{SHEET_NAME}' not found. Creating one...")
-            sheet = _create_sheet(client, creds)
+            import gspread
+            from oauth2client.service_account import ServiceAccountCredentials
+        except ImportError:
+            raise SheetsUnavailable("Google Sheets libraries not installed (gspread, oauth2client)")
 
-        _ensure_header(sheet)
-        sheet.append_row(_build_row(order), value_input_option="USER_ENTERED")
-        print(f"Order #{order.id} appended to Google Sheet '{SHEET_NAME}'.")
+        if not os.path.exists(CREDENTIALS_PATH):
+            raise SheetsUnavailable(f"Credentials file not found at {CREDENTIALS_PATH}")
 
-    except Exception as exc:
-        print(f"Error in append_to_google_sheet: {exc}")
+        self._credentials = ServiceAccountCredentials.from_json_keyfile_name(CREDENTIALS_PATH, DEFAULT_SCOPE)
+        self._gspread = gspread
+        return gspread
 
+    def _request(self, method, *args, **kwargs):
+        self.bucket.acquire()
+        return method(*args, **kwargs)
 
-def _create_sheet(client, creds):
-    """Create the spreadsheet if it doesn't exist and return the first worksheet."""
-    sh = client.create(SHEET_NAME)
-    sh.share(creds.service_account_email, perm_type="user", role="owner")
-    sheet = sh.sheet1
-    sheet.append_row(DEFAULT_HEADER)
-    return sheet
+    def worksheet(self):
+        """The first worksheet of the spreadsheet, opened (or created) once."""
+        with self._lock:
+            if self._sheet is not None:
+                return self._sheet
 
+            gspread = self._load_backend()
+            if self._client is None:
+                self._client = gspread.authorize(self._credentials)
 
-def _ensure_header(sheet):
-    """Make sure the first row contains the header before appending data."""
-    try:
-        header = sheet.row_values(1)
-    except Exception as exc:  # pragma: no cover - defensive logging only
-        print(f"Failed to read header row: {exc}")
-        header = []
+            try:
+                sheet = self._request(self._client.open, self.sheet_name).sheet1
+            except gspread.exceptions.SpreadsheetNotFound:
+                print(f"Spreadsheet '{self.sheet_name}' not found. Creating one...")
+                sheet = self._create_sheet()
+            else:
+                self._ensure_header(sheet)
+
+            self._sheet = sheet
+            return sheet
+
+    def reset(self):
+        """Forget the client and worksheet; the next request reconnects."""
+        with self._lock:
+            self._client = None
+            self._sheet = None
 
-    if not header:
-        sheet.append_row(DEFAULT_HEADER)
+    def append_rows(self, rows):
+        """Append rows in as few requests as possible (MAX_ROWS_PER_APPEND each)."""
+        if not rows:
+            return
+        self.breaker.call(self._append_rows, rows)
+
+    def column_values(self, col):
+        """All values of column `col` (1-based) in a single request."""
+        return self.breaker.call(self._column_values, col)
+
+    def _append_rows(self, rows):
+        with self._lock:
+            sheet = self.worksheet()
+            try:
+                for start in range(0, len(rows), MAX_ROWS_PER_APPEND):
+                    self._request(
+                        sheet.append_rows,
+                        rows[start:start + MAX_ROWS_PER_APPEND],
+                        value_input_option="USER_ENTERED",
+                    )
+            except Exception:
+                self.reset()
+                raise
+
+    def _column_values(self, col):
+        with self._lock:
+            sheet = self.worksheet()
+            try:
+                return self._request(sheet.col_values, col)
+            except Exception:
+                self.reset()
+                raise
+
+    def _create_sheet(self):
+        """Create the spreadsheet and return its first worksheet with the header."""
+        sh = self._request(self._client.create, self.sheet_name)
+        self._request(sh.share, self._credentials.service_account_email, perm_type="user", role="owner")
+        sheet = sh.sheet1
+        self._request(sheet.append_row, DEFAULT_HEADER)
+        return sheet
+
+    def _ensure_header(self, sheet):
+        """Make sure the first row contains the header before appending data."""
+        try:
+            header = self._request(sheet.row_values, 1)
+        except Exception as exc:  # pragma: no cover - defensive logging only
+            print(f"Failed to read header row: {exc}")
+            header = []
+
+        if not header:
+            self._request(sheet.append_row, DEFAULT_HEADER)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_sheets_client():
+    """The process-wide SheetsClient."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = SheetsClient()
+        return _client
+
+
+def send_orders_to_sheet(orders, client=None):
+    """
+    Append several orders to the Google Sheet in one request.
+    Raises on any failure so the outbox worker can retry.
+    """
+    orders = list(orders)
+    (client or get_sheets_client()).append_rows([_build_row(order) for order in orders])
+    print(f"Orders {', '.join(f'#{order.id}' for order in orders)} appended to Google Sheet '{SHEET_NAME}'.")
+
+
+def send_order_to_sheet(order, client=None):
+    """Append a single order; raises on failure."""
+    send_orders_to_sheet([order], client=client)
+
+
+def append_to_google_sheet(order):
+    """Best-effort append: errors are printed, not raised."""
+    try:
+        send_order_to_sheet(order)
+    except SheetsUnavailable as exc:
+        print(f"{exc}. Skipping Google Sheets.")
+    except Exception as exc:
+        print(f"Error in append_to_google_sheet: {exc}")
 
 
 def _build_row(order):
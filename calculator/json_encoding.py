@@ -0,0 +1,80 @@
+"""
+Кодирование ответов API в JSON.
+
+FastJsonResponse заменяет JsonResponse во всех представлениях calculator.
+Тело кодирует бэкенд из настройки CALCULATOR_JSON_BACKEND:
+
+    "auto"   — orjson, если установлен, иначе стандартный json
+    "orjson" — orjson
+    "json"   — стандартный json, компактные разделители, без \\u-экранирования
+    "path.to.dumps" — своя функция dumps(data) -> bytes
+
+Decimal, lazy-строки и timedelta кодируются как у DjangoJSONEncoder
+(Decimal — строкой), дата и время — ISO 8601, поэтому str() при сборке
+ответа не нужен. Уже закодированное тело (bytes из кэша) передаётся в
+FastJsonResponse как есть, без повторного кодирования.
+"""
+import functools
+import json
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson необязателен
+    orjson = None
+
+_django_default = DjangoJSONEncoder().default
+
+
+def orjson_dumps(data):
+    # Ключи-числа (id услуг) кодируются строками, как в стандартном json
+    return orjson.dumps(data, default=_django_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def json_dumps(data):
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+BACKENDS = {
+    "orjson": orjson_dumps,
+    "json": json_dumps,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def get_backend(name):
+    """Функция dumps по имени бэкенда"""
+    if name == "auto":
+        name = "orjson" if orjson is not None else "json"
+    if name == "orjson" and orjson is None:
+        raise ImproperlyConfigured("CALCULATOR_JSON_BACKEND = 'orjson', но orjson не установлен")
+    if name in BACKENDS:
+        return BACKENDS[name]
+    return import_string(name)
+
+
+def dumps(data):
+    """Закодировать data в JSON (bytes) бэкендом из настроек"""
+    return get_backend(getattr(settings, "CALCULATOR_JSON_BACKEND", "auto"))(data)
+
+
+class FastJsonResponse(HttpResponse):
+    """
+    JsonResponse с кодированием через dumps(). data типа bytes — уже
+    закодированное тело. safe=False разрешает не-словари на верхнем уровне
+    """
+
+    def __init__(self, data, safe=True, **kwargs):
+        if not isinstance(data, bytes):
+            if safe and not isinstance(data, dict):
+                raise TypeError(
+                    "In order to allow non-dict objects to be serialized set the safe parameter to False."
+                )
+            data = dumps(data)
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(content=data, **kwargs)
@@ -0,0 +1,67 @@
+"""
+Django management команда: ASGI против WSGI на read-API каталога.
+
+Одновременные медленные клиенты (каждый передаёт запрос --client-delay
+секунд) запрашивают услуги, грузоперевозки, химчистку обуви, преимущества,
+информацию о компании и скидки календаря. Сравнивается один ASGI-воркер
+(gunicorn -k uvicorn.workers.UvicornWorker, как в render.yaml) и --workers
+sync-воркеров WSGI. Сервер моделируется в процессе, без сети.
+
+Примеры:
+    python manage.py bench_asgi
+    python manage.py bench_asgi --clients 200 --client-delay 0.1 --json
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from calculator.benchmarks.server import run_server_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Бенчмарк пропускной способности read-API каталога: ASGI против WSGI'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clients', type=int, default=100,
+            help='Количество одновременных клиентов'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=5,
+            help='Запросов от каждого клиента'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=3,
+            help='Количество sync-воркеров WSGI'
+        )
+        parser.add_argument(
+            '--client-delay', type=float, default=0.05,
+            help='Сколько секунд медленный клиент передаёт запрос'
+        )
+        parser.add_argument(
+            '--json', action='store_true',
+            help='Вывести результат в JSON'
+        )
+
+    def handle(self, *args, **options):
+        if options['clients'] < 1 or options['requests'] < 1 or options['workers'] < 1:
+            raise CommandError('--clients, --requests и --workers должны быть положительными')
+        if options['client_delay'] < 0:
+            raise CommandError('--client-delay не может быть отрицательным')
+
+        results = run_server_benchmark(
+            options['clients'], options['requests'], options['workers'], options['client_delay']
+        )
+
+        if options['json']:
+            self.stdout.write(json.dumps([result.as_dict() for result in results], ensure_ascii=False, indent=2))
+            return
+
+        self.stdout.write(
+            f"{'server':<18}{'requests':>10}{'req/s':>10}{'p50, ms':>10}{'p99, ms':>10}{'errors':>8}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result.name:<18}{result.requests:>10}{result.requests_per_second:>10.1f}"
+                f"{result.p50_ms:>10.3f}{result.p99_ms:>10.3f}{result.errors:>8}"
+            )
@@ -0,0 +1,51 @@
+"""
+Django management команда: кодирование самых больших ответов API.
+
+Сравнивает JsonResponse (DjangoJSONEncoder), FastJsonResponse с каждым
+установленным бэкендом (orjson, json) и ответ из уже закодированных
+байтов — так отвечают read-API каталога при попадании в кэш.
+
+Примеры:
+    python manage.py bench_json
+    python manage.py bench_json --iterations 1000 --top 5 --json
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from calculator.benchmarks.encoding import run_encoding_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Бенчмарк кодирования JSON: время сборки самых больших ответов API'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations', type=int, default=200,
+            help='Количество кодирований на каждый ответ и кодировщик'
+        )
+        parser.add_argument(
+            '--top', type=int, default=3,
+            help='Сколько самых больших ответов замерять'
+        )
+        parser.add_argument(
+            '--json', action='store_true',
+            help='Вывести результат в JSON'
+        )
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1 or options['top'] < 1:
+            raise CommandError('--iterations и --top должны быть положительными')
+
+        results = run_encoding_benchmark(options['iterations'], options['top'])
+
+        if options['json']:
+            self.stdout.write(json.dumps([result.as_dict() for result in results], ensure_ascii=False, indent=2))
+            return
+
+        self.stdout.write(f"{'payload':<24}{'encoder':<24}{'bytes':>10}{'p50, us':>10}{'p95, us':>10}")
+        for result in results:
+            self.stdout.write(
+                f"{result.payload:<24}{result.encoder:<24}{result.bytes:>10}"
+                f"{result.p50_us:>10.1f}{result.p95_us:>10.1f}"
+            )
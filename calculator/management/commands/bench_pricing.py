@@ -0,0 +1,85 @@
+"""
+Django management команда: бенчмарк расчёта цены с бюджетами.
+
+Замеряет calculate_cleaning_price_by_level, calculate_total_price,
+/api/price/ (через тестовый клиент) и разрешающий путь лимитера запросов:
+p50/p95 и запросы к БД на вызов.
+Завершается ошибкой, если бюджет превышен.
+
+Примеры:
+    python manage.py bench_pricing --seed
+    python manage.py bench_pricing --iterations 5000 --budget price_api.p95_ms=10
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from calculator.benchmarks.pricing import check_budgets, get_budgets, run_pricing_benchmarks, seed_catalog
+
+
+def parse_budget(value):
+    """'price_api.p95_ms=10' → ('price_api', 'p95_ms', 10.0)"""
+    try:
+        target, limit = value.split("=", 1)
+        name, metric = target.rsplit(".", 1)
+        return name, metric, float(limit)
+    except ValueError:
+        raise CommandError(f"Неверный бюджет '{value}', ожидается имя.метрика=число")
+
+
+class Command(BaseCommand):
+    help = 'Бенчмарк расчёта цены: p50/p95 и запросы к БД на вызов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations', type=int, default=1000,
+            help='Количество конфигураций на каждый бенчмарк'
+        )
+        parser.add_argument(
+            '--seed', action='store_true',
+            help='Засеять реалистичный каталог (изменения откатываются после замера)'
+        )
+        parser.add_argument(
+            '--budget', action='append', default=[],
+            help='Переопределить бюджет: имя.метрика=число (p95_ms или queries)'
+        )
+        parser.add_argument(
+            '--json', action='store_true',
+            help='Вывести результат в JSON'
+        )
+
+    def handle(self, *args, **options):
+        overrides = {}
+        for value in options['budget']:
+            name, metric, limit = parse_budget(value)
+            overrides.setdefault(name, {})[metric] = limit
+        budgets = get_budgets(overrides)
+
+        with transaction.atomic():
+            if options['seed']:
+                seed_catalog()
+            results = run_pricing_benchmarks(options['iterations'])
+            # Засеянный каталог не должен остаться в базе
+            transaction.set_rollback(options['seed'])
+
+        violations = check_budgets(results, budgets)
+
+        if options['json']:
+            self.stdout.write(json.dumps({
+                "results": [result.as_dict() for result in results],
+                "budgets": budgets,
+                "violations": violations,
+            }, ensure_ascii=False, indent=2))
+        else:
+            self.stdout.write(f"{'benchmark':<36}{'p50, ms':>10}{'p95, ms':>10}{'queries':>10}")
+            for result in results:
+                self.stdout.write(
+                    f"{result.name:<36}{result.p50_ms:>10.3f}{result.p95_ms:>10.3f}"
+                    f"{result.queries_per_call:>10}"
+                )
+
+        if violations:
+            raise CommandError("Бюджет превышен:\n" + "\n".join(violations))
+        if not options['json']:
+            self.stdout.write(self.style.SUCCESS('Все бюджеты соблюдены'))
@@ -0,0 +1,241 @@
+"""
+Django management команда: микробенчмарк арифметики расчёта цены.
+
+Сравнивает рабочий расчёт calculate_quote (целые халержи) с эталонным
+расчётом на Decimal на одном и том же наборе случайных заявок и проверяет,
+что результаты совпадают до халержа.
+
+Примеры:
+    python manage.py bench_quote_arithmetic
+    python manage.py bench_quote_arithmetic --quotes 200000 --catalog
+"""
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from calculator.models import (
+    CleaningPrice,
+    DryCleaningService,
+    ExtraService,
+    PricingSettings,
+)
+from calculator.services import (
+    CENTS,
+    CLEANING_LEVELS,
+    CatalogSnapshot,
+    PriceCalculationError,
+    calculate_quote,
+    compile_level_table,
+    get_catalog_snapshot,
+    validate_positive_decimal,
+    validate_positive_int,
+)
+
+
+def build_synthetic_snapshot():
+    """Снимок каталога из несохранённых моделей — БД не нужна"""
+    rows = []
+    for offset, level in enumerate(CLEANING_LEVELS):
+        base = 1500 + offset * 500
+        rows += [
+            CleaningPrice(level=level, area_from=0, area_to=50,
+                          price=Decimal(base), old_price=Decimal(base + 300)),
+            CleaningPrice(level=level, area_from=51, area_to=80,
+                          price=Decimal(base + 250)),
+            CleaningPrice(level=level, area_from=81, area_to=120,
+                          price=Decimal("%d.50" % (base + 700))),
+        ]
+    tables = {
+        level: compile_level_table([row for row in rows if row.level == level])
+        for level in CLEANING_LEVELS
+    }
+    extras = {
+        1: ExtraService(id=1, name="windows", price=Decimal("300.00"), price_type="fixed"),
+        2: ExtraService(id=2, name="fridge", price=Decimal("249.90"), price_type="fixed"),
+        3: ExtraService(id=3, name="disinfection", price=Decimal("12.50"), price_type="per_m2"),
+    }
+    dry_cleaning = {
+        1: DryCleaningService(id=1, name="sofa", price=Decimal("800.00"), unit="item"),
+        2: DryCleaningService(id=2, name="carpet", price=Decimal("95.90"), unit="m2"),
+    }
+    pricing = PricingSettings(
+        pk=1, price_per_room=Decimal("350.00"), price_per_bathroom=Decimal("420.50")
+    )
+    return CatalogSnapshot(
+        pricing=pricing,
+        price_tables=tables,
+        extra_services=extras,
+        dry_cleaning_services=dry_cleaning,
+        promo=None,
+    )
+
+
+def _reference_cleaning_price(table, level, area):
+    area = validate_positive_decimal(area, "area")
+    area_int = int(area)
+    if not table.breakpoints:
+        raise PriceCalculationError(f"Base price not found for level '{level}'")
+    index = table.tier_index(area_int)
+    if index is not None:
+        return table.prices[index]
+    if table.step_price is None:
+        raise PriceCalculationError(
+            f"No prices found for level '{level}' to calculate step price"
+        )
+    steps = -(-(area_int - table.step_from) // table.step_size)
+    return (table.prices[-1] + (steps * table.step_price)).quantize(CENTS)
+
+
+def _reference_dry_cleaning_line(item, quantity):
+    if item.unit == "item":
+        if quantity is None:
+            return item.price
+        return item.price * validate_positive_decimal(quantity, f"quantity for {item.name}")
+    elif item.unit == "m2":
+        if quantity is None:
+            raise PriceCalculationError(
+                f"Area required for dry cleaning service '{item.name}' (unit: m²)"
+            )
+        return item.price * validate_positive_decimal(quantity, f"area for {item.name}")
+    raise PriceCalculationError(
+        f"Unknown unit '{item.unit}' for DryCleaningService {item.id}"
+    )
+
+
+def reference_quote(snapshot, level, area, rooms, bathrooms, extra_service_ids, dry_cleaning):
+    """
+    Эталон: прежний calculate_quote на Decimal, тот же порядок проверок,
+    но таблицы цен берутся из переданного снимка, а не из кэша процесса.
+    Возвращает (total, rooms_bathrooms, cleaning, extra_services, dry_cleaning, old_price)
+    """
+    area = validate_positive_decimal(area, "area")
+
+    rooms = validate_positive_int(rooms, "rooms")
+    bathrooms = validate_positive_int(bathrooms, "bathrooms")
+    pricing = snapshot.pricing
+    rooms_bathrooms = (
+        Decimal(rooms) * pricing.price_per_room +
+        Decimal(bathrooms) * pricing.price_per_bathroom
+    ).quantize(CENTS)
+
+    cleaning = Decimal("0")
+    if area > 0:
+        table = snapshot.price_tables.get(level)
+        if table is None:
+            raise PriceCalculationError(
+                f"No prices configured for level '{level}' in admin panel"
+            )
+        cleaning = _reference_cleaning_price(table, level, area)
+
+    extra_services = Decimal("0")
+    for service_id in dict.fromkeys(extra_service_ids):
+        service = snapshot.extra_services.get(service_id)
+        if service is None:
+            continue
+        if service.price_type == "fixed":
+            extra_services += service.price
+        elif service.price_type == "per_m2" and area > 0:
+            extra_services += service.price * area
+
+    dry_cleaning_total = Decimal("0")
+    for item_id, quantity in (dry_cleaning or {}).items():
+        item = snapshot.dry_cleaning_services.get(item_id)
+        if item is None:
+            continue
+        dry_cleaning_total += _reference_dry_cleaning_line(item, quantity)
+
+    others = rooms_bathrooms + extra_services + dry_cleaning_total
+
+    old_price = None
+    if area > 0:
+        table = snapshot.price_tables.get(level)
+        index = table.tier_index(int(validate_positive_decimal(area, "area")))
+        if index is not None and table.old_prices[index]:
+            old_price = table.old_prices[index] + others
+
+    return (
+        cleaning + others,
+        rooms_bathrooms,
+        cleaning,
+        extra_services,
+        dry_cleaning_total,
+        old_price,
+    )
+
+
+def generate_quotes(snapshot, count, seed):
+    rng = random.Random(seed)
+    levels = list(snapshot.price_tables)
+    extra_ids = list(snapshot.extra_services)
+    dry_ids = list(snapshot.dry_cleaning_services)
+    quotes = []
+    for _ in range(count):
+        area = Decimal(rng.randint(0, 3000)).scaleb(-1)
+        dry_cleaning = {}
+        for item_id in rng.sample(dry_ids, rng.randint(0, len(dry_ids))):
+            if snapshot.dry_cleaning_services[item_id].unit == "m2":
+                dry_cleaning[item_id] = Decimal(rng.randint(1, 400)).scaleb(-2)
+            else:
+                dry_cleaning[item_id] = Decimal(rng.randint(1, 4))
+        quotes.append((
+            rng.choice(levels),
+            area,
+            rng.randint(0, 6),
+            rng.randint(0, 3),
+            tuple(rng.sample(extra_ids, rng.randint(0, len(extra_ids)))),
+            dry_cleaning,
+        ))
+    return quotes
+
+
+class Command(BaseCommand):
+    help = "Сравнить скорость и результат расчёта цены в халержах и в Decimal"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--quotes", type=int, default=1_000_000,
+                            help="Количество случайных заявок (по умолчанию 1 000 000)")
+        parser.add_argument("--catalog", action="store_true",
+                            help="Использовать текущие цены из БД вместо синтетического каталога")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        snapshot = get_catalog_snapshot() if options["catalog"] else build_synthetic_snapshot()
+        quotes = generate_quotes(snapshot, options["quotes"], options["seed"])
+        self.stdout.write(f"Заявок: {len(quotes)}")
+
+        started = time.perf_counter()
+        expected = [reference_quote(snapshot, *quote) for quote in quotes]
+        decimal_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        actual = [
+            calculate_quote(
+                level=level, area=area, rooms=rooms, bathrooms=bathrooms,
+                extra_service_ids=extra_ids, dry_cleaning=dry_cleaning,
+                snapshot=snapshot,
+            )
+            for level, area, rooms, bathrooms, extra_ids, dry_cleaning in quotes
+        ]
+        minor_seconds = time.perf_counter() - started
+
+        # Граница API: перевод всех сумм Quote обратно в Decimal
+        started = time.perf_counter()
+        converted = [
+            (quote.total, quote.rooms_bathrooms, quote.cleaning,
+             quote.extra_services, quote.dry_cleaning, quote.old_price)
+            for quote in actual
+        ]
+        boundary_seconds = time.perf_counter() - started
+
+        # Сравнение Decimal по значению: 1500 == 1500.00
+        mismatches = sum(1 for pair in zip(converted, expected) if pair[0] != pair[1])
+
+        self.stdout.write(f"Decimal (эталон):          {decimal_seconds:.2f} s")
+        self.stdout.write(f"calculate_quote (халержи): {minor_seconds:.2f} s")
+        self.stdout.write(f"  + перевод в Decimal:     {boundary_seconds:.2f} s")
+        if mismatches:
+            self.stdout.write(self.style.ERROR(f"Расхождений: {mismatches}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Результаты совпадают"))
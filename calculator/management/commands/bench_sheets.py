@@ -0,0 +1,104 @@
+"""
+Django management команда: обращения к Google Sheets API на заявку.
+
+Отправляет несохранённые заявки в локальную замену gspread (без сети и
+учётных данных) тремя способами: новое подключение на заявку, общее
+подключение и пачки append_rows. Показывает запросов на заявку и сколько
+заняла бы отправка при квоте GOOGLE_SHEETS_REQUESTS_PER_MINUTE.
+
+С --isolation дополнительно сравнивает p99 POST /api/orders/ при исправном
+и деградировавшем Sheets (задержка и ошибки в замене gspread) и завершается
+ошибкой, если p99 вырос больше допустимого.
+
+Примеры:
+    python manage.py bench_sheets
+    python manage.py bench_sheets --orders 1000 --batch-size 50 --json
+    python manage.py bench_sheets --isolation --latency 1 --error-rate 0.8
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from calculator.benchmarks.sheets import run_order_isolation_benchmark, run_sheets_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Бенчмарк Google Sheets: запросов к API на заявку (локальная замена gspread)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--orders', type=int, default=200,
+            help='Количество заявок'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=20,
+            help='Размер пачки append_rows (как --batch-size у process_outbox)'
+        )
+        parser.add_argument(
+            '--isolation', action='store_true',
+            help='Замерить p99 создания заявки при деградировавшем Sheets (заявки откатываются)'
+        )
+        parser.add_argument(
+            '--latency', type=float, default=0.5,
+            help='Задержка каждого запроса к деградировавшему Sheets (сек)'
+        )
+        parser.add_argument(
+            '--error-rate', type=float, default=0.5,
+            help='Доля запросов к деградировавшему Sheets, завершающихся ошибкой'
+        )
+        parser.add_argument(
+            '--max-p99-increase-ms', type=float, default=25.0,
+            help='Допустимый рост p99 создания заявки при деградации (мс)'
+        )
+        parser.add_argument(
+            '--json', action='store_true',
+            help='Вывести результат в JSON'
+        )
+
+    def handle(self, *args, **options):
+        if options['orders'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--orders и --batch-size должны быть положительными')
+
+        results = run_sheets_benchmark(options['orders'], options['batch_size'])
+
+        isolation = []
+        if options['isolation']:
+            with transaction.atomic():
+                isolation = run_order_isolation_benchmark(
+                    options['orders'], options['latency'], options['error_rate']
+                )
+                # Созданные заявки не должны остаться в базе
+                transaction.set_rollback(True)
+
+        if options['json']:
+            self.stdout.write(json.dumps({
+                "calls": [result.as_dict() for result in results],
+                "isolation": [result.as_dict() for result in isolation],
+            }, ensure_ascii=False, indent=2))
+        else:
+            self.stdout.write(f"{'scenario':<24}{'calls':>8}{'per order':>12}{'quota, s':>10}")
+            for result in results:
+                self.stdout.write(
+                    f"{result.name:<24}{result.api_calls:>8}{result.calls_per_order:>12}"
+                    f"{result.quota_seconds:>10.1f}"
+                )
+            if isolation:
+                self.stdout.write(
+                    f"\n{'orders api':<24}{'p50, ms':>10}{'p99, ms':>10}"
+                    f"{'sheets calls':>14}{'errors':>8}{'short-circuited':>17}"
+                )
+                for result in isolation:
+                    self.stdout.write(
+                        f"{result.name:<24}{result.p50_ms:>10.3f}{result.p99_ms:>10.3f}"
+                        f"{result.sheets_calls:>14}{result.sheets_errors:>8}{result.short_circuited:>17}"
+                    )
+
+        if isolation:
+            healthy, degraded = isolation
+            increase = degraded.p99_ms - healthy.p99_ms
+            if increase > options['max_p99_increase_ms']:
+                raise CommandError(
+                    f"p99 создания заявки вырос на {increase:.3f} ms при деградации Sheets "
+                    f"(допустимо {options['max_p99_increase_ms']} ms)"
+                )
@@ -0,0 +1,80 @@
+"""
+Django management команда: воркер outbox заявок (отправка в Google Sheets).
+
+Забирает готовые задачи пачками и выполняет их в пуле потоков; ошибки
+повторяются с экспоненциальной задержкой, после OUTBOX_MAX_ATTEMPTS задача
+получает статус «Ошибка» (видно в админке). Останавливается по SIGTERM/SIGINT
+после текущей пачки.
+
+Примеры:
+    python manage.py process_outbox
+    python manage.py process_outbox --once --workers 2
+    python manage.py process_outbox --stats
+"""
+import json
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from calculator.circuit_breaker import CircuitBreaker
+from calculator.google_sheets import BREAKER_NAME, BREAKER_OPTIONS
+from calculator.outbox import drain_outbox, outbox_stats
+
+
+class Command(BaseCommand):
+    help = 'Воркер outbox заявок: отправка в Google Sheets с повторами'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Размер пула потоков отправки'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=20,
+            help='Сколько задач забирать за раз'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=5.0,
+            help='Пауза (сек), когда готовых задач нет'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Разобрать готовые задачи и выйти'
+        )
+        parser.add_argument(
+            '--stats', action='store_true',
+            help='Вывести счётчики outbox (в т.ч. зависшие задачи) и состояние circuit breaker в JSON и выйти'
+        )
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            stats = outbox_stats()
+            stats['sheets_breaker'] = CircuitBreaker(BREAKER_NAME, **BREAKER_OPTIONS).stats()
+            self.stdout.write(json.dumps(stats, indent=2))
+            return
+
+        if options['workers'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--workers и --batch-size должны быть положительными')
+
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            while not self.stopping:
+                close_old_connections()
+                succeeded, failed = drain_outbox(options['batch_size'], executor=pool)
+                if succeeded or failed:
+                    self.stdout.write(f"outbox: отправлено {succeeded}, ошибок {failed}")
+                elif options['once']:
+                    break
+                else:
+                    time.sleep(options['poll_interval'])
+
+        close_old_connections()
+
+    def stop(self, signum, frame):
+        self.stopping = True
@@ -0,0 +1,64 @@
+"""
+Django management команда: сверка заявок с Google Sheets.
+
+Читает столбец ID таблицы один раз и дозагружает недостающие заявки пачками
+append_rows. Повторный запуск продолжает с контрольной точки.
+
+Примеры:
+    python manage.py reconcile_sheet
+    python manage.py reconcile_sheet --dry-run
+    python manage.py reconcile_sheet --full --chunk-size 1000
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from calculator.circuit_breaker import CircuitOpen
+from calculator.google_sheets import SheetsUnavailable
+from calculator.sheets_reconcile import DEFAULT_CHUNK_SIZE, reconcile_sheet
+
+
+class Command(BaseCommand):
+    help = 'Сверка заявок с Google Sheets: дозагрузка недостающих строк'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+            help='Заявок в окне сверки (и строк в одном append_rows)'
+        )
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Сверить все заявки, не глядя на контрольную точку'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только посчитать недостающие строки'
+        )
+        parser.add_argument(
+            '--json', action='store_true',
+            help='Вывести результат в JSON'
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size должен быть положительным')
+
+        try:
+            result = reconcile_sheet(
+                chunk_size=options['chunk_size'],
+                full=options['full'],
+                dry_run=options['dry_run'],
+            )
+        except (SheetsUnavailable, CircuitOpen) as exc:
+            raise CommandError(str(exc))
+
+        if options['json']:
+            self.stdout.write(json.dumps(result.as_dict(), indent=2))
+            return
+
+        action = 'нужно загрузить' if options['dry_run'] else 'загружено'
+        self.stdout.write(
+            f"Проверено заявок: {result.checked}, уже в таблице: {result.present}, "
+            f"{action}: {result.missing}, ждут outbox: {result.pending}"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Контрольная точка: заявка #{result.checkpoint}"))
@@ -0,0 +1,320 @@
+"""
+Django management команда: симуляция выручки по историческим заявкам
+при изменении цен уборки (CleaningPrice).
+
+Заявки загружаются в массивы NumPy, цены уборки по старой и новой таблице
+считаются векторно, дельта применяется к сохранённой total_price с учётом
+скидки заявки и агрегируется по уровню и месяцу (месяц — по часовому
+поясу --timezone, по умолчанию Europe/Prague).
+
+Тип услуги у заявки не хранится: химчистка отправляется с площадью 0,
+перевозка и чистка обуви — с уровнем basic и площадью 1. Заявки с площадью
+не больше 1 м² поэтому не считаются уборкой и в симуляцию не входят —
+их число выводится в отчёте (excluded_orders).
+
+Нужен NumPy (есть в requirements.txt).
+
+Примеры:
+    python manage.py simulate_prices --table proposal.json
+    python manage.py simulate_prices --table draft_rows.json --synthetic 2000000
+
+Формат файла --table:
+    {"basic": {"tiers": [[50, 1500], [80, 1700]], "step_price": 130, "step_size": 10}, ...,
+     "pricing": {"price_per_room": 0, "price_per_bathroom": 0}}
+где tiers — пары (верхняя граница площади, цена)
+или черновик строк CleaningPrice:
+    [{"level": "basic", "title": "До 50 m²", "area_from": 0, "area_to": 50, "price": 1500}, ...]
+Уровни, которых нет в файле, считаются по текущим ценам.
+"""
+import json
+import time
+import zoneinfo
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models.functions import TruncMonth
+
+from calculator.models import CleaningPrice, Order
+from calculator.services import (
+    CLEANING_LEVELS,
+    DEFAULT_STEP_AREA,
+    LevelPriceTable,
+    compile_level_table,
+    get_catalog_snapshot,
+)
+
+
+# Наибольшая площадь, с которой фронтенд отправляет заявки не на уборку
+NON_CLEANING_MAX_AREA = 1
+
+
+def _to_decimal(value):
+    return None if value is None else Decimal(str(value))
+
+
+def load_proposal(path, current_tables):
+    """
+    Прочитать предлагаемые цены из JSON.
+    Возвращает (таблицы по уровням, {"price_per_room": ..., "price_per_bathroom": ...})
+    """
+    try:
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError) as exc:
+        raise CommandError(f"Не удалось прочитать {path}: {exc}")
+
+    tables = dict(current_tables)
+    pricing = {}
+
+    if isinstance(data, list):
+        # Черновик строк CleaningPrice — компилируем так же, как настоящие
+        rows_by_level = {}
+        for row in data:
+            if not row.get("is_active", True):
+                continue
+            rows_by_level.setdefault(row["level"], []).append(CleaningPrice(
+                level=row["level"],
+                title=row.get("title", ""),
+                area_from=row.get("area_from"),
+                area_to=row.get("area_to"),
+                price=_to_decimal(row["price"]),
+                step_area=row.get("step_area"),
+                sort_order=row.get("sort_order", 0),
+            ))
+        for level, rows in rows_by_level.items():
+            rows.sort(key=lambda p: (p.sort_order, p.area_from is not None, p.area_from or 0))
+            tables[level] = compile_level_table(rows)
+    elif isinstance(data, dict):
+        pricing = {
+            key: _to_decimal(value)
+            for key, value in (data.pop("pricing", None) or {}).items()
+        }
+        for level, values in data.items():
+            tiers = sorted((int(area_to), _to_decimal(price)) for area_to, price in values.get("tiers", []))
+            tables[level] = LevelPriceTable(
+                breakpoints=tuple(area_to for area_to, _ in tiers),
+                prices=tuple(price for _, price in tiers),
+                old_prices=(None,) * len(tiers),
+                rows=(),
+                step_price=_to_decimal(values.get("step_price")),
+                step_size=int(values.get("step_size") or DEFAULT_STEP_AREA),
+            )
+    else:
+        raise CommandError("Ожидается JSON-объект по уровням или массив строк CleaningPrice")
+
+    return tables, pricing
+
+
+def cleaning_prices_vectorized(np, tables, level_idx, area):
+    """
+    Цена уборки для массива заявок — та же логика, что в
+    calculate_cleaning_price_by_level (ступень ищется searchsorted по
+    границам). Где цена не определена — NaN
+    """
+    area_int = np.floor(area)
+    prices = np.full(area.shape, np.nan)
+
+    for idx, level in enumerate(CLEANING_LEVELS):
+        table = tables.get(level)
+        if table is None or not table.breakpoints:
+            continue
+        breakpoints = np.array(table.breakpoints, dtype=np.float64)
+        tier_prices = np.array([float(price) for price in table.prices])
+
+        mask = level_idx == idx
+        a = area_int[mask]
+        tier = np.searchsorted(breakpoints, a, side='left')
+        inside = tier < len(breakpoints)
+
+        level_prices = np.full(a.shape, np.nan)
+        level_prices[inside] = tier_prices[tier[inside]]
+        if table.step_price is not None:
+            steps = np.ceil((a[~inside] - table.step_from) / table.step_size)
+            level_prices[~inside] = tier_prices[-1] + steps * float(table.step_price)
+        prices[mask] = level_prices
+
+    # Без площади уборка не считается
+    prices[area <= 0] = 0.0
+    return prices
+
+
+class Command(BaseCommand):
+    help = 'Симуляция выручки по историческим заявкам при новых ценах уборки'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--table', required=True,
+            help='JSON с новыми ценами (таблица по уровням или черновик строк CleaningPrice)'
+        )
+        parser.add_argument(
+            '--synthetic', type=int, default=0,
+            help='Вместо заявок из базы сгенерировать N синтетических (для замеров)'
+        )
+        parser.add_argument(
+            '--timezone', default='Europe/Prague',
+            help='Часовой пояс, по которому заявки делятся на месяцы'
+        )
+        parser.add_argument(
+            '--json', action='store_true',
+            help='Вывести результат в JSON'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            import numpy as np
+        except ImportError:
+            raise CommandError("NumPy не установлен (pip install numpy)")
+
+        snapshot = get_catalog_snapshot()
+        current_tables = snapshot.price_tables
+        new_tables, new_pricing = load_proposal(options['table'], current_tables)
+
+        try:
+            tzinfo = zoneinfo.ZoneInfo(options['timezone'])
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+            raise CommandError(f"Неизвестный часовой пояс: {options['timezone']}")
+
+        started = time.perf_counter()
+        excluded = 0
+        if options['synthetic']:
+            orders = self._synthetic_orders(np, options['synthetic'], snapshot)
+        else:
+            orders, excluded = self._load_orders(np, tzinfo)
+        loaded = time.perf_counter()
+
+        level_idx, area, rooms, bathrooms, discount, month, total = orders
+        if not len(total):
+            self.stdout.write(self.style.WARNING('Нет заявок для симуляции'))
+            return
+
+        old_cleaning = cleaning_prices_vectorized(np, current_tables, level_idx, area)
+        new_cleaning = cleaning_prices_vectorized(np, new_tables, level_idx, area)
+        delta = new_cleaning - old_cleaning
+
+        room_price = float(snapshot.pricing.price_per_room)
+        bathroom_price = float(snapshot.pricing.price_per_bathroom)
+        delta += rooms * (float(new_pricing.get('price_per_room', room_price)) - room_price)
+        delta += bathrooms * (float(new_pricing.get('price_per_bathroom', bathroom_price)) - bathroom_price)
+
+        # Скидка по дате применялась ко всей сумме заявки
+        delta *= (100 - discount) / 100.0
+        unpriced = np.isnan(delta)
+        delta[unpriced] = 0.0
+        new_total = total + delta
+
+        # Агрегация по (уровень, месяц) одним bincount
+        months, month_idx = np.unique(month, return_inverse=True)
+        group = level_idx * len(months) + month_idx
+        size = len(CLEANING_LEVELS) * len(months)
+        counts = np.bincount(group, minlength=size)
+        old_sums = np.bincount(group, weights=total, minlength=size)
+        new_sums = np.bincount(group, weights=new_total, minlength=size)
+        finished = time.perf_counter()
+
+        rows = []
+        for g in np.flatnonzero(counts):
+            level = CLEANING_LEVELS[g // len(months)]
+            year, month_num = divmod(int(months[g % len(months)]), 12)
+            old_sum, new_sum = float(old_sums[g]), float(new_sums[g])
+            rows.append({
+                'level': level,
+                'month': f"{year}-{month_num + 1:02d}",
+                'orders': int(counts[g]),
+                'revenue': round(old_sum, 2),
+                'simulated': round(new_sum, 2),
+                'delta': round(new_sum - old_sum, 2),
+            })
+
+        summary = {
+            'orders': int(len(total)),
+            'excluded_orders': excluded,
+            'unpriced_orders': int(unpriced.sum()),
+            'revenue': round(float(total.sum()), 2),
+            'simulated': round(float(new_total.sum()), 2),
+            'delta': round(float(delta.sum()), 2),
+            'load_seconds': round(loaded - started, 3),
+            'compute_seconds': round(finished - loaded, 3),
+        }
+
+        if options['json']:
+            self.stdout.write(json.dumps({'summary': summary, 'rows': rows}, ensure_ascii=False))
+            return
+
+        self.stdout.write(f"{'Уровень':<14}{'Месяц':<10}{'Заявок':>9}{'Выручка':>16}{'Симуляция':>16}{'Δ':>14}")
+        for row in rows:
+            self.stdout.write(
+                f"{row['level']:<14}{row['month']:<10}{row['orders']:>9}"
+                f"{row['revenue']:>16.2f}{row['simulated']:>16.2f}{row['delta']:>14.2f}"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Итого: {summary['orders']} заявок, выручка {summary['revenue']:.2f} → "
+            f"{summary['simulated']:.2f} Kč (Δ {summary['delta']:.2f})"
+        ))
+        if summary['excluded_orders']:
+            self.stdout.write(self.style.WARNING(
+                f"{summary['excluded_orders']} заявок не на уборку (площадь ≤ {NON_CLEANING_MAX_AREA} м²: "
+                f"химчистка, перевозка, чистка обуви) в симуляцию не вошли"
+            ))
+        if summary['unpriced_orders']:
+            self.stdout.write(self.style.WARNING(
+                f"{summary['unpriced_orders']} заявок без цены в одной из таблиц — дельта для них 0"
+            ))
+        self.stdout.write(
+            f"Загрузка: {summary['load_seconds']} с, расчёт: {summary['compute_seconds']} с"
+        )
+
+    def _load_orders(self, np, tzinfo):
+        """
+        Выгрузить заявки на уборку в массивы, не создавая объектов моделей.
+        Возвращает (массивы, число исключённых заявок не на уборку)
+        """
+        level_codes = {level: idx for idx, level in enumerate(CLEANING_LEVELS)}
+        columns = ([], [], [], [], [], [], [])
+        orders = Order.objects.exclude(status='cancelled')
+        excluded = orders.filter(area__lte=NON_CLEANING_MAX_AREA).count()
+        rows = orders.filter(area__gt=NON_CLEANING_MAX_AREA).annotate(
+            month=TruncMonth('created_at', tzinfo=tzinfo),
+        ).values_list(
+            'cleaning_level', 'area', 'rooms', 'bathrooms',
+            'applied_discount_percent', 'month', 'total_price',
+        ).order_by().iterator(chunk_size=10000)
+
+        for level, area, rooms, bathrooms, discount, month, total in rows:
+            if level not in level_codes:
+                continue
+            columns[0].append(level_codes[level])
+            columns[1].append(float(area))
+            columns[2].append(rooms)
+            columns[3].append(bathrooms)
+            columns[4].append(discount)
+            columns[5].append(month.year * 12 + month.month - 1)
+            columns[6].append(float(total or 0))
+
+        arrays = (
+            np.array(columns[0], dtype=np.int64),
+            np.array(columns[1], dtype=np.float64),
+            np.array(columns[2], dtype=np.float64),
+            np.array(columns[3], dtype=np.float64),
+            np.array(columns[4], dtype=np.float64),
+            np.array(columns[5], dtype=np.int64),
+            np.array(columns[6], dtype=np.float64),
+        )
+        return arrays, excluded
+
+    def _synthetic_orders(self, np, count, snapshot):
+        """Случайные заявки, оценённые по текущим ценам"""
+        rng = np.random.default_rng(42)
+        level_idx = rng.integers(0, len(CLEANING_LEVELS), count)
+        area = np.round(rng.gamma(4.0, 16.0, count), 1)
+        rooms = rng.integers(0, 4, count).astype(np.float64)
+        bathrooms = rng.integers(0, 3, count).astype(np.float64)
+        discount = rng.choice([0, 0, 0, 10, 20], count).astype(np.float64)
+        month = 2025 * 12 + rng.integers(0, 24, count)
+
+        cleaning = cleaning_prices_vectorized(np, snapshot.price_tables, level_idx, area)
+        total = (
+            np.nan_to_num(cleaning)
+            + rooms * float(snapshot.pricing.price_per_room)
+            + bathrooms * float(snapshot.pricing.price_per_bathroom)
+        ) * (100 - discount) / 100.0
+        return level_idx, area, rooms, bathrooms, discount, month, total
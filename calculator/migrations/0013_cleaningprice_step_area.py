@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-16 20:50
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calculator', '0012_seed_cargo_shoe_categories'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cleaningprice',
+            name='step_area',
+            field=models.PositiveIntegerField(blank=True, help_text='Для диапазона без верхней границы: цена начисляется за каждые начатые N м² сверх последнего диапазона. По умолчанию 10', null=True, validators=[django.core.validators.MinValueValidator(1)], verbose_name='Шаг площади (м²)'),
+        ),
+    ]
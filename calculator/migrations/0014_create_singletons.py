@@ -0,0 +1,24 @@
+"""
+Data migration: create the PricingSettings and CompanyInfo singleton rows,
+so the request path only reads them and never runs get_or_create.
+"""
+from django.db import migrations
+
+SINGLETON_PK = 1
+
+
+def create_singletons(apps, schema_editor):
+    for model_name in ('PricingSettings', 'CompanyInfo'):
+        model = apps.get_model('calculator', model_name)
+        model.objects.get_or_create(pk=SINGLETON_PK)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calculator', '0013_cleaningprice_step_area'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_singletons, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-16 21:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calculator', '0014_create_singletons'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['-date', '-created_at', '-id'], name='review_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='galleryitem',
+            index=models.Index(fields=['sort_order', '-created_at', '-id'], name='gallery_keyset_idx'),
+        ),
+    ]
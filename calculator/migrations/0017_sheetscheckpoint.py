@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-16 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calculator', '0016_orderoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SheetsCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sheet_name', models.CharField(max_length=255, unique=True, verbose_name='Таблица')),
+                ('last_order_id', models.PositiveBigIntegerField(default=0, verbose_name='Последняя сверенная заявка')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Сверка с Google Sheets',
+                'verbose_name_plural': 'Сверка с Google Sheets',
+            },
+        ),
+    ]
@@ -1,7 +1,70 @@
+import threading
+
+from asgiref.sync import sync_to_async
 from django.db import models
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 
 
+# ----------------------------
+# SINGLETON-ЗАПИСИ (кэш процесса)
+# ----------------------------
+# PricingSettings и CompanyInfo — единственные записи с pk=1. Они создаются
+# миграцией 0014, поэтому путь запроса только читает их: один раз на версию
+# каталога. Сохранение в любом процессе меняет общую версию (сигналы
+# catalog_changed), и остальные процессы перечитывают запись не позже чем
+# через CATALOG_VERSION_TTL; в своём процессе запись сбрасывает и
+# invalidate_singleton() из сигналов post_save/post_delete
+SINGLETON_PK = 1
+
+# model -> (версия каталога, запись)
+_singletons = {}
+_singleton_generations = {}
+_singletons_lock = threading.Lock()
+
+
+def get_singleton(model):
+    """
+    Запись singleton-модели только для чтения (общая для всего процесса —
+    не изменять и не сохранять). Если строки нет, отдаётся несохранённый
+    экземпляр со значениями по умолчанию
+    """
+    from .services import get_catalog_version
+
+    version = get_catalog_version()
+    cached = _singletons.get(model)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    generation = _singleton_generations.get(model, 0)
+    instance = model.objects.filter(pk=SINGLETON_PK).first() or model(pk=SINGLETON_PK)
+
+    # Если пока мы читали запись пришла инвалидация, не сохраняем устаревшее.
+    # Версия прочитана до записи: если она сменилась во время чтения,
+    # следующий вызов перечитает запись
+    with _singletons_lock:
+        if generation == _singleton_generations.get(model, 0):
+            _singletons[model] = (version, instance)
+    return instance
+
+
+async def aget_singleton(model):
+    """get_singleton для async-представлений: в поток — только чтение из БД"""
+    from .services import aget_catalog_version
+
+    cached = _singletons.get(model)
+    if cached is not None and cached[0] == await aget_catalog_version():
+        return cached[1]
+    return await sync_to_async(get_singleton)(model)
+
+
+def invalidate_singleton(model):
+    """Сбросить закэшированную запись singleton-модели"""
+    with _singletons_lock:
+        _singleton_generations[model] = _singleton_generations.get(model, 0) + 1
+        _singletons.pop(model, None)
+
+
 class PricingSettings(models.Model):
     """Настройки цен для калькулятора уборки"""
     price_per_room = models.DecimalField(
@@ -27,9 +90,8 @@ class PricingSettings(models.Model):
 
     @classmethod
     def get_settings(cls):
-        """Получить единственную запись настроек или создать новую"""
-        settings, created = cls.objects.get_or_create(pk=1)
-        return settings
+        """Единственная запись настроек (только чтение, кэш процесса)"""
+        return get_singleton(cls)
 
 
 class CleaningType(models.Model):
@@ -162,6 +224,14 @@ class CleaningPrice(models.Model):
         blank=True,
         verbose_name="Площадь до (м²)"
     )
+    step_area = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(1)],
+        verbose_name="Шаг площади (м²)",
+        help_text="Для диапазона без верхней границы: цена начисляется за каждые "
+                  "начатые N м² сверх последнего диапазона. По умолчанию 10"
+    )
 
     old_price = models.DecimalField(
         max_digits=10,
@@ -298,6 +368,104 @@ class Order(models.Model):
         return f"Заявка #{self.id} от {self.name} ({self.total_price} Kč)"
 
 
+class OrderOutbox(models.Model):
+    """
+    Outbox заявок: задача на отправку во внешние системы (Google Sheets).
+    Пишется в одной транзакции с Order, разбирается командой process_outbox
+    """
+    KIND_SHEETS_APPEND = 'sheets_append'
+    KIND_CHOICES = (
+        (KIND_SHEETS_APPEND, 'Google Sheets'),
+    )
+
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'Ожидает'),
+        (STATUS_PROCESSING, 'Обрабатывается'),
+        (STATUS_DONE, 'Выполнено'),
+        (STATUS_FAILED, 'Ошибка'),
+    )
+
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name='outbox_items',
+        verbose_name="Заявка"
+    )
+    kind = models.CharField(
+        max_length=30,
+        choices=KIND_CHOICES,
+        default=KIND_SHEETS_APPEND,
+        verbose_name="Тип"
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        verbose_name="Статус"
+    )
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Попыток")
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name="Следующая попытка")
+    locked_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name="Взято в работу",
+        help_text="Задача в статусе «Обрабатывается» дольше OUTBOX_STUCK_AFTER считается зависшей"
+    )
+    last_error = models.TextField(blank=True, default="", verbose_name="Последняя ошибка")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создано")
+    processed_at = models.DateTimeField(blank=True, null=True, verbose_name="Выполнено")
+
+    class Meta:
+        verbose_name = "Задача outbox"
+        verbose_name_plural = "Outbox заявок"
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} для заявки #{self.order_id} ({self.get_status_display()})"
+
+
+class SheetsCheckpoint(models.Model):
+    """
+    Контрольная точка сверки заявок с Google Sheets (команда reconcile_sheet):
+    все заявки до last_order_id включительно уже есть в таблице
+    """
+    sheet_name = models.CharField(max_length=255, unique=True, verbose_name="Таблица")
+    last_order_id = models.PositiveBigIntegerField(default=0, verbose_name="Последняя сверенная заявка")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлено")
+
+    class Meta:
+        verbose_name = "Сверка с Google Sheets"
+        verbose_name_plural = "Сверка с Google Sheets"
+
+    def __str__(self):
+        return f"{self.sheet_name}: до заявки #{self.last_order_id}"
+
+
+class SharedCounter(models.Model):
+    """
+    Общий счётчик процессов при кэше в базе (calculator.counters): бюджеты
+    rate limit и счётчики breaker'а. Увеличивается одним UPDATE, поэтому
+    параллельные воркеры не теряют приращений
+    """
+    key = models.CharField(max_length=255, unique=True, verbose_name="Ключ")
+    value = models.BigIntegerField(default=0, verbose_name="Значение")
+    expires_at = models.DateTimeField(db_index=True, verbose_name="Истекает")
+
+    class Meta:
+        verbose_name = "Общий счётчик"
+        verbose_name_plural = "Общие счётчики"
+
+    def __str__(self):
+        return f"{self.key} = {self.value}"
+
+
 class Review(models.Model):
     """Отзывы клиентов"""
     name = models.CharField(max_length=100, verbose_name="Имя клиента")
@@ -316,6 +484,10 @@ class Review(models.Model):
         verbose_name = "Отзыв"
         verbose_name_plural = "Отзывы"
         ordering = ['-date', '-created_at']
+        indexes = [
+            # Keyset-пагинация /api/reviews/
+            models.Index(fields=['-date', '-created_at', '-id'], name='review_keyset_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.rating}★"
@@ -362,6 +534,10 @@ class GalleryItem(models.Model):
         verbose_name = "Фото до/после"
         verbose_name_plural = "Галерея до/после"
         ordering = ['sort_order', '-created_at']
+        indexes = [
+            # Keyset-пагинация /api/gallery/
+            models.Index(fields=['sort_order', '-created_at', '-id'], name='gallery_keyset_idx'),
+        ]
 
     def __str__(self):
         return self.caption or f"Фото #{self.id}"
@@ -406,9 +582,13 @@ class CompanyInfo(models.Model):
 
     @classmethod
     def get_info(cls):
-        """Получить единственную запись или создать новую"""
-        info, created = cls.objects.get_or_create(pk=1)
-        return info
+        """Единственная запись о компании (только чтение, кэш процесса)"""
+        return get_singleton(cls)
+
+    @classmethod
+    async def aget_info(cls):
+        """get_info для async-представлений"""
+        return await aget_singleton(cls)
 
 
 class DateDiscount(models.Model):
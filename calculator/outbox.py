@@ -0,0 +1,181 @@
+"""
+Outbox заявок: отправка во внешние системы вне запроса.
+
+create_order_api пишет OrderOutbox в одной транзакции с Order, а команда
+process_outbox забирает готовые задачи пачками, выполняет их в пуле
+потоков ограниченного размера (задачи одного типа — одним вызовом
+обработчика, для Google Sheets это один append_rows) и при ошибке
+откладывает повтор с экспоненциальной задержкой. Задача, которая висит в «Обрабатывается»
+дольше OUTBOX_STUCK_AFTER (воркер упал посреди отправки), забирается снова.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+from .circuit_breaker import CircuitOpen
+from .models import Order, OrderOutbox
+
+
+def _send_to_sheet(orders):
+    from .google_sheets import send_orders_to_sheet
+    send_orders_to_sheet(orders)
+
+
+# Тип задачи → обработчик пачки заявок (список Order); исключение означает
+# «повторить позже» для всей пачки
+OUTBOX_HANDLERS = {
+    OrderOutbox.KIND_SHEETS_APPEND: _send_to_sheet,
+}
+
+# Длина текста ошибки, сохраняемого в задаче
+MAX_ERROR_LENGTH = 2000
+
+
+def enqueue_order(order, kind=OrderOutbox.KIND_SHEETS_APPEND):
+    """Поставить заявку в outbox (вызывать в транзакции создания заявки)"""
+    return OrderOutbox.objects.create(order=order, kind=kind)
+
+
+def retry_delay(attempts):
+    """Задержка перед следующей попыткой: база * 2^(попытка-1), не больше максимума"""
+    delay = settings.OUTBOX_RETRY_BASE * 2 ** max(attempts - 1, 0)
+    return datetime.timedelta(seconds=min(delay, settings.OUTBOX_RETRY_MAX))
+
+
+def _due_items(now):
+    stuck_before = now - datetime.timedelta(seconds=settings.OUTBOX_STUCK_AFTER)
+    return OrderOutbox.objects.filter(
+        Q(status=OrderOutbox.STATUS_PENDING, next_attempt_at__lte=now)
+        | Q(status=OrderOutbox.STATUS_PROCESSING, locked_at__lt=stuck_before)
+    )
+
+
+def claim_batch(limit):
+    """
+    Забрать до limit готовых задач: пометить «Обрабатывается» и увеличить
+    счётчик попыток. На PostgreSQL параллельные воркеры не берут одни и те же
+    строки (SELECT ... FOR UPDATE SKIP LOCKED)
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        queryset = _due_items(now)
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        items = list(queryset.order_by('next_attempt_at', 'id')[:limit])
+        OrderOutbox.objects.filter(id__in=[item.id for item in items]).update(
+            status=OrderOutbox.STATUS_PROCESSING,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+    for item in items:
+        item.status = OrderOutbox.STATUS_PROCESSING
+        item.locked_at = now
+        item.attempts += 1
+    return items
+
+
+def _record_failure(item, exc):
+    now = timezone.now()
+    error = f"{type(exc).__name__}: {exc}"[:MAX_ERROR_LENGTH]
+    if item.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        changes = {'status': OrderOutbox.STATUS_FAILED}
+    else:
+        changes = {
+            'status': OrderOutbox.STATUS_PENDING,
+            'next_attempt_at': now + retry_delay(item.attempts),
+        }
+    # Условие на locked_at: если задачу уже забрали снова как зависшую,
+    # результат этой попытки не затирает новую
+    OrderOutbox.objects.filter(pk=item.pk, locked_at=item.locked_at).update(
+        locked_at=None, last_error=error, **changes
+    )
+
+
+def _defer(item, exc):
+    # Сервис заведомо недоступен (цепь разомкнута) — попытка не считается,
+    # повтор после того, как предохранитель пропустит пробный вызов
+    OrderOutbox.objects.filter(pk=item.pk, locked_at=item.locked_at).update(
+        status=OrderOutbox.STATUS_PENDING,
+        attempts=F('attempts') - 1,
+        next_attempt_at=timezone.now() + datetime.timedelta(seconds=exc.retry_after),
+        locked_at=None,
+        last_error=str(exc)[:MAX_ERROR_LENGTH],
+    )
+
+
+def process_batch(kind, items):
+    """
+    Выполнить забранные задачи одного типа одним вызовом обработчика
+    (например, одна запись append_rows на всю пачку). Возвращает число
+    успешных задач
+    """
+    try:
+        orders = Order.objects.in_bulk([item.order_id for item in items])
+        OUTBOX_HANDLERS[kind]([orders[item.order_id] for item in items])
+    except CircuitOpen as exc:
+        for item in items:
+            _defer(item, exc)
+        return 0
+    except Exception as exc:
+        for item in items:
+            _record_failure(item, exc)
+        return 0
+
+    processed_at = timezone.now()
+    for item in items:
+        OrderOutbox.objects.filter(pk=item.pk, locked_at=item.locked_at).update(
+            status=OrderOutbox.STATUS_DONE,
+            processed_at=processed_at,
+            locked_at=None,
+            last_error="",
+        )
+    return len(items)
+
+
+def _process_in_pool(batch):
+    # Соединение с БД у каждого потока своё — закрываем его после пачки,
+    # иначе пул копит открытые соединения
+    try:
+        return process_batch(*batch)
+    finally:
+        connections.close_all()
+
+
+def drain_outbox(batch_size, executor=None):
+    """
+    Одна пачка задач: забрать и выполнить, по одному вызову обработчика на
+    тип задачи (в пуле executor или в текущем потоке).
+    Возвращает (выполнено, с ошибкой)
+    """
+    items = claim_batch(batch_size)
+    by_kind = {}
+    for item in items:
+        by_kind.setdefault(item.kind, []).append(item)
+
+    batches = list(by_kind.items())
+    if executor is None:
+        results = [process_batch(kind, kind_items) for kind, kind_items in batches]
+    else:
+        results = list(executor.map(_process_in_pool, batches))
+    succeeded = sum(results)
+    return succeeded, len(items) - succeeded
+
+
+def outbox_stats():
+    """Счётчики по статусам, зависшие задачи и возраст самой старой ожидающей"""
+    now = timezone.now()
+    stuck_before = now - datetime.timedelta(seconds=settings.OUTBOX_STUCK_AFTER)
+    stats = {status: 0 for status, _ in OrderOutbox.STATUS_CHOICES}
+    for row in OrderOutbox.objects.order_by().values('status').annotate(count=Count('id')):
+        stats[row['status']] = row['count']
+    stats['stuck'] = OrderOutbox.objects.filter(
+        status=OrderOutbox.STATUS_PROCESSING, locked_at__lt=stuck_before
+    ).count()
+    oldest = OrderOutbox.objects.filter(status=OrderOutbox.STATUS_PENDING).aggregate(
+        oldest=Min('created_at')
+    )['oldest']
+    stats['oldest_pending_seconds'] = int((now - oldest).total_seconds()) if oldest else None
+    return stats
@@ -0,0 +1,115 @@
+"""
+Keyset-пагинация списков API.
+
+Страница продолжается строго после последней строки предыдущей (по ключу
+сортировки, последний элемент ключа — id), без OFFSET: стоимость запроса
+не растёт с номером страницы, а новые записи не сдвигают уже выданные.
+Курсор непрозрачен для клиента: base64 от JSON со значениями ключа.
+"""
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class PaginationError(ValueError):
+    """Некорректный курсор или размер страницы"""
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Размер страницы из параметра запроса, не больше maximum"""
+    if value in (None, ""):
+        return default
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        raise PaginationError("limit должен быть целым числом")
+    if size < 1:
+        raise PaginationError("limit должен быть положительным")
+    return min(size, maximum)
+
+
+def _json_value(value):
+    # isoformat без округления: курсор должен точно совпадать со значением в БД
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(values):
+    raw = json.dumps([_json_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, length):
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise PaginationError("Некорректный курсор")
+    if not isinstance(values, list) or len(values) != length:
+        raise PaginationError("Некорректный курсор")
+    return values
+
+
+def _after(ordering, values):
+    """
+    Условие «строго после values» для ключа ordering (например
+    ('-date', '-created_at', '-id')): лексикографическое сравнение кортежей
+    """
+    condition = Q()
+    equal = Q()
+    for key, value in zip(ordering, values):
+        field = key.lstrip("-")
+        lookup = "lt" if key.startswith("-") else "gt"
+        condition |= equal & Q(**{f"{field}__{lookup}": value})
+        equal &= Q(**{field: value})
+    return condition
+
+
+def _page_queryset(queryset, ordering, fields, cursor, page_size):
+    keys = [key.lstrip("-") for key in ordering]
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        values = decode_cursor(cursor, len(ordering))
+        try:
+            queryset = queryset.filter(_after(ordering, values))
+        except (ValidationError, TypeError, ValueError):
+            # Значение из курсора не приводится к типу поля
+            raise PaginationError("Некорректный курсор")
+    return queryset.values(*dict.fromkeys([*fields, *keys]))[:page_size + 1], keys
+
+
+def _page_result(rows, keys, fields, page_size):
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor([rows[-1][key] for key in keys])
+
+    extra_keys = [key for key in keys if key not in fields]
+    for row in rows:
+        for key in extra_keys:
+            del row[key]
+    return rows, next_cursor
+
+
+def keyset_page(queryset, ordering, fields, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Страница queryset по ключу ordering.
+    Возвращает (строки — словари с полями fields, курсор следующей страницы
+    или None, если страница последняя)
+    """
+    page, keys = _page_queryset(queryset, ordering, fields, cursor, page_size)
+    return _page_result(list(page), keys, fields, page_size)
+
+
+async def akeyset_page(queryset, ordering, fields, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """keyset_page для async-представлений (асинхронная итерация QuerySet)"""
+    page, keys = _page_queryset(queryset, ordering, fields, cursor, page_size)
+    return _page_result([row async for row in page], keys, fields, page_size)
@@ -0,0 +1,77 @@
+"""
+Подписанные котировки: /api/price/ выдаёт токен с параметрами расчёта,
+итогом, скидкой календаря и версией каталога, а /api/orders/ проверяет
+подпись (HMAC от SECRET_KEY через django.core.signing) вместо того, чтобы
+верить сумме из браузера или считать цену заново.
+"""
+import datetime
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+from typing import Optional
+
+from django.conf import settings
+from django.core import signing
+
+QUOTE_TOKEN_SALT = "calculator.quote"
+
+
+class QuoteTokenError(ValueError):
+    """Токен подделан, повреждён или просрочен"""
+
+
+@dataclass(frozen=True)
+class SignedQuote:
+    """Содержимое проверенного токена"""
+    params: dict
+    total: Decimal
+    discount_percent: int
+    date: Optional[datetime.date]
+    catalog_version: int
+
+
+def make_quote_token(params, total, discount_percent, date, catalog_version) -> str:
+    """Компактный токен котировки (параметры — как из _parse_quote_params)"""
+    payload = {
+        "l": params["level"],
+        "a": str(params["area"]),
+        "r": params["rooms"],
+        "b": params["bathrooms"],
+        "e": params["extra_service_ids"],
+        "d": {str(item_id): str(qty) for item_id, qty in params["dry_cleaning"].items()},
+        "t": str(total),
+        "p": discount_percent,
+        "dt": date.isoformat() if date else None,
+        "v": catalog_version,
+    }
+    return signing.dumps(payload, salt=QUOTE_TOKEN_SALT, compress=True)
+
+
+def read_quote_token(token) -> SignedQuote:
+    """Проверить подпись и срок действия токена"""
+    if not isinstance(token, str):
+        raise QuoteTokenError("Некорректная котировка")
+    try:
+        payload = signing.loads(token, salt=QUOTE_TOKEN_SALT, max_age=settings.QUOTE_TOKEN_MAX_AGE)
+    except signing.SignatureExpired:
+        raise QuoteTokenError("Котировка устарела, рассчитайте цену заново")
+    except signing.BadSignature:
+        raise QuoteTokenError("Некорректная котировка")
+
+    # Подпись верна — формат задан make_quote_token
+    try:
+        return SignedQuote(
+            params={
+                "level": payload["l"],
+                "area": Decimal(payload["a"]),
+                "rooms": payload["r"],
+                "bathrooms": payload["b"],
+                "extra_service_ids": payload["e"],
+                "dry_cleaning": {int(k): Decimal(v) for k, v in payload["d"].items()},
+            },
+            total=Decimal(payload["t"]),
+            discount_percent=payload["p"],
+            date=datetime.date.fromisoformat(payload["dt"]) if payload["dt"] else None,
+            catalog_version=payload["v"],
+        )
+    except (KeyError, TypeError, ValueError, InvalidOperation, AttributeError):
+        raise QuoteTokenError("Некорректная котировка")
@@ -0,0 +1,149 @@
+"""
+Ограничение частоты запросов к /api/price/ и /api/orders/ по IP клиента.
+
+Бюджеты — настройка RATE_LIMITS: {'price': {'per_minute': 60, 'burst': 20}, ...}.
+Проверка в две ступени:
+
+    локальный token bucket процесса (per_minute / 60 токенов в секунду,
+    ёмкость burst) — разрешение без обращений к кэшу;
+
+    общий бюджет — не больше per_minute + burst запросов за минутное окно на
+    все процессы. Процесс берёт токены из него пачками атомарным счётчиком
+    (calculator.counters), поэтому общее хранилище трогается раз в несколько
+    запросов. Невыбранный остаток пачки сгорает с окном — ошибка в сторону
+    строгости.
+
+RATE_LIMIT_CACHE — алиас кэша из CACHES. В production "default" общий, и
+лимит действует на все воркеры вместе: с Redis счётчик в Redis, с кэшем в
+базе — в таблице SharedCounter (incr у DatabaseCache не атомарен). С
+LocMemCache (локально) бюджет свой в каждом процессе. Если общее хранилище
+недоступно, запрос пропускается.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.conf import settings
+
+from .counters import incr_counter
+from .json_encoding import FastJsonResponse
+
+# Окно общего бюджета (сек)
+WINDOW = 60
+# Сколько IP помнит процесс; давно не приходившие вытесняются
+MAX_LOCAL_KEYS = 10000
+
+
+class RateLimiter:
+
+    def __init__(self, scope, per_minute, burst, cache_alias="default", clock=time.time):
+        self.scope = scope
+        self.rate = per_minute / WINDOW
+        self.burst = burst
+        self.budget = per_minute + burst
+        self.lease = max(1, burst // 4)
+        self.cache_alias = cache_alias
+        self._clock = clock
+        # ip -> [токены, время обновления, выбранный из общего бюджета остаток, окно остатка]
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key):
+        """Учесть запрос: 0 — разрешён, иначе через сколько секунд повторить"""
+        now = self._clock()
+        window = int(now // WINDOW)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(self.burst), now, 0, window]
+                if len(self._buckets) > MAX_LOCAL_KEYS:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            if bucket[0] < 1:
+                return (1 - bucket[0]) / self.rate
+            if bucket[3] != window:
+                bucket[2], bucket[3] = 0, window
+            if bucket[2] > 0:
+                bucket[0] -= 1
+                bucket[2] -= 1
+                return 0.0
+
+        granted = self._lease(key, window)
+        with self._lock:
+            if not granted:
+                return (window + 1) * WINDOW - now
+            if bucket[3] == window:
+                bucket[2] += granted - 1
+            bucket[0] -= 1
+            return 0.0
+
+    def _lease(self, key, window):
+        """Взять до self.lease токенов из общего бюджета окна"""
+        counter_key = f"calculator:ratelimit:{self.scope}:{key}:{window}"
+        try:
+            used = incr_counter(self.cache_alias, counter_key, self.lease, timeout=WINDOW * 2)
+        except Exception:
+            # Общее хранилище недоступно — ограничивает только локальный bucket
+            return self.lease
+        return max(0, min(self.lease, self.budget - (used - self.lease)))
+
+    def reset(self):
+        """Забыть локальные bucket'ы (общий бюджет истечёт сам)"""
+        with self._lock:
+            self._buckets.clear()
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(scope):
+    """Лимитер процесса для scope из RATE_LIMITS (новый при изменении настроек)"""
+    config = settings.RATE_LIMITS[scope]
+    alias = getattr(settings, "RATE_LIMIT_CACHE", "default")
+    key = (scope, config["per_minute"], config["burst"], alias)
+    limiter = _limiters.get(key)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.setdefault(
+                key, RateLimiter(scope, config["per_minute"], config["burst"], cache_alias=alias)
+            )
+    return limiter
+
+
+def client_ip(request):
+    """
+    IP клиента. За RATE_LIMIT_PROXY_COUNT доверенными прокси — адрес,
+    который добавил в X-Forwarded-For самый дальний из них
+    """
+    proxies = getattr(settings, "RATE_LIMIT_PROXY_COUNT", 0)
+    if proxies:
+        forwarded = [part.strip() for part in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",")]
+        forwarded = [part for part in forwarded if part]
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies]
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def rate_limit(scope):
+    """Декоратор представления: сверх бюджета scope — 429 с Retry-After"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if getattr(settings, "RATE_LIMIT_ENABLED", True):
+                retry_after = get_limiter(scope).hit(client_ip(request))
+                if retry_after:
+                    response = FastJsonResponse(
+                        {"error": "Слишком много запросов, попробуйте позже"}, status=429
+                    )
+                    response["Retry-After"] = str(max(1, math.ceil(retry_after)))
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
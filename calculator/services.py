@@ -1,12 +1,22 @@
 """
 Сервис для работы с ценами уборки
-Вся логика выбора цены (не расчёта!) вынесена сюда
+Вся логика выбора и расчёта цены вынесена сюда
 """
-import math
-from decimal import Decimal
-from typing import Optional, List
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, Optional, List, Tuple
 
-from .models import CleaningPrice, PricingSettings, DryCleaningService
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import get_language
+
+from .models import (
+    CleaningPrice, PricingSettings, DryCleaningService, ExtraService, PromoText
+)
 
 
 class PriceCalculationError(Exception):
@@ -38,6 +48,38 @@ def validate_positive_decimal(value, field_name: str) -> Decimal:
         raise PriceCalculationError(f"{field_name} must be a valid number")
 
 
+# ----------------------------
+# СУММЫ В ХАЛЕРЖАХ (1/100 Kč)
+# ----------------------------
+# Внутри расчёта деньги — целые халержи; Decimal только на входе из моделей
+# и на выходе в API. Если в расчёте участвует дробная площадь или количество
+# с k знаками, суммы ведутся в единицах 10^-k халержа — так результат точно
+# совпадает с арифметикой Decimal без округлений.
+CENTS = Decimal("0.01")
+
+
+def to_minor(value: Decimal) -> int:
+    """Сумма в Kč (не больше 2 знаков после запятой) → целые халержи"""
+    if not isinstance(value, Decimal):
+        # Несохранённые модели отдают default поля как есть (int/float)
+        value = Decimal(str(value))
+    return int(value.scaleb(2))
+
+
+def from_minor(value: int, scale: int = 0) -> Decimal:
+    """Целые халержи × 10^scale → Decimal в Kč"""
+    return Decimal(value).scaleb(-2 - scale)
+
+
+def to_fixed_point(value: Decimal) -> Tuple[int, int]:
+    """Decimal → (целое, scale), где value = целое / 10^scale"""
+    integral = int(value)
+    if integral == value:
+        return integral, 0
+    scale = -value.as_tuple().exponent
+    return int(value.scaleb(scale)), scale
+
+
 # ----------------------------
 # БАЗОВЫЙ РАСЧЁТ: комнаты + санузлы
 # ----------------------------
@@ -53,28 +95,360 @@ def calculate_room_bathroom_price(
     bathrooms = validate_positive_int(bathrooms, "bathrooms")
 
     if pricing is None:
-        pricing = PricingSettings.get_settings()
+        pricing = get_catalog_snapshot().pricing
 
-    total = (
-        Decimal(rooms) * pricing.price_per_room +
-        Decimal(bathrooms) * pricing.price_per_bathroom
+    return from_minor(
+        rooms * to_minor(pricing.price_per_room) +
+        bathrooms * to_minor(pricing.price_per_bathroom)
+    )
+
+
+# ----------------------------
+# СКОМПИЛИРОВАННАЯ ТАБЛИЦА ЦЕН (кэш процесса)
+# ----------------------------
+@dataclass(frozen=True)
+class LevelPriceTable:
+    """
+    Цены одного уровня уборки, скомпилированные из строк CleaningPrice:
+    ступени с фиксированной ценой по возрастанию верхней границы площади
+    и открытый диапазон с ценой за каждые начатые step_size м² сверх
+    последней ступени
+    """
+    breakpoints: Tuple[int, ...]
+    prices: Tuple[Decimal, ...]
+    old_prices: Tuple[Optional[Decimal], ...]
+    rows: Tuple[CleaningPrice, ...]
+    step_price: Optional[Decimal] = None
+    step_size: int = 10
+    step_row: Optional[CleaningPrice] = None
+    # Те же цены в халержах; step_price_minor = None, если расчётная цена
+    # шага не кратна халержу (тогда шаг считается в Decimal)
+    prices_minor: Tuple[int, ...] = field(init=False)
+    old_prices_minor: Tuple[Optional[int], ...] = field(init=False)
+    step_price_minor: Optional[int] = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "prices_minor", tuple(to_minor(p) for p in self.prices))
+        object.__setattr__(self, "old_prices_minor", tuple(
+            to_minor(p) if p else None for p in self.old_prices
+        ))
+        step_price = self.step_price
+        object.__setattr__(self, "step_price_minor", (
+            to_minor(step_price)
+            if step_price is not None and step_price == step_price.quantize(CENTS)
+            else None
+        ))
+
+    @property
+    def step_from(self) -> Optional[int]:
+        """Площадь, выше которой действует цена за шаг"""
+        return self.breakpoints[-1] if self.breakpoints else None
+
+    def tier_index(self, area_int: int) -> Optional[int]:
+        """Индекс ступени для площади (bisect) или None, если площадь выше всех ступеней"""
+        index = bisect_left(self.breakpoints, area_int)
+        return index if index < len(self.breakpoints) else None
+
+
+# Шаг открытого диапазона, если в строке не указан step_area
+DEFAULT_STEP_AREA = 10
+
+CLEANING_LEVELS = tuple(level for level, _ in CleaningPrice.CLEANING_LEVELS)
+
+
+def compile_level_table(prices) -> LevelPriceTable:
+    """
+    Собрать таблицу одного уровня из строк CleaningPrice
+    (строки уже отсортированы по sort_order, area_from)
+
+    - строка с area_to — ступень: цена для площади до area_to включительно
+      (выше предыдущей ступени); при одинаковом area_to берётся первая
+    - первая строка без area_to — открытый диапазон: цена за каждые начатые
+      step_area м² сверх последней ступени
+    """
+    tiers = {}
+    step_row = None
+    for price in prices:
+        if price.area_to is None:
+            if step_row is None:
+                step_row = price
+        else:
+            tiers.setdefault(price.area_to, price)
+
+    rows = tuple(tiers[area_to] for area_to in sorted(tiers))
+    breakpoints = tuple(row.area_to for row in rows)
+    tier_prices = tuple(row.price for row in rows)
+    step_size = (step_row.step_area if step_row is not None else None) or DEFAULT_STEP_AREA
+
+    # Если цены за шаг нет, вычисляем её по последним ступеням
+    if step_row is not None:
+        step_price = step_row.price
+    elif len(rows) >= 2 and tier_prices[-1] and tier_prices[-2]:
+        # Средняя цена за шаг = (цена_n - цена_n-1) / (граница_n - граница_n-1) * шаг
+        step_price = (
+            (tier_prices[-1] - tier_prices[-2])
+            / Decimal(breakpoints[-1] - breakpoints[-2])
+            * Decimal(step_size)
+        )
+    elif rows and tier_prices[-1] and breakpoints[-1]:
+        # Одна ступень: цена за шаг пропорционально площади ступени
+        step_price = tier_prices[-1] / (Decimal(breakpoints[-1]) / Decimal(step_size))
+    else:
+        step_price = None
+
+    return LevelPriceTable(
+        breakpoints=breakpoints,
+        prices=tier_prices,
+        old_prices=tuple(row.old_price for row in rows),
+        rows=rows,
+        step_price=step_price,
+        step_size=step_size,
+        step_row=step_row,
+    )
+
+
+# ----------------------------
+# СНИМОК КАТАЛОГА ЦЕН (кэш процесса)
+# ----------------------------
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """
+    Согласованный снимок всего, что нужно для расчёта цены.
+    Модели храним целиком: переводимые поля (name, text) modeltranslation
+    отдаёт на активном языке при обращении
+    """
+    pricing: PricingSettings
+    price_tables: Dict[str, LevelPriceTable]
+    extra_services: Dict[int, ExtraService]
+    dry_cleaning_services: Dict[int, DryCleaningService]
+    promo: Optional[PromoText]
+    # Цены в халержах для горячего пути расчёта
+    room_price_minor: int = field(init=False)
+    bathroom_price_minor: int = field(init=False)
+    extra_prices_minor: Dict[int, Tuple[str, int]] = field(init=False)
+    dry_cleaning_prices_minor: Dict[int, Tuple[str, int]] = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "room_price_minor", to_minor(self.pricing.price_per_room))
+        object.__setattr__(self, "bathroom_price_minor", to_minor(self.pricing.price_per_bathroom))
+        object.__setattr__(self, "extra_prices_minor", {
+            service_id: (service.price_type, to_minor(service.price))
+            for service_id, service in self.extra_services.items()
+        })
+        object.__setattr__(self, "dry_cleaning_prices_minor", {
+            item_id: (item.unit, to_minor(item.price))
+            for item_id, item in self.dry_cleaning_services.items()
+        })
+
+
+# (версия каталога, при которой собран снимок; снимок)
+_catalog_snapshot: Optional[Tuple[int, CatalogSnapshot]] = None
+_catalog_generation = 0
+
+
+def _load_catalog_snapshot() -> CatalogSnapshot:
+    """Прочитать каталог из базы: по одному запросу на таблицу"""
+    cleaning_prices: Dict[str, List[CleaningPrice]] = {}
+    for price in CleaningPrice.objects.filter(is_active=True).order_by(
+        'level', 'sort_order', 'area_from'
+    ):
+        cleaning_prices.setdefault(price.level, []).append(price)
+
+    # Читаем строку вместе с остальным каталогом, а не через get_settings():
+    # снимок и кэш singleton-записи сбрасываются разными сигналами.
+    # Пока записи нет, действуют значения по умолчанию
+    pricing = PricingSettings.objects.filter(pk=1).first() or PricingSettings(pk=1)
+
+    return CatalogSnapshot(
+        pricing=pricing,
+        price_tables={
+            level: compile_level_table(rows)
+            for level, rows in cleaning_prices.items()
+        },
+        extra_services={
+            service.id: service
+            for service in ExtraService.objects.filter(is_active=True)
+        },
+        dry_cleaning_services={
+            item.id: item
+            for item in DryCleaningService.objects.filter(is_active=True)
+        },
+        promo=PromoText.get_active(),
     )
 
-    return total.quantize(Decimal("0.01"))
+
+def get_catalog_snapshot() -> CatalogSnapshot:
+    """
+    Снимок каталога, хранимый в процессе.
+    Пересобирается после invalidate_catalog_snapshot() (сигналы
+    post_save/post_delete на моделях цен в этом процессе) и при смене
+    версии каталога в общем кэше — так доходят изменения из других процессов
+    """
+    global _catalog_snapshot
+
+    version = get_catalog_version()
+    current = _catalog_snapshot
+    if current is not None:
+        if current[0] == version:
+            return current[1]
+        # Каталог изменили в другом процессе: котировки из кэша тоже устарели
+        invalidate_catalog_snapshot()
+
+    generation = _catalog_generation
+    snapshot = _load_catalog_snapshot()
+
+    # Если пока мы читали каталог пришла инвалидация, не сохраняем устаревшее.
+    # Версия прочитана до сборки: смена версии во время чтения пересоберёт снимок
+    if generation == _catalog_generation:
+        _catalog_snapshot = (version, snapshot)
+    return snapshot
+
+
+def invalidate_catalog_snapshot() -> None:
+    """Сбросить снимок каталога"""
+    global _catalog_snapshot, _catalog_generation
+    _catalog_generation += 1
+    _catalog_snapshot = None
+    quote_cache.clear()
+
+
+def get_price_tables() -> Dict[str, LevelPriceTable]:
+    """Скомпилированные таблицы цен уборки по уровням"""
+    return get_catalog_snapshot().price_tables
+
+
+# ----------------------------
+# ВЕРСИЯ КАТАЛОГА (для ETag)
+# ----------------------------
+# Счётчик хранится в кэше Django CATALOG_VERSION_CACHE (алиас state в
+# CACHES). В production это общий кэш без вытеснения (Redis или отдельная
+# таблица в базе), и все воркеры видят одну версию; по ней же процессы
+# узнают, что снимок каталога устарел. С LocMemCache (локально, без
+# DATABASE_URL) версия своя в каждом процессе.
+# Прочитанное значение процесс помнит CATALOG_VERSION_TTL секунд: тёплый
+# запрос не обращается к кэшу (с DatabaseCache это были бы запросы к БД),
+# а изменение из другого процесса становится видно не позже чем через TTL.
+# Начальное значение — время в микросекундах: после рестарта или очистки
+# кэша версия не совпадёт ни с одной выданной ранее
+CATALOG_VERSION_CACHE_KEY = "calculator:catalog_version"
+
+# (версия, time.monotonic() момента чтения)
+_catalog_version_memo: Optional[Tuple[int, float]] = None
+
+
+def _version_cache():
+    return caches[getattr(settings, "CATALOG_VERSION_CACHE", "default")]
+
+
+def _remembered_version() -> Optional[int]:
+    memo = _catalog_version_memo
+    if memo is None:
+        return None
+    version, read_at = memo
+    if time.monotonic() - read_at >= getattr(settings, "CATALOG_VERSION_TTL", 1):
+        return None
+    return version
+
+
+def _remember_version(version: int) -> int:
+    global _catalog_version_memo
+    _catalog_version_memo = (version, time.monotonic())
+    return version
+
+
+def forget_catalog_version() -> None:
+    """Забыть запомненную версию: следующее чтение пойдёт в кэш"""
+    global _catalog_version_memo
+    _catalog_version_memo = None
+
+
+def get_catalog_version() -> int:
+    """Текущая версия каталога (без запросов к БД)"""
+    version = _remembered_version()
+    if version is not None:
+        return version
+    version_cache = _version_cache()
+    version = version_cache.get(CATALOG_VERSION_CACHE_KEY)
+    if version is None:
+        version_cache.add(CATALOG_VERSION_CACHE_KEY, time.time_ns() // 1000, timeout=None)
+        version = version_cache.get(CATALOG_VERSION_CACHE_KEY)
+    return _remember_version(version)
+
+
+async def aget_catalog_version() -> int:
+    """get_catalog_version для async-представлений"""
+    version = _remembered_version()
+    if version is not None:
+        return version
+    version_cache = _version_cache()
+    version = await version_cache.aget(CATALOG_VERSION_CACHE_KEY)
+    if version is None:
+        await version_cache.aadd(CATALOG_VERSION_CACHE_KEY, time.time_ns() // 1000, timeout=None)
+        version = await version_cache.aget(CATALOG_VERSION_CACHE_KEY)
+    return _remember_version(version)
+
+
+def bump_catalog_version() -> int:
+    """Увеличить версию каталога (вызывается сигналами при изменении данных)"""
+    version_cache = _version_cache()
+    try:
+        version = version_cache.incr(CATALOG_VERSION_CACHE_KEY)
+    except ValueError:
+        # Ключа ещё нет (или его вытеснили) — начинаем новую версию
+        forget_catalog_version()
+        get_catalog_version()
+        version = version_cache.incr(CATALOG_VERSION_CACHE_KEY)
+    return _remember_version(version)
 
 
 # ----------------------------
 # РАСЧЁТ ЦЕНЫ ДЛЯ УБОРКИ (по формуле с данными из базы)
 # ----------------------------
+def _get_level_table(level: str) -> LevelPriceTable:
+    table = get_price_tables().get(level)
+    if table is None:
+        raise PriceCalculationError(
+            f"No prices configured for level '{level}' in admin panel"
+        )
+    return table
+
+
+def _cleaning_price_minor(table: LevelPriceTable, level: str, area_int: int) -> int:
+    """Цена уборки в халержах по скомпилированной таблице"""
+    if not table.breakpoints:
+        raise PriceCalculationError(
+            f"Base price not found for level '{level}'"
+        )
+
+    index = table.tier_index(area_int)
+    if index is not None:
+        return table.prices_minor[index]
+
+    if table.step_price is None:
+        raise PriceCalculationError(
+            f"No prices found for level '{level}' to calculate step price"
+        )
+
+    # Шаги округляем вверх: при шаге 10 и последней ступени до 80 м²
+    # 81-90 = 1 шаг, 91-100 = 2 шага, 101-110 = 3 шага
+    steps = -(-(area_int - table.step_from) // table.step_size)
+
+    if table.step_price_minor is not None:
+        return table.prices_minor[-1] + steps * table.step_price_minor
+
+    # Расчётная цена шага не кратна халержу — округляем как раньше, в Decimal
+    return to_minor((table.prices[-1] + steps * table.step_price).quantize(CENTS))
+
+
 def calculate_cleaning_price_by_level(area: Decimal, level: str) -> Decimal:
     """
     Рассчитать цену уборки по площади и уровню
-    Использует цены из базы данных (CleaningPrice)
+    Использует скомпилированную таблицу цен из CleaningPrice (get_price_tables)
     
-    Логика:
-    - 0-50 м² → цена из CleaningPrice с area_to=50
-    - 51-80 м² → цена из CleaningPrice с area_from=50, area_to=80
-    - >80 м² → цена_51_80 + (steps * цена_за_10м²), где цена_за_10м² из CleaningPrice с area_from=80
+    Логика (на примере 0–50, 51–80, +10 m²):
+    - площадь до верхней границы ступени → цена ступени (поиск bisect)
+    - выше последней ступени → цена_последней + (steps * цена_за_шаг),
+      где steps — число начатых шагов (step_area, по умолчанию 10 м²)
     
     Args:
         area: Площадь в м²
@@ -84,180 +458,76 @@ def calculate_cleaning_price_by_level(area: Decimal, level: str) -> Decimal:
         Рассчитанная цена
     """
     area = validate_positive_decimal(area, "area")
-    area_int = int(area)
+    return from_minor(_cleaning_price_minor(_get_level_table(level), level, int(area)))
 
-    # Получаем все активные цены для данного уровня
-    prices = CleaningPrice.objects.filter(
-        level=level,
-        is_active=True
-    ).order_by('sort_order', 'area_from')
 
-    if not prices.exists():
-        raise PriceCalculationError(
-            f"No prices configured for level '{level}' in admin panel"
-        )
-
-    # Ищем цену для 0-50 м² (area_from=0 или None, area_to=50)
-    price_0_50 = None
-    for price in prices:
-        if (price.area_from is None or price.area_from == 0) and price.area_to == 50:
-            price_0_50 = price.price
-            break
-
-    # Ищем цену для 51-80 м² (area_from=51, area_to=80)
-    price_51_80 = None
-    for price in prices:
-        if price.area_from == 51 and price.area_to == 80:
-            price_51_80 = price.price
-            break
-
-    # Ищем цену за +10 м² (для площади >80)
-    # Это цена с area_from >= 80 (обычно 81) и area_to is None, или в названии есть "+10"
-    price_per_step = None
-    for price in prices:
-        # Ищем цену для шага: area_from >= 80 (или 81) и area_to is None
-        if price.area_from is not None and price.area_from >= 80 and price.area_to is None:
-            price_per_step = price.price
-            break
-        # Или ищем по названию "+10" или "10 м" или "за 10"
-        elif ("+10" in price.title.lower() or "+ 10" in price.title.lower() or 
-              "10 м" in price.title.lower() or "за 10" in price.title.lower() or
-              "10м" in price.title.lower()):
-            price_per_step = price.price
-            break
-
-    # Если не нашли цену за шаг, вычисляем её на основе существующих цен
-    if price_per_step is None:
-        if price_51_80 and price_0_50:
-            # Средняя цена за 10 м² = (цена_51_80 - цена_0_50) / 30 * 10
-            price_per_step = (price_51_80 - price_0_50) / Decimal("30") * Decimal("10")
-        elif price_51_80:
-            # Если есть только цена за 51-80, используем примерно 1/8 от неё
-            price_per_step = price_51_80 / Decimal("8")
-        elif price_0_50:
-            # Если есть только цена за 0-50, используем примерно 1/5 от неё
-            price_per_step = price_0_50 / Decimal("5")
-        else:
-            raise PriceCalculationError(
-                f"No prices found for level '{level}' to calculate step price"
-            )
-
-    # Расчёт цены
-    if area_int <= 50:
-        if price_0_50 is None:
-            raise PriceCalculationError(
-                f"Price for 0-50 m² not found for level '{level}'"
-            )
-        return price_0_50
-    
-    elif area_int <= 80:
-        if price_51_80 is None:
-            # Если нет цены для 51-80, используем цену для 0-50
-            if price_0_50 is None:
-                raise PriceCalculationError(
-                    f"Price for 51-80 m² not found for level '{level}'"
-                )
-            return price_0_50
-        return price_51_80
-    
-    else:
-        # >80 м² → price_51_80 + (steps * price_per_step)
-        if price_51_80 is None:
-            if price_0_50 is None:
-                raise PriceCalculationError(
-                    f"Base price not found for level '{level}'"
-                )
-            base_price = price_0_50
-        else:
-            base_price = price_51_80
-        
-        if price_per_step is None:
-            # Если не нашли цену за шаг, используем расчёт на основе базовой цены
-            # Берём среднюю цену за м² из диапазона 51-80
-            if price_51_80:
-                # Примерная цена за 10 м² = (цена_51_80 - цена_0_50) / 30 * 10
-                if price_0_50:
-                    price_per_step = (price_51_80 - price_0_50) / Decimal("30") * Decimal("10")
-                else:
-                    price_per_step = price_51_80 / Decimal("8")  # Примерно 1/8 от цены за 80 м²
-            else:
-                # Fallback: используем базовую цену / 8
-                price_per_step = base_price / Decimal("8")
-        
-        # Для площадей >80 м² считаем шаги по 10 м²
-        # Например: 81-90 = 1 шаг, 91-100 = 2 шага, 101-110 = 3 шага
-        extra_area = area_int - 80
-        # Если extra_area = 0, то шагов нет (но это не должно произойти, т.к. area_int > 80)
-        # Если extra_area = 1-10, то 1 шаг
-        # Если extra_area = 11-20, то 2 шага
-        # И так далее
-        if extra_area <= 0:
-            steps = 0
-        else:
-            # Округляем вверх: ceil((extra_area) / 10)
-            # Для 1-10 м² = 1 шаг, для 11-20 м² = 2 шага
-            steps = math.ceil(extra_area / 10.0)
-        
-        price = base_price + (Decimal(str(steps)) * price_per_step)
-        return price.quantize(Decimal("0.01"))
+def get_cleaning_old_price(area: Decimal, level: str) -> Optional[Decimal]:
+    """
+    Старая цена (для акции) уборки: old_price ступени, в которую попадает
+    площадь. Выше последней ступени цена считается по формуле и старой нет
+    """
+    area = validate_positive_decimal(area, "area")
+    table = get_price_tables().get(level)
+    if table is None:
+        return None
+    index = table.tier_index(int(area))
+    if index is None:
+        return None
+    return table.old_prices[index] or None
 
 
 # ----------------------------
-# ВЫБОР ЦЕНЫ ДЛЯ УБОРКИ (по площади и уровню) - для других уровней
+# ВЫБОР СТРОКИ ЦЕНЫ ДЛЯ УБОРКИ (по площади и уровню)
 # ----------------------------
 def get_cleaning_price_for_area(
     area: Decimal,
     level: str = "basic"
 ) -> Optional[CleaningPrice]:
     """
-    Получить цену уборки для заданной площади и уровня
-    Для уровня "basic" используется формула calculate_cleaning_price_by_area
+    Получить строку CleaningPrice, по которой считается цена для площади
     
     Args:
         area: Площадь в м²
         level: Уровень уборки (basic, general, general_plus)
     
     Returns:
-        CleaningPrice объект или None если не найдено
+        CleaningPrice ступени, строка открытого диапазона или None
     """
     area = validate_positive_decimal(area, "area")
-    area_int = int(area)
 
-    # Для всех уровней используем формулу с данными из базы
-    if level in ["basic", "general", "general_plus"]:
-        # Используем формулу для всех уровней (цены берутся из базы)
-        return None  # Будем обрабатывать отдельно в API
-
-    # Для других уровней ищем в базе
-    prices = CleaningPrice.objects.filter(
-        level=level,
-        is_active=True
-    ).order_by('sort_order', 'area_from')
-
-    # Ищем подходящую цену
-    for price in prices:
-        # Диапазон: area_from <= area <= area_to
-        if price.area_from is not None and price.area_to is not None:
-            if price.area_from <= area_int <= price.area_to:
-                return price
-        
-        # От area_from и выше (без верхней границы)
-        elif price.area_from is not None and price.area_to is None:
-            if area_int >= price.area_from:
-                return price
-        
-        # До area_to (без нижней границы)
-        elif price.area_from is None and price.area_to is not None:
-            if area_int <= price.area_to:
-                return price
-
-    # Если ничего не найдено, возвращаем первую цену (или None)
-    return prices.first()
+    table = get_price_tables().get(level)
+    if table is None:
+        return None
+    index = table.tier_index(int(area))
+    if index is None:
+        return table.step_row
+    return table.rows[index]
 
 
 # ----------------------------
 # ХИМЧИСТКА (расчёт по выбранным объектам)
 # ----------------------------
+def _dry_cleaning_line_price(item: DryCleaningService, quantity) -> Decimal:
+    """
+    Цена одной позиции химчистки
+    - "item": цена × количество (по умолчанию 1 шт)
+    - "m2": цена × площадь (площадь обязательна)
+    """
+    if item.unit == "item":
+        if quantity is None:
+            return item.price
+        return item.price * validate_positive_decimal(quantity, f"quantity for {item.name}")
+    elif item.unit == "m2":
+        if quantity is None:
+            raise PriceCalculationError(
+                f"Area required for dry cleaning service '{item.name}' (unit: m²)"
+            )
+        return item.price * validate_positive_decimal(quantity, f"area for {item.name}")
+    raise PriceCalculationError(
+        f"Unknown unit '{item.unit}' for DryCleaningService {item.id}"
+    )
+
+
 def calculate_dry_cleaning_price(
     items: List[DryCleaningService],
     areas: Optional[dict] = None
@@ -267,7 +537,8 @@ def calculate_dry_cleaning_price(
     
     Args:
         items: Список объектов химчистки
-        areas: Словарь {service_id: area} для объектов с единицей "m2"
+        areas: Словарь {service_id: количество или площадь}
+               (площадь обязательна для объектов с единицей "m2")
     
     Returns:
         Общая цена за химчистку
@@ -280,22 +551,304 @@ def calculate_dry_cleaning_price(
     for item in items:
         if not item.is_active:
             continue
+        total += _dry_cleaning_line_price(item, areas.get(item.id))
+
+    return total.quantize(Decimal("0.01"))
+
+
+# ----------------------------
+# КОТИРОВКА (все услуги по одному снимку каталога)
+# ----------------------------
+@dataclass(frozen=True)
+class Quote:
+    """
+    Результат расчёта: итог, разбивка, старая цена и текст акции
+    Суммы хранятся целыми халержами; total, extra_services, dry_cleaning и
+    old_price — в единицах 10^-scale халержа (дробная площадь/количество).
+    Decimal создаётся только при обращении к свойствам (граница API)
+    """
+    total_minor: int
+    rooms_bathrooms_minor: int
+    cleaning_minor: int
+    extra_services_minor: int
+    dry_cleaning_minor: int
+    old_price_minor: Optional[int] = None
+    scale: int = 0
+    promo_text: Optional[str] = None
+
+    @property
+    def total(self) -> Decimal:
+        return from_minor(self.total_minor, self.scale)
+
+    @property
+    def rooms_bathrooms(self) -> Decimal:
+        return from_minor(self.rooms_bathrooms_minor)
+
+    @property
+    def cleaning(self) -> Decimal:
+        return from_minor(self.cleaning_minor)
+
+    @property
+    def extra_services(self) -> Decimal:
+        return from_minor(self.extra_services_minor, self.scale)
+
+    @property
+    def dry_cleaning(self) -> Decimal:
+        return from_minor(self.dry_cleaning_minor, self.scale)
+
+    @property
+    def old_price(self) -> Optional[Decimal]:
+        if self.old_price_minor is None:
+            return None
+        return from_minor(self.old_price_minor, self.scale)
+
+
+def calculate_quote(
+    *,
+    level: str = "basic",
+    area: Optional[Decimal] = None,
+    rooms: int = 0,
+    bathrooms: int = 0,
+    extra_service_ids=(),
+    dry_cleaning: Optional[dict] = None,
+    snapshot: Optional[CatalogSnapshot] = None,
+) -> Quote:
+    """
+    Расчёт цены за все услуги за один проход по снимку каталога
+    (целочисленно, в халержах; Decimal только на входе и в Quote)
+    
+    Args:
+        level: Уровень уборки (basic, general, general_plus)
+        area: Площадь в м²
+        rooms: Количество комнат
+        bathrooms: Количество туалетов
+        extra_service_ids: ID дополнительных услуг
+        dry_cleaning: Словарь {service_id: количество или площадь}
+        snapshot: Снимок каталога (по умолчанию — кэш процесса)
+    
+    Returns:
+        Quote с итогом и разбивкой
+    """
+    if snapshot is None:
+        snapshot = get_catalog_snapshot()
+    area = validate_positive_decimal(area, "area")
+    rooms = validate_positive_int(rooms, "rooms")
+    bathrooms = validate_positive_int(bathrooms, "bathrooms")
+    area_int = int(area)
 
-        if item.unit == "item":
-            total += item.price
-        elif item.unit == "m2":
-            if item.id not in areas:
+    # 1. Комнаты и туалеты
+    rooms_bathrooms = (
+        rooms * snapshot.room_price_minor +
+        bathrooms * snapshot.bathroom_price_minor
+    )
+
+    # 2. Уборка (по площади и уровню)
+    cleaning = 0
+    table = None
+    if area > 0:
+        table = snapshot.price_tables.get(level)
+        if table is None:
+            raise PriceCalculationError(
+                f"No prices configured for level '{level}' in admin panel"
+            )
+        cleaning = _cleaning_price_minor(table, level, area_int)
+
+    # 3-4. Доп. услуги и химчистка. Позиции с дробным множителем хранятся
+    # как (сумма, scale) и приводятся к общему масштабу в конце
+    extra_services = 0
+    dry_cleaning_total = 0
+    scaled_extras = []
+    scaled_dry_cleaning = []
+    area_fixed_point = None
+    for service_id in dict.fromkeys(extra_service_ids):
+        entry = snapshot.extra_prices_minor.get(service_id)
+        if entry is None:
+            continue
+        price_type, price = entry
+        if price_type == "fixed":
+            extra_services += price
+        elif price_type == "per_m2" and area > 0:
+            if area_fixed_point is None:
+                area_fixed_point = to_fixed_point(area)
+            units, units_scale = area_fixed_point
+            scaled_extras.append((price * units, units_scale))
+
+    for item_id, quantity in (dry_cleaning or {}).items():
+        entry = snapshot.dry_cleaning_prices_minor.get(item_id)
+        if entry is None:
+            continue
+        unit, price = entry
+        if unit not in ("item", "m2"):
+            raise PriceCalculationError(
+                f"Unknown unit '{unit}' for DryCleaningService {item_id}"
+            )
+        if quantity is None:
+            if unit == "m2":
+                item = snapshot.dry_cleaning_services[item_id]
                 raise PriceCalculationError(
                     f"Area required for dry cleaning service '{item.name}' (unit: m²)"
                 )
-            area = validate_positive_decimal(areas[item.id], f"area for {item.name}")
-            total += item.price * area
+            dry_cleaning_total += price
+            continue
+        if not isinstance(quantity, Decimal) or quantity < 0:
+            # Название (переводимое поле) читаем только ради сообщения об ошибке
+            item = snapshot.dry_cleaning_services[item_id]
+            label = "quantity" if unit == "item" else "area"
+            quantity = validate_positive_decimal(quantity, f"{label} for {item.name}")
+        units, units_scale = to_fixed_point(quantity)
+        if units_scale:
+            scaled_dry_cleaning.append((price * units, units_scale))
         else:
-            raise PriceCalculationError(
-                f"Unknown unit '{item.unit}' for DryCleaningService {item.id}"
-            )
+            dry_cleaning_total += price * units
+
+    # Общий масштаб: самая длинная дробная часть среди множителей
+    scale = 0
+    if scaled_extras or scaled_dry_cleaning:
+        scale = max(units_scale for _, units_scale in scaled_extras + scaled_dry_cleaning)
+        extra_services *= 10 ** scale
+        dry_cleaning_total *= 10 ** scale
+        for amount, units_scale in scaled_extras:
+            extra_services += amount * 10 ** (scale - units_scale)
+        for amount, units_scale in scaled_dry_cleaning:
+            dry_cleaning_total += amount * 10 ** (scale - units_scale)
+
+    factor = 10 ** scale
+    others = rooms_bathrooms * factor + extra_services + dry_cleaning_total
+
+    # Старая цена (акция) только для уборки в пределах ступеней: для больших
+    # площадей цена считается по формуле и старой цены нет
+    old_price = None
+    if table is not None:
+        index = table.tier_index(area_int)
+        if index is not None and table.old_prices_minor[index]:
+            old_price = table.old_prices_minor[index] * factor + others
+
+    promo = snapshot.promo
+    return Quote(
+        total_minor=cleaning * factor + others,
+        rooms_bathrooms_minor=rooms_bathrooms,
+        cleaning_minor=cleaning,
+        extra_services_minor=extra_services,
+        dry_cleaning_minor=dry_cleaning_total,
+        old_price_minor=old_price,
+        scale=scale,
+        promo_text=promo.text if promo and promo.text else None,
+    )
 
-    return total.quantize(Decimal("0.01"))
+
+# ----------------------------
+# КЭШ КОТИРОВОК (LRU в процессе)
+# ----------------------------
+class QuoteCache:
+    """
+    Ограниченный LRU-кэш готовых Quote.
+    clear() вызывается при любом изменении цен (invalidate_catalog_snapshot);
+    котировка, посчитанная до сброса, в кэш уже не попадёт (generation)
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._entries: "OrderedDict[tuple, Quote]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[Quote]:
+        with self._lock:
+            quote = self._entries.get(key)
+            if quote is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return quote
+
+    def put(self, key: tuple, quote: Quote, generation: int) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = quote
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+quote_cache = QuoteCache(getattr(settings, "QUOTE_CACHE_SIZE", 1024))
+
+
+def _quote_cache_key(snapshot, level, area, rooms, bathrooms, extra_service_ids, dry_cleaning):
+    """
+    Нормализованный ключ котировки. Уборка зависит только от целой площади,
+    точная площадь нужна лишь для доп. услуг за м². Количества химчистки
+    берём как строки: от их записи ("2" / "2.0") зависит формат ответа
+    """
+    extra_ids = tuple(sorted(set(extra_service_ids)))
+    per_m2 = any(
+        snapshot.extra_prices_minor.get(service_id, ("",))[0] == "per_m2"
+        for service_id in extra_ids
+    )
+    area = validate_positive_decimal(area, "area")
+    return (
+        get_language(),
+        level,
+        str(area) if per_m2 else int(area),
+        rooms,
+        bathrooms,
+        extra_ids,
+        tuple(sorted(
+            (item_id, None if quantity is None else str(quantity))
+            for item_id, quantity in (dry_cleaning or {}).items()
+        )),
+    )
+
+
+def calculate_quote_cached(
+    *,
+    level: str = "basic",
+    area: Optional[Decimal] = None,
+    rooms: int = 0,
+    bathrooms: int = 0,
+    extra_service_ids=(),
+    dry_cleaning: Optional[dict] = None,
+) -> Quote:
+    """calculate_quote по текущему снимку каталога через LRU-кэш котировок"""
+    generation = quote_cache.generation
+    snapshot = get_catalog_snapshot()
+    key = _quote_cache_key(
+        snapshot, level, area, rooms, bathrooms, extra_service_ids, dry_cleaning
+    )
+    quote = quote_cache.get(key)
+    if quote is None:
+        quote = calculate_quote(
+            level=level,
+            area=area,
+            rooms=rooms,
+            bathrooms=bathrooms,
+            extra_service_ids=extra_service_ids,
+            dry_cleaning=dry_cleaning,
+            snapshot=snapshot,
+        )
+        quote_cache.put(key, quote, generation)
+    return quote
 
 
 # ----------------------------
@@ -311,7 +864,7 @@ def calculate_total_price(
     dry_cleaning_areas: Optional[dict] = None,
 ) -> Decimal:
     """
-    Расчёт итоговой цены за все услуги
+    Расчёт итоговой цены за все услуги (через calculate_quote)
     
     Args:
         rooms: Количество комнат
@@ -324,33 +877,27 @@ def calculate_total_price(
     Returns:
         Итоговая цена
     """
-    total = Decimal("0")
-
-    # 1. Комнаты и туалеты
-    if rooms > 0 or bathrooms > 0:
-        total += calculate_room_bathroom_price(rooms, bathrooms)
-
-    # 2. Уборка (выбор цены по площади)
-    if area is not None and area > 0:
-        if cleaning_level in ["basic", "general", "general_plus"]:
-            # Для всех уровней используем формулу
-            total += calculate_cleaning_price_by_level(area, cleaning_level)
-        else:
-            # Для других уровней ищем в базе
-            cleaning_price = get_cleaning_price_for_area(area, cleaning_level)
-            if cleaning_price:
-                total += cleaning_price.price
-            else:
-                raise PriceCalculationError(
-                    f"No price found for area {area} m² and level '{cleaning_level}'"
-                )
-
-    # 3. Химчистка
-    if dry_cleaning_items:
-        total += calculate_dry_cleaning_price(
-            dry_cleaning_items,
-            dry_cleaning_areas
-        )
+    dry_cleaning_areas = dry_cleaning_areas or {}
+    dry_cleaning = {
+        item.id: dry_cleaning_areas.get(item.id)
+        for item in (dry_cleaning_items or [])
+        if item.is_active
+    }
+
+    quote = calculate_quote(
+        level=cleaning_level,
+        area=area,
+        rooms=rooms,
+        bathrooms=bathrooms,
+        dry_cleaning=dry_cleaning,
+    )
+    return quote.total.quantize(Decimal("0.01"))
 
-    return total.quantize(Decimal("0.01"))
 
+def apply_date_discount(total: Decimal, discount_percent: int) -> Decimal:
+    """
+    Цена со скидкой календаря, округлённая до целой кроны —
+    так же, как её показывает калькулятор
+    """
+    discounted = total * (100 - discount_percent) / 100
+    return discounted.quantize(Decimal("1"), rounding=ROUND_HALF_UP)
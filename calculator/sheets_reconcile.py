@@ -0,0 +1,128 @@
+"""
+Сверка заявок с Google Sheets: дозагрузка строк, которые не попали в таблицу
+(Sheets был недоступен, истекли учётные данные и т.п.).
+
+Столбец ID читается из таблицы один раз, заявки идут потоком по id окнами
+по chunk_size: недостающие строки окна уходят одним append_rows, после чего
+контрольная точка (SheetsCheckpoint) сдвигается на конец окна. Повторный
+запуск начинает с контрольной точки. В памяти — только id из таблицы выше
+контрольной точки и одно окно заявок.
+
+Заявки, чья задача outbox ещё не выполнена, пропускаются — их отправит
+process_outbox; контрольная точка не заходит дальше первой такой заявки.
+"""
+import itertools
+from dataclasses import asdict, dataclass
+
+from django.db.models import Max
+from django.utils import timezone
+
+from .google_sheets import SHEET_NAME, _build_row, get_sheets_client
+from .models import Order, OrderOutbox, SheetsCheckpoint
+
+DEFAULT_CHUNK_SIZE = 500
+
+# Номер столбца ID в DEFAULT_HEADER
+ID_COLUMN = 1
+
+
+@dataclass
+class ReconcileResult:
+    checked: int = 0
+    present: int = 0
+    missing: int = 0
+    pending: int = 0
+    checkpoint: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def parse_sheet_ids(values, after=0):
+    """Id заявок из столбца ID (заголовок и мусор пропускаются), только > after"""
+    ids = set()
+    for value in values:
+        try:
+            order_id = int(str(value).strip())
+        except ValueError:
+            continue
+        if order_id > after:
+            ids.add(order_id)
+    return ids
+
+
+def _windows(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        window = list(itertools.islice(iterator, size))
+        if not window:
+            return
+        yield window
+
+
+def reconcile_sheet(client=None, chunk_size=DEFAULT_CHUNK_SIZE, full=False, dry_run=False):
+    """
+    Дозагрузить в таблицу заявки, которых в ней нет.
+    full — сверять с начала, не глядя на контрольную точку;
+    dry_run — только посчитать, ничего не записывая
+    """
+    client = client or get_sheets_client()
+    checkpoint, _ = SheetsCheckpoint.objects.get_or_create(sheet_name=SHEET_NAME)
+    start = 0 if full else checkpoint.last_order_id
+    result = ReconcileResult(checkpoint=checkpoint.last_order_id)
+
+    # Порядок важен: сначала верхняя граница (более новые заявки не сверяем),
+    # затем незавершённые задачи outbox и только потом таблица — строка,
+    # которую воркер допишет между этими чтениями, принадлежит заявке из
+    # pending_ids, и дубликата не будет
+    upper = Order.objects.aggregate(upper=Max('id'))['upper']
+    if upper is None or upper <= start:
+        return result
+    pending_ids = set(
+        OrderOutbox.objects
+        .filter(order_id__gt=start, order_id__lte=upper)
+        .filter(status__in=[OrderOutbox.STATUS_PENDING, OrderOutbox.STATUS_PROCESSING])
+        .values_list('order_id', flat=True)
+    )
+    sheet_ids = parse_sheet_ids(client.column_values(ID_COLUMN), after=start)
+
+    orders = (
+        Order.objects
+        .filter(id__gt=start, id__lte=upper)
+        .order_by('id')
+        .iterator(chunk_size=chunk_size)
+    )
+    first_pending = min(pending_ids, default=None)
+    for window in _windows(orders, chunk_size):
+        missing = []
+        for order in window:
+            if order.id in pending_ids:
+                result.pending += 1
+            elif order.id in sheet_ids:
+                result.present += 1
+            else:
+                missing.append(order)
+        result.checked += len(window)
+        result.missing += len(missing)
+        if dry_run:
+            continue
+
+        client.append_rows([_build_row(order) for order in missing])
+
+        # Упавшие задачи outbox по этим заявкам больше не нужны: повтор
+        # из админки дал бы дубликат строки
+        window_ids = [order.id for order in window if order.id not in pending_ids]
+        OrderOutbox.objects.filter(
+            order_id__in=window_ids, status=OrderOutbox.STATUS_FAILED
+        ).update(status=OrderOutbox.STATUS_DONE, processed_at=timezone.now())
+
+        reconciled_to = window[-1].id
+        if first_pending is not None and first_pending <= reconciled_to:
+            reconciled_to = first_pending - 1
+        if reconciled_to > checkpoint.last_order_id:
+            checkpoint.last_order_id = reconciled_to
+            checkpoint.save(update_fields=['last_order_id', 'updated_at'])
+        sheet_ids.difference_update(order.id for order in window)
+
+    result.checkpoint = checkpoint.last_order_id
+    return result
@@ -0,0 +1,104 @@
+"""
+Сигналы приложения calculator: сброс кэшей при изменении данных в админке
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .models import (
+    Advantage, CargoOption, CargoTariff, CleaningPrice, CleaningType, CompanyInfo,
+    DateDiscount, DryCleaningService, ExtraService, GalleryItem, PricingSettings,
+    PromoText, Review, ServiceCategory, ShoeCleaningService, invalidate_singleton,
+)
+from .catalog import CATALOG_SECTION_MODELS, invalidate_catalog_model
+from .discounts import bump_discounts_generation
+from .services import bump_catalog_version, invalidate_catalog_snapshot
+
+PRICING_MODELS = (
+    PricingSettings,
+    CleaningPrice,
+    ExtraService,
+    DryCleaningService,
+    PromoText,
+)
+
+SINGLETON_MODELS = (
+    PricingSettings,
+    CompanyInfo,
+)
+
+# Всё, что отдают read-API и страницы. Order сюда не входит: заявки
+# не влияют на ответы каталога, и каждая новая заявка сбрасывала бы ETag
+CATALOG_MODELS = PRICING_MODELS + (
+    CleaningType,
+    Review,
+    Advantage,
+    GalleryItem,
+    CompanyInfo,
+    DateDiscount,
+    ServiceCategory,
+    CargoTariff,
+    CargoOption,
+    ShoeCleaningService,
+)
+
+
+def pricing_changed(sender, **kwargs):
+    """
+    Данные для расчёта цен изменились — пересобрать снимок каталога
+    (и ещё раз после коммита: расчёт до коммита мог собрать снимок из старых строк)
+    """
+    invalidate_catalog_snapshot()
+    transaction.on_commit(invalidate_catalog_snapshot)
+
+
+def catalog_changed(sender, **kwargs):
+    """
+    Данные каталога изменились — новая версия для ETag и снимков каталога
+    (и ещё раз после коммита: под старой версией до коммита могли
+    закэшироваться ответы со старыми строками)
+    """
+    bump_catalog_version()
+    transaction.on_commit(bump_catalog_version)
+
+
+def singleton_changed(sender, **kwargs):
+    """
+    Singleton-запись изменилась — сбросить её сразу и ещё раз после коммита,
+    чтобы чтение до коммита не закэшировало старую строку
+    """
+    invalidate_singleton(sender)
+    transaction.on_commit(lambda: invalidate_singleton(sender))
+
+
+def discounts_changed(sender, **kwargs):
+    """
+    Скидки по датам изменились — сбросить помесячный кэш календаря
+    (и ещё раз после коммита: чтение до коммита могло закэшировать старое)
+    """
+    bump_discounts_generation()
+    transaction.on_commit(bump_discounts_generation)
+
+
+def catalog_section_changed(sender, **kwargs):
+    """Переводимые данные изменились — пересобрать разделы каталога этой модели"""
+    invalidate_catalog_model(sender)
+
+
+for model in PRICING_MODELS:
+    post_save.connect(pricing_changed, sender=model)
+    post_delete.connect(pricing_changed, sender=model)
+
+for model in SINGLETON_MODELS:
+    post_save.connect(singleton_changed, sender=model)
+    post_delete.connect(singleton_changed, sender=model)
+
+for model in CATALOG_MODELS:
+    post_save.connect(catalog_changed, sender=model)
+    post_delete.connect(catalog_changed, sender=model)
+
+post_save.connect(discounts_changed, sender=DateDiscount)
+post_delete.connect(discounts_changed, sender=DateDiscount)
+
+for model in CATALOG_SECTION_MODELS:
+    post_save.connect(catalog_section_changed, sender=model)
+    post_delete.connect(catalog_section_changed, sender=model)
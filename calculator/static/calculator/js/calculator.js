@@ -15,6 +15,7 @@ class Calculator {
         this.extraServices = [];
         this.drycleaningItems = {};
         this.discounts = {};
+        this.priceCurve = null;
         this.isSubmitting = false;
 
         // Cargo state
@@ -91,12 +92,7 @@ class Calculator {
     }
 
     async init() {
-        await this.loadDiscounts();
-        await Promise.all([
-            this.loadServices(),
-            this.loadCargoData(),
-            this.loadShoeCleaningData(),
-        ]);
+        this.applyBootstrap(await this.loadBootstrap());
 
         this.bindEvents();
         this.renderCalendar();
@@ -105,49 +101,49 @@ class Calculator {
 
     // ==================== API Calls ====================
 
-    async loadDiscounts() {
-        try {
-            const response = await fetch('/api/calendar-discounts/');
-            this.discounts = await response.json();
-        } catch (error) {
-            console.error('Error loading discounts:', error);
+    async loadBootstrap() {
+        // Страница калькулятора встраивает данные через json_script —
+        // тогда запросов при загрузке нет совсем
+        const inline = document.getElementById('calculator-bootstrap');
+        if (inline) {
+            try {
+                return JSON.parse(inline.textContent);
+            } catch (error) {
+                console.warn('Unable to parse inline bootstrap data:', error);
+            }
         }
-    }
 
-    async loadServices() {
         try {
-            const response = await fetch('/api/services/');
-            const data = await response.json();
-            this.extraServicesData = data.extra_services || [];
-            this.drycleaningServicesData = data.dry_cleaning_services || [];
-            this.renderExtraServices();
-            this.renderDrycleaningItems();
+            const response = await fetch('/api/calculator/bootstrap/');
+            if (response.ok) {
+                return await response.json();
+            }
         } catch (error) {
-            console.error('Error loading services:', error);
+            console.error('Error loading calculator data:', error);
         }
+        return {};
     }
 
-    async loadCargoData() {
-        try {
-            const response = await fetch('/api/cargo/');
-            const data = await response.json();
-            this.cargoTariffsData = data.tariffs || [];
-            this.cargoOptionsData = data.options || [];
-            this.renderCargoTariffs();
-            this.renderCargoOptions();
-        } catch (error) {
-            console.error('Error loading cargo data:', error);
-        }
-    }
+    applyBootstrap(data) {
+        this.discounts = data.calendar_discounts || {};
 
-    async loadShoeCleaningData() {
-        try {
-            const response = await fetch('/api/shoe-cleaning/');
-            const data = await response.json();
-            this.shoeCleaningData = data.services || [];
-            this.renderShoeCleaningItems();
-        } catch (error) {
-            console.error('Error loading shoe cleaning data:', error);
+        const services = data.services || {};
+        this.extraServicesData = services.extra_services || [];
+        this.drycleaningServicesData = services.dry_cleaning_services || [];
+        this.renderExtraServices();
+        this.renderDrycleaningItems();
+
+        const cargo = data.cargo || {};
+        this.cargoTariffsData = cargo.tariffs || [];
+        this.cargoOptionsData = cargo.options || [];
+        this.renderCargoTariffs();
+        this.renderCargoOptions();
+
+        this.shoeCleaningData = (data.shoe_cleaning || {}).services || [];
+        this.renderShoeCleaningItems();
+
+        if (data.price_curve) {
+            this.priceCurve = data.price_curve;
         }
     }
 
@@ -490,6 +486,44 @@ class Calculator {
 
     // ==================== Price Calculation ====================
 
+    /**
+     * Query params for /api/price/ (cleaning / drycleaning)
+     */
+    quoteParams() {
+        if (this.serviceType === 'cleaning') {
+            return new URLSearchParams({
+                level: this.level,
+                area: this.area,
+                rooms: 0,
+                bathrooms: 0,
+                extra_services: JSON.stringify(this.extraServices)
+            });
+        }
+        return new URLSearchParams({
+            level: 'basic',
+            area: 0,
+            rooms: 0,
+            bathrooms: 0,
+            dry_cleaning: JSON.stringify(this.drycleaningItems)
+        });
+    }
+
+    /**
+     * Signed quote for the order (cleaning / drycleaning only; cargo and
+     * shoe cleaning are priced locally)
+     */
+    async fetchQuoteToken() {
+        if (this.serviceType !== 'cleaning' && this.serviceType !== 'drycleaning') {
+            return null;
+        }
+        const params = this.quoteParams();
+        if (this.selectedDate) params.set('date', this.selectedDate);
+        const response = await fetch(`/api/price/?${params}`);
+        const data = await response.json();
+        if (data.error) throw new Error(data.error);
+        return data.quote_token;
+    }
+
     async calculatePrice() {
         const priceDisplay = document.getElementById('current-price');
         const oldPriceDisplay = document.getElementById('old-price');
@@ -524,36 +558,25 @@ class Calculator {
                     }
                 }
             } else {
-                // API calculation for cleaning / drycleaning
-                let params;
-                if (this.serviceType === 'cleaning') {
-                    params = new URLSearchParams({
-                        level: this.level,
-                        area: this.area,
-                        rooms: 0,
-                        bathrooms: 0,
-                        extra_services: JSON.stringify(this.extraServices)
-                    });
+                const local = this.computeLocalPrice();
+                if (local) {
+                    // Local calculation from the precomputed price curve
+                    finalPrice = local.price;
+                    apiOldPrice = local.oldPrice;
                 } else {
-                    params = new URLSearchParams({
-                        level: 'basic',
-                        area: 0,
-                        rooms: 0,
-                        bathrooms: 0,
-                        dry_cleaning: JSON.stringify(this.drycleaningItems)
-                    });
-                }
-
-                const response = await fetch(`/api/price/?${params}`);
-                const data = await response.json();
-
-                if (data.error) {
-                    priceDisplay.textContent = '—';
-                    console.error('Price calculation error:', data.error);
-                    return;
+                    // API calculation for cleaning / drycleaning
+                    const params = this.quoteParams();
+                    const response = await fetch(`/api/price/?${params}`);
+                    const data = await response.json();
+
+                    if (data.error) {
+                        priceDisplay.textContent = '—';
+                        console.error('Price calculation error:', data.error);
+                        return;
+                    }
+                    finalPrice = parseFloat(data.price);
+                    if (data.old_price) apiOldPrice = parseFloat(data.old_price);
                 }
-                finalPrice = parseFloat(data.price);
-                if (data.old_price) apiOldPrice = parseFloat(data.old_price);
             }
 
             let originalPrice = finalPrice;
@@ -595,6 +618,70 @@ class Calculator {
         }
     }
 
+    /**
+     * Same formula as /api/price/, evaluated on the curve from /api/price/curve/.
+     * Returns null when the curve can't price this input so the API is used instead.
+     */
+    computeLocalPrice() {
+        const curve = this.priceCurve;
+        if (!curve) return null;
+
+        const isCleaning = this.serviceType === 'cleaning';
+        const level = isCleaning ? this.level : 'basic';
+        const area = isCleaning ? (parseFloat(this.area) || 0) : 0;
+        const extras = isCleaning ? (this.extraServices || []) : [];
+        const dryItems = isCleaning ? {} : (this.drycleaningItems || {});
+
+        if (area < 0 || area > curve.max_area) return null;
+
+        // Cleaning by area and level
+        let cleaning = 0;
+        let cleaningOld = null;
+        if (area > 0) {
+            const levelCurve = curve.levels[level];
+            if (!levelCurve) return null;
+
+            const areaInt = Math.floor(area);
+            const step = levelCurve.step;
+            if (areaInt <= step.area_from) {
+                const tier = levelCurve.tiers.find(t => areaInt <= t.area_to);
+                if (!tier) return null;
+                cleaning = parseFloat(tier.price);
+                cleaningOld = tier.old_price ? parseFloat(tier.old_price) : null;
+            } else {
+                if (step.price === null) return null;
+                const steps = Math.ceil((areaInt - step.area_from) / step.size);
+                cleaning = parseFloat(step.base_price) + steps * parseFloat(step.price);
+            }
+        }
+
+        // Extra services
+        let extra = 0;
+        for (const id of new Set(extras.map(String))) {
+            const service = curve.extra_services[id];
+            if (!service) continue;
+            if (service.price_type === 'fixed') {
+                extra += parseFloat(service.price);
+            } else if (service.price_type === 'per_m2' && area > 0) {
+                extra += parseFloat(service.price) * area;
+            }
+        }
+
+        // Dry cleaning: price × quantity (pieces or m²)
+        let dry = 0;
+        for (const [id, qty] of Object.entries(dryItems)) {
+            const item = curve.dry_cleaning_services[String(id)];
+            if (!item) continue;
+            dry += parseFloat(item.price) * (parseFloat(qty) || 0);
+        }
+
+        const round2 = (value) => Math.round(value * 100) / 100;
+        return {
+            price: round2(cleaning + extra + dry),
+            oldPrice: cleaningOld !== null ? round2(cleaningOld + extra + dry) : null,
+        };
+    }
+
     // ==================== Order ====================
 
     buildOrderSummary() {
@@ -797,6 +884,8 @@ class Calculator {
 
         // Try to save order to backend (и далее в Google Sheets)
         try {
+            // Подписанная котировка: сервер принимает сумму без пересчёта
+            const quoteToken = await this.fetchQuoteToken();
             const orderData = {
                 name: nameInput.value,
                 phone: formattedPhone,
@@ -812,7 +901,8 @@ class Calculator {
                 comment: commentInput.value || null,
                 service_type: this.serviceType,
                 extra_services: this.extraServices,
-                dry_cleaning_items: this.drycleaningItems
+                dry_cleaning_items: this.drycleaningItems,
+                quote_token: quoteToken
             };
 
             const response = await fetch('/api/orders/', {
@@ -987,6 +1077,11 @@ class Calculator {
 
     debounceCalculate() {
         clearTimeout(this.calculateTimeout);
+        // With the price curve loaded there is no network call, so price instantly
+        if (this.computeLocalPrice()) {
+            this.calculatePrice();
+            return;
+        }
         this.calculateTimeout = setTimeout(() => this.calculatePrice(), 300);
     }
 }
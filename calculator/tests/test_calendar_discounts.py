@@ -0,0 +1,79 @@
+"""
+Тесты скидок календаря: максимум по дате в БД, окна и помесячный кэш
+"""
+import datetime
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from calculator.discounts import MAX_WINDOW_DAYS, get_calendar_discounts
+from calculator.models import DateDiscount
+
+
+class CalendarDiscountsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse("calculator:calendar_discounts_api")
+        self.today = timezone.now().date()
+        start = datetime.date(2026, 1, 1)
+        # Год скидок: на каждую дату две записи, учитывается максимальная
+        DateDiscount.objects.bulk_create([
+            DateDiscount(date=start + datetime.timedelta(days=i), discount_percent=percent)
+            for i in range(365)
+            for percent in (5, 10 + i % 3)
+        ])
+        DateDiscount.objects.create(date=datetime.date(2026, 2, 14), discount_percent=50, is_active=False)
+
+    def test_max_per_date(self):
+        data = self.client.get(self.url, {"month": "2026-02"}).json()
+        self.assertEqual(len(data), 28)
+        self.assertEqual(data["2026-02-01"], 10 + 31 % 3)
+        # Неактивная скидка не учитывается
+        self.assertEqual(data["2026-02-14"], 10 + 44 % 3)
+
+    def test_from_to_window(self):
+        data = self.client.get(self.url, {"from": "2026-03-30", "to": "2026-04-02"}).json()
+        self.assertEqual(sorted(data), ["2026-03-30", "2026-03-31", "2026-04-01", "2026-04-02"])
+
+    def test_default_window_from_today(self):
+        data = self.client.get(self.url).json()
+        self.assertTrue(all(self.today.isoformat() <= day for day in data))
+
+    def test_one_query_then_cache(self):
+        params = {"from": "2026-01-01", "to": "2026-12-31"}
+        with self.assertNumQueries(1):
+            data = self.client.get(self.url, params).json()
+        self.assertEqual(len(data), 365)
+        with self.assertNumQueries(0):
+            self.client.get(self.url, params)
+        # Месяцы внутри уже закэшированного окна тоже без запросов
+        with self.assertNumQueries(0):
+            self.client.get(self.url, {"month": "2026-06"})
+
+    def test_invalidated_on_change(self):
+        day = datetime.date(2026, 5, 5)
+        self.assertEqual(get_calendar_discounts(day, day)["2026-05-05"], 10 + 124 % 3)
+        DateDiscount.objects.create(date=day, discount_percent=70)
+        self.assertEqual(get_calendar_discounts(day, day)["2026-05-05"], 70)
+
+        # Перенос скидки на другую дату сбрасывает оба месяца
+        discount = DateDiscount.objects.get(date=day, discount_percent=70)
+        discount.date = datetime.date(2026, 7, 7)
+        discount.save()
+        result = get_calendar_discounts(day, datetime.date(2026, 7, 7))
+        self.assertEqual(result["2026-05-05"], 10 + 124 % 3)
+        self.assertEqual(result["2026-07-07"], 70)
+
+    def test_invalid_windows(self):
+        too_long = (datetime.date(2026, 1, 1) + datetime.timedelta(days=MAX_WINDOW_DAYS + 1)).isoformat()
+        for params in (
+            {"month": "2026-13"},
+            {"from": "yesterday"},
+            {"from": "2026-03-01", "to": "2026-02-01"},
+            {"from": "2026-01-01", "to": too_long},
+        ):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 400, params)
@@ -0,0 +1,318 @@
+"""
+Тесты ETag/304 на read-API каталога
+"""
+from decimal import Decimal
+
+from django.core.cache import cache, caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from calculator.models import (
+    Advantage, CompanyInfo, ExtraService, GalleryItem, Order, PricingSettings, Review,
+    invalidate_singleton,
+)
+from calculator.benchmarks.server import run_server_benchmark
+from calculator.pagination import MAX_PAGE_SIZE
+from calculator.catalog import get_catalog
+from calculator.services import CATALOG_VERSION_CACHE_KEY, forget_catalog_version, get_catalog_version
+
+CATALOG_API_NAMES = (
+    "services_api",
+    "cargo_api",
+    "shoe_cleaning_api",
+    "reviews_api",
+    "advantages_api",
+    "gallery_api",
+    "company_info_api",
+    "cleaning_services_api",
+)
+
+
+class CatalogETagTests(TestCase):
+    """Тесты условных запросов к API каталога"""
+
+    def setUp(self):
+        Review.objects.create(name="Anna", text="Super", rating=5)
+        ExtraService.objects.create(name="Окна", price=Decimal("300"), price_type="fixed")
+        CompanyInfo.objects.filter(pk=1).update(phone="+420111222333")
+
+    def test_not_modified_without_queries(self):
+        for name in CATALOG_API_NAMES:
+            url = reverse(f"calculator:{name}")
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, name)
+            etag = response["ETag"]
+            self.assertFalse(etag.startswith("W/"), name)
+
+            with self.assertNumQueries(0):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304, name)
+
+    def test_admin_change_changes_etag(self):
+        url = reverse("calculator:reviews_api")
+        etag = self.client.get(url)["ETag"]
+
+        Advantage.objects.create(title="Fast", description="1 hour")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_etag_depends_on_language(self):
+        url = reverse("calculator:services_api")
+        etag_ru = self.client.get(url, HTTP_ACCEPT_LANGUAGE="ru")["ETag"]
+        etag_en = self.client.get(url, HTTP_ACCEPT_LANGUAGE="en")["ETag"]
+        self.assertNotEqual(etag_ru, etag_en)
+
+    def test_orders_do_not_bump_version(self):
+        version = get_catalog_version()
+        Order.objects.create(name="Test", phone="+420123456789", total_price=Decimal("100"))
+        self.assertEqual(get_catalog_version(), version)
+
+
+class CalculatorBootstrapTests(TestCase):
+    """Тесты стартовых данных калькулятора"""
+
+    def setUp(self):
+        ExtraService.objects.create(name="Окна", price=Decimal("300"), price_type="fixed")
+
+    def test_bootstrap_payload(self):
+        response = self.client.get(reverse("calculator:calculator_bootstrap_api"))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(
+            sorted(data),
+            ["calendar_discounts", "cargo", "price_curve", "services", "shoe_cleaning"],
+        )
+        self.assertEqual(data["services"]["extra_services"][0]["name"], "Окна")
+
+    def test_cached_until_catalog_changes(self):
+        url = reverse("calculator:calculator_bootstrap_api")
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+        ExtraService.objects.create(name="Духовка", price=Decimal("400"), price_type="fixed")
+        data = self.client.get(url).json()
+        self.assertEqual(len(data["services"]["extra_services"]), 2)
+
+    @override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+    def test_calculator_page_embeds_bootstrap(self):
+        response = self.client.get(reverse("calculator:calculator"))
+        self.assertContains(response, 'id="calculator-bootstrap"')
+
+
+class LocalizedCatalogTests(TestCase):
+    """Тесты каталога по языкам"""
+
+    def setUp(self):
+        cache.clear()
+        self.windows = ExtraService.objects.create(
+            name_ru="Окна", name_en="Windows", name_cs="Okna",
+            price=Decimal("300"), price_type="fixed",
+        )
+        Advantage.objects.create(title_ru="Быстро", title_en="Fast", description="1 h")
+
+    def test_sections_per_language(self):
+        for language, name in (("ru", "Окна"), ("en", "Windows"), ("cs", "Okna")):
+            self.assertEqual(get_catalog(language)["extra_services"][0]["name"], name)
+
+    def test_only_changed_model_is_rebuilt(self):
+        get_catalog("en")
+        self.windows.price = Decimal("350")
+        self.windows.save()
+        # Один запрос — только раздел доп. услуг, остальные из кэша
+        with self.assertNumQueries(1):
+            catalog = get_catalog("en")
+        self.assertEqual(catalog["extra_services"][0]["price"], Decimal("350"))
+
+    def test_api_reads_from_catalog(self):
+        url = reverse("calculator:advantages_api")
+        self.client.get(url, HTTP_ACCEPT_LANGUAGE="en")
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_ACCEPT_LANGUAGE="en")
+        self.assertEqual(response.json()[0]["title"], "Fast")
+
+
+@override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+class PageFragmentCacheTests(TestCase):
+    """Тесты кэша фрагментов страниц"""
+
+    PAGE_NAMES = ("home", "about", "calculator")
+
+    def setUp(self):
+        cache.clear()
+        Review.objects.create(name="Anna", text="Super", rating=5)
+        Advantage.objects.create(title_ru="Быстро", title_en="Fast", description="1 h")
+        CompanyInfo.objects.filter(pk=1).update(phone="+420111222333", email="a@b.cz", address="Praha")
+        invalidate_singleton(CompanyInfo)
+
+    def test_warm_pages_without_queries(self):
+        for name in self.PAGE_NAMES:
+            url = reverse(f"calculator:{name}")
+            self.client.get(url)
+            with self.assertNumQueries(0):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, name)
+            self.assertContains(response, "+420111222333")
+
+    def test_fragments_follow_model_changes(self):
+        url = reverse("calculator:home")
+        self.assertContains(self.client.get(url), "Super")
+
+        Review.objects.create(name="Petr", text="Perfektní", rating=5)
+        info = CompanyInfo.objects.get(pk=1)
+        info.phone = "+420999888777"
+        info.save()
+
+        response = self.client.get(url)
+        self.assertContains(response, "Perfektní")
+        self.assertContains(response, "+420999888777")
+        self.assertNotContains(response, "+420111222333")
+
+    def test_company_change_from_other_process(self):
+        """Сохранение в другом воркере: здесь нет сигнала, меняется только общая версия"""
+        page_url = reverse("calculator:home")
+        api_url = reverse("calculator:company_info_api")
+        self.assertContains(self.client.get(page_url), "+420111222333")
+        self.assertEqual(self.client.get(api_url).json()["phone"], "+420111222333")
+
+        CompanyInfo.objects.filter(pk=1).update(phone="+420999888777")
+        caches["state"].incr(CATALOG_VERSION_CACHE_KEY)
+        # Прошло CATALOG_VERSION_TTL
+        forget_catalog_version()
+
+        response = self.client.get(page_url)
+        self.assertContains(response, "+420999888777")
+        self.assertNotContains(response, "+420111222333")
+        self.assertEqual(self.client.get(api_url).json()["phone"], "+420999888777")
+
+    def test_fragments_per_language(self):
+        url = reverse("calculator:home")
+        self.assertContains(self.client.get(url, HTTP_ACCEPT_LANGUAGE="ru"), "Быстро")
+        self.assertContains(self.client.get(url, HTTP_ACCEPT_LANGUAGE="en"), "Fast")
+
+
+class SingletonTests(TestCase):
+    """Тесты кэша singleton-записей"""
+
+    def setUp(self):
+        invalidate_singleton(CompanyInfo)
+        invalidate_singleton(PricingSettings)
+
+    def test_rows_created_by_migration(self):
+        self.assertTrue(CompanyInfo.objects.filter(pk=1).exists())
+        self.assertTrue(PricingSettings.objects.filter(pk=1).exists())
+
+    def test_read_once_per_process(self):
+        CompanyInfo.get_info()
+        PricingSettings.get_settings()
+        with self.assertNumQueries(0):
+            CompanyInfo.get_info()
+            PricingSettings.get_settings()
+
+    def test_refreshed_after_save(self):
+        self.assertEqual(PricingSettings.get_settings().price_per_room, Decimal("0"))
+        settings = PricingSettings.objects.get(pk=1)
+        settings.price_per_room = Decimal("250")
+        settings.save()
+        self.assertEqual(PricingSettings.get_settings().price_per_room, Decimal("250"))
+
+    def test_missing_row_is_not_created(self):
+        CompanyInfo.objects.all().delete()
+        info = CompanyInfo.get_info()
+        self.assertIsNone(info.updated_at)
+        self.assertFalse(CompanyInfo.objects.exists())
+
+
+class ListPaginationTests(TestCase):
+    """Тесты keyset-пагинации отзывов и галереи"""
+
+    def setUp(self):
+        for i in range(7):
+            Review.objects.create(name=f"Client {i}", text="Ok", rating=5)
+        for i in range(5):
+            GalleryItem.objects.create(
+                before_image=f"https://example.com/{i}-before.jpg",
+                after_image=f"https://example.com/{i}-after.jpg",
+                sort_order=i % 2,
+            )
+
+    def collect(self, name, limit):
+        url = reverse(f"calculator:{name}")
+        ids, cursor, pages = [], None, 0
+        while True:
+            params = {"limit": limit}
+            if cursor:
+                params["cursor"] = cursor
+            data = self.client.get(url, params).json()
+            self.assertLessEqual(len(data["results"]), limit)
+            ids.extend(item["id"] for item in data["results"])
+            pages += 1
+            cursor = data["next_cursor"]
+            if cursor is None:
+                return ids, pages
+
+    def test_pages_follow_full_list(self):
+        for name in ("reviews_api", "gallery_api"):
+            full = self.client.get(reverse(f"calculator:{name}"), {"all": "1"}).json()
+            ids, pages = self.collect(name, limit=2)
+            self.assertEqual(ids, [item["id"] for item in full], name)
+            self.assertEqual(pages, (len(full) + 1) // 2, name)
+
+    def test_page_shape(self):
+        data = self.client.get(reverse("calculator:reviews_api"), {"limit": 3}).json()
+        self.assertEqual(sorted(data), ["next_cursor", "results"])
+        self.assertEqual(
+            sorted(data["results"][0]),
+            ["date", "id", "name", "photo_url", "rating", "text"],
+        )
+
+    def test_page_size_capped(self):
+        for i in range(MAX_PAGE_SIZE):
+            Review.objects.create(name="Bulk", text="Ok", rating=4)
+        data = self.client.get(reverse("calculator:reviews_api"), {"limit": 1000}).json()
+        self.assertEqual(len(data["results"]), MAX_PAGE_SIZE)
+        self.assertIsNotNone(data["next_cursor"])
+
+    def test_new_rows_do_not_shift_pages(self):
+        url = reverse("calculator:reviews_api")
+        first = self.client.get(url, {"limit": 3}).json()
+        Review.objects.create(name="Newest", text="Ok", rating=5)
+        second = self.client.get(url, {"limit": 3, "cursor": first["next_cursor"]}).json()
+        first_ids = {item["id"] for item in first["results"]}
+        self.assertFalse(first_ids & {item["id"] for item in second["results"]})
+        self.assertNotIn("Newest", [item["name"] for item in second["results"]])
+
+    def test_invalid_params(self):
+        url = reverse("calculator:gallery_api")
+        for params in ({"cursor": "not-a-cursor"}, {"cursor": "WyJ4IiwieSIsInoiXQ"}, {"limit": "abc"}, {"limit": "0"}):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+class AsyncCatalogTests(TestCase):
+    """Async-представления каталога под ASGI"""
+
+    def setUp(self):
+        cache.clear()
+        Review.objects.create(name="Anna", text="Super", rating=5)
+
+    async def test_async_client(self):
+        url = reverse("calculator:reviews_api")
+        response = await self.async_client.get(
+            url, {"all": "1"}, headers={"Origin": "http://localhost:3000"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([review["name"] for review in response.json()], ["Anna"])
+        self.assertEqual(response["Access-Control-Allow-Origin"], "http://localhost:3000")
+
+        response = await self.async_client.get(
+            url, {"all": "1"}, headers={"If-None-Match": response["ETag"]}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_asgi_serves_slow_clients_concurrently(self):
+        wsgi, asgi = run_server_benchmark(clients=20, requests_per_client=2, workers=2, client_delay=0.02)
+        self.assertEqual((wsgi.errors, asgi.errors), (0, 0))
+        self.assertEqual((wsgi.requests, asgi.requests), (40, 40))
+        self.assertGreater(asgi.requests_per_second, wsgi.requests_per_second)
@@ -0,0 +1,139 @@
+"""
+Тесты circuit breaker: closed → open → half-open, общее состояние в кэше
+"""
+import io
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from calculator.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen
+from calculator.google_sheets import BREAKER_NAME, BREAKER_OPTIONS
+from calculator.models import SharedCounter
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def fail():
+    raise RuntimeError("quota")
+
+
+class CircuitBreakerTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.clock = FakeClock()
+        self.breaker = self.make_breaker()
+
+    def make_breaker(self):
+        return CircuitBreaker(
+            "test", failure_rate=0.5, min_calls=4, window=60, reset_timeout=30, clock=self.clock
+        )
+
+    def trip(self):
+        for _ in range(4):
+            with self.assertRaises(RuntimeError):
+                self.breaker.call(fail)
+
+    def test_opens_on_failure_rate(self):
+        self.breaker.call(lambda: None)
+        self.breaker.call(lambda: None)
+        with self.assertRaises(RuntimeError):
+            self.breaker.call(fail)
+        self.assertEqual(self.breaker.state(), CLOSED)
+        with self.assertRaises(RuntimeError):
+            self.breaker.call(fail)
+        # 2 ошибки из 4 вызовов
+        self.assertEqual(self.breaker.state(), OPEN)
+
+    def test_low_failure_rate_stays_closed(self):
+        for _ in range(9):
+            self.breaker.call(lambda: None)
+        with self.assertRaises(RuntimeError):
+            self.breaker.call(fail)
+        self.assertEqual(self.breaker.state(), CLOSED)
+
+    def test_open_short_circuits(self):
+        self.trip()
+        self.clock.now += 10
+        called = []
+        with self.assertRaises(CircuitOpen) as raised:
+            self.breaker.call(called.append, 1)
+        self.assertEqual(called, [])
+        self.assertEqual(raised.exception.retry_after, 20)
+
+    def test_state_is_shared_between_workers(self):
+        self.trip()
+        with self.assertRaises(CircuitOpen):
+            self.make_breaker().call(lambda: None)
+
+    @override_settings(CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "shared": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "test_breaker_cache"},
+    })
+    def test_stats_command_reads_shared_state(self):
+        """process_outbox --stats видит цепь, разомкнутую веб-воркером, через общий кэш"""
+        call_command("createcachetable", verbosity=0)
+        with mock.patch.dict(BREAKER_OPTIONS, min_calls=1, cache_alias="shared"):
+            CircuitBreaker(BREAKER_NAME, **BREAKER_OPTIONS).record_failure()
+            out = io.StringIO()
+            call_command("process_outbox", stats=True, stdout=out)
+        stats = json.loads(out.getvalue())["sheets_breaker"]
+        self.assertEqual(stats["state"], OPEN)
+        self.assertTrue(stats["shared"])
+
+    @override_settings(CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "shared": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "test_breaker_cache"},
+    })
+    def test_counters_atomic_with_database_cache(self):
+        """С кэшем в базе счётчики окна — строки SharedCounter (incr у DatabaseCache не атомарен)"""
+        call_command("createcachetable", verbosity=0)
+        breaker = CircuitBreaker("test", min_calls=4, cache_alias="shared", clock=self.clock)
+        breaker.record_success()
+        breaker.record_failure()
+        self.assertEqual(sorted(SharedCounter.objects.values_list("value", flat=True)), [1, 2])
+        self.assertEqual((breaker.stats()["calls"], breaker.stats()["failures"]), (2, 1))
+        breaker.record_failure()
+        breaker.record_failure()
+        self.assertEqual(breaker.state(), OPEN)
+        self.assertFalse(SharedCounter.objects.exists())
+        breaker.reset()
+        self.assertEqual(breaker.state(), CLOSED)
+
+    def test_half_open_allows_single_trial(self):
+        self.trip()
+        self.clock.now += 30
+        self.assertEqual(self.breaker.state(), HALF_OPEN)
+        other = self.make_breaker()
+        results = []
+
+        def trial():
+            # Пока идёт пробный вызов, остальные отклоняются
+            with self.assertRaises(CircuitOpen):
+                other.call(lambda: None)
+            results.append("trial")
+
+        self.breaker.call(trial)
+        self.assertEqual(results, ["trial"])
+        self.assertEqual(self.breaker.state(), CLOSED)
+        self.assertEqual(self.breaker.stats()["calls"], 0)
+
+    def test_failed_trial_reopens(self):
+        self.trip()
+        self.clock.now += 30
+        with self.assertRaises(RuntimeError):
+            self.breaker.call(fail)
+        self.assertEqual(self.breaker.state(), OPEN)
+        with self.assertRaises(CircuitOpen) as raised:
+            self.breaker.call(lambda: None)
+        self.assertEqual(raised.exception.retry_after, 30)
@@ -0,0 +1,87 @@
+"""
+Тесты сжатия динамических ответов (yourclean.middleware.CompressionMiddleware)
+"""
+import gzip
+from unittest import mock
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from calculator.models import Advantage
+from yourclean.middleware import CompressionMiddleware, parse_accept_encoding
+
+
+@override_settings(COMPRESSION_BROTLI=False, COMPRESSION_MIN_SIZE=200)
+class CompressionMiddlewareTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        for index in range(20):
+            Advantage.objects.create(title=f"Преимущество {index}", description="Быстро и чисто " * 5)
+        self.url = reverse("calculator:advantages_api")
+
+    def test_gzip_json(self):
+        plain = self.client.get(self.url)
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertIn("Accept-Encoding", plain["Vary"])
+
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(int(response["Content-Length"]), len(response.content))
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(response["ETag"], "W/" + plain["ETag"])
+
+        response = self.client.get(
+            self.url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_cached_compressed_body(self):
+        self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+        with mock.patch("yourclean.middleware.gzip.compress") as compress:
+            response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+        compress.assert_not_called()
+        self.assertEqual(response["Content-Encoding"], "gzip")
+
+    @override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+    def test_html_page(self):
+        response = self.client.get(reverse("calculator:home"), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn(b"<html", gzip.decompress(response.content).lower())
+
+    @override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+    def test_html_with_csrf_token_is_padded(self):
+        # Страница с {% csrf_token %}: gzip со случайным FNAME (BREACH), без brotli
+        response = self.client.get(reverse("calculator:home"), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertTrue(response.content[3] & gzip.FNAME)
+        with override_settings(COMPRESSION_BROTLI=True):
+            response = self.client.get(reverse("calculator:home"), HTTP_ACCEPT_ENCODING="br")
+        self.assertNotIn("Content-Encoding", response)
+
+    def test_response_with_cookies_not_cached(self):
+        middleware = CompressionMiddleware(lambda request: None)
+        request = RequestFactory().get(self.url)
+        response = HttpResponse(b"x" * 1000, content_type="application/json", headers={"ETag": '"v1"'})
+        self.assertIsNotNone(middleware.cache_key(request, response, "gzip"))
+        response.set_cookie("sessionid", "secret")
+        self.assertIsNone(middleware.cache_key(request, response, "gzip"))
+
+    def test_refused_encoding(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip;q=0, identity")
+        self.assertNotIn("Content-Encoding", response)
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    @override_settings(COMPRESSION_MIN_SIZE=1_000_000)
+    def test_small_response_untouched(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertNotIn("Content-Encoding", response)
+        self.assertNotIn("Accept-Encoding", response.get("Vary", ""))
+
+    def test_parse_accept_encoding(self):
+        self.assertEqual(
+            parse_accept_encoding("br;q=0.5, GZIP; q=0.8, *;q=0"),
+            {"br": 0.5, "gzip": 0.8, "*": 0.0},
+        )
@@ -0,0 +1,91 @@
+"""
+Тесты общих атомарных счётчиков (calculator.counters)
+"""
+import threading
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from calculator import counters
+from calculator.counters import incr_counter
+from calculator.models import SharedCounter
+
+DATABASE_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "shared": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "test_counters_cache"},
+}
+
+
+@override_settings(CACHES=DATABASE_CACHES)
+class SharedCounterTests(TestCase):
+
+    def test_database_cache_uses_table(self):
+        self.assertEqual(incr_counter("shared", "a", 3), 3)
+        self.assertEqual(incr_counter("shared", "a", 2), 5)
+        self.assertEqual(SharedCounter.objects.get(key="a").value, 5)
+
+    def test_one_query_per_increment(self):
+        incr_counter("shared", "a")
+        with self.assertNumQueries(1):
+            incr_counter("shared", "a")
+
+    def test_expired_counter_restarts(self):
+        incr_counter("shared", "a", 5)
+        SharedCounter.objects.filter(key="a").update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(incr_counter("shared", "a", 2), 2)
+
+    def test_expired_rows_purged(self):
+        SharedCounter.objects.create(key="old", value=1, expires_at=timezone.now() - timedelta(seconds=1))
+        counters._last_purge = 0.0
+        incr_counter("shared", "new")
+        self.assertEqual(list(SharedCounter.objects.values_list("key", flat=True)), ["new"])
+
+    def test_other_caches_use_incr(self):
+        self.assertEqual(incr_counter("default", "a", 3), 3)
+        self.assertEqual(incr_counter("default", "a", 2), 5)
+        self.assertFalse(SharedCounter.objects.exists())
+
+
+@override_settings(CACHES=DATABASE_CACHES)
+class SharedCounterConcurrencyTests(TransactionTestCase):
+    """Параллельные приращения из разных потоков (и соединений с базой) не теряются"""
+
+    THREADS = 8
+    INCREMENTS = 50
+
+    def test_no_lost_updates(self):
+        call_command("createcachetable", verbosity=0)
+        barrier = threading.Barrier(self.THREADS)
+        errors = []
+
+        def increment():
+            while True:
+                try:
+                    return incr_counter("shared", "hits", 2)
+                except OperationalError as error:
+                    # Тестовая SQLite в памяти не ждёт блокировку, а сразу
+                    # отклоняет запрос; отклонённый запрос ничего не изменил
+                    if "locked" not in str(error):
+                        raise
+
+        def worker():
+            try:
+                barrier.wait()
+                for _ in range(self.INCREMENTS):
+                    increment()
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(incr_counter("shared", "hits", 0), self.THREADS * self.INCREMENTS * 2)
@@ -0,0 +1,124 @@
+"""
+Тесты клиента Google Sheets на локальной замене gspread: переиспользование
+подключения, пачки append_rows и квота запросов
+"""
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import TestCase
+
+from calculator.benchmarks.sheets import run_order_isolation_benchmark, run_sheets_benchmark, sample_orders
+from calculator.circuit_breaker import CircuitOpen
+from calculator.fake_gspread import FakeCredentials, FakeGspread
+from calculator.google_sheets import (
+    BREAKER_OPTIONS,
+    DEFAULT_HEADER,
+    SHEET_NAME,
+    SheetsClient,
+    TokenBucket,
+    send_order_to_sheet,
+    send_orders_to_sheet,
+)
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class SheetsClientTests(TestCase):
+
+    def setUp(self):
+        caches[BREAKER_OPTIONS["cache_alias"]].clear()
+        self.fake = FakeGspread()
+        self.client = SheetsClient(
+            gspread_module=self.fake, credentials=FakeCredentials(), bucket=TokenBucket(1e9, 1e9)
+        )
+        self.orders = sample_orders(5)
+
+    def rows(self):
+        return self.fake.worksheet(SHEET_NAME).rows
+
+    def test_creates_spreadsheet_with_header(self):
+        send_order_to_sheet(self.orders[0], client=self.client)
+        self.assertEqual(self.rows()[0], DEFAULT_HEADER)
+        self.assertEqual(self.rows()[1][0], self.orders[0].id)
+        self.assertEqual(self.fake.calls["create"], 1)
+
+    def test_connection_and_header_check_are_reused(self):
+        self.client.worksheet()
+        self.fake.calls.clear()
+        for order in self.orders:
+            send_order_to_sheet(order, client=self.client)
+        self.assertEqual(self.fake.calls, {"append_rows": 5})
+
+    def test_existing_sheet_header_checked_once(self):
+        SheetsClient(gspread_module=self.fake, credentials=FakeCredentials()).worksheet()
+        self.fake.calls.clear()
+        send_orders_to_sheet(self.orders[:2], client=self.client)
+        send_orders_to_sheet(self.orders[2:], client=self.client)
+        self.assertEqual(
+            self.fake.calls, {"authorize": 1, "open": 1, "row_values": 1, "append_rows": 2}
+        )
+        self.assertEqual([row[0] for row in self.rows()[1:]], [order.id for order in self.orders])
+
+    def test_reconnects_after_failure(self):
+        send_order_to_sheet(self.orders[0], client=self.client)
+        sheet = self.fake.worksheet(SHEET_NAME)
+        with mock.patch.object(sheet, "append_rows", side_effect=RuntimeError("quota")):
+            with self.assertRaises(RuntimeError):
+                send_order_to_sheet(self.orders[1], client=self.client)
+        self.fake.calls.clear()
+        send_order_to_sheet(self.orders[1], client=self.client)
+        self.assertEqual(self.fake.calls["open"], 1)
+        self.assertEqual(len(self.rows()), 3)
+
+
+    def test_open_circuit_skips_api(self):
+        self.fake.error_rate = 1.0
+        for _ in range(5):
+            with self.assertRaises(Exception):
+                send_order_to_sheet(self.orders[0], client=self.client)
+        self.fake.calls.clear()
+        with self.assertRaises(CircuitOpen):
+            send_order_to_sheet(self.orders[0], client=self.client)
+        self.assertEqual(self.fake.total_calls, 0)
+
+
+class TokenBucketTests(TestCase):
+
+    def test_waits_for_refill_after_burst(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1, capacity=2, clock=clock, sleep=clock.sleep)
+        self.assertEqual([bucket.acquire() for _ in range(4)], [0.0, 0.0, 1.0, 1.0])
+        self.assertEqual(clock.now, 2.0)
+
+    def test_refill_is_capped(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1, capacity=2, clock=clock, sleep=clock.sleep)
+        clock.now = 100
+        self.assertEqual([bucket.acquire() for _ in range(3)], [0.0, 0.0, 1.0])
+
+
+class SheetsBenchmarkTests(TestCase):
+
+    def test_calls_per_order(self):
+        results = {result.name: result for result in run_sheets_benchmark(orders=100, batch_size=20)}
+        # authorize, open, row_values и append_rows на каждую заявку
+        self.assertEqual(results["per_order_connection"].api_calls, 400)
+        self.assertEqual(results["shared_client"].api_calls, 103)
+        self.assertEqual(results["batched"].api_calls, 3 + 5)
+        self.assertLess(results["batched"].quota_seconds, results["shared_client"].quota_seconds)
+
+    def test_order_latency_isolated_from_sheets(self):
+        healthy, degraded = run_order_isolation_benchmark(orders=40, latency=0.1, error_rate=0.5)
+        self.assertGreater(degraded.sheets_errors, 0)
+        # Заявка не ждёт Sheets: один запрос к нему уже дал бы +100 мс
+        self.assertLess(degraded.p99_ms - healthy.p99_ms, 50)
@@ -0,0 +1,72 @@
+"""
+Тесты кодирования ответов API (FastJsonResponse) и кэша закодированных тел
+"""
+import datetime
+import json
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from calculator.benchmarks.encoding import run_encoding_benchmark
+from calculator.json_encoding import FastJsonResponse, dumps, json_dumps
+from calculator.models import Advantage
+
+
+def upper_dumps(data):
+    return json_dumps(data).upper()
+
+
+@override_settings(CALCULATOR_JSON_BACKEND="json")
+class FastJsonResponseTests(SimpleTestCase):
+
+    def test_native_types(self):
+        response = FastJsonResponse({
+            "price": Decimal("1890.50"), "day": datetime.date(2026, 1, 10), 3: "Окна",
+        })
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(json.loads(response.content), {"price": "1890.50", "day": "2026-01-10", "3": "Окна"})
+        # Кириллица без \u-экранирования
+        self.assertIn("Окна".encode(), response.content)
+
+    def test_safe(self):
+        with self.assertRaises(TypeError):
+            FastJsonResponse([1, 2])
+        self.assertEqual(FastJsonResponse([1, 2], safe=False).content, b"[1,2]")
+
+    def test_pre_encoded_bytes(self):
+        body = b'{"cached":true}'
+        self.assertEqual(FastJsonResponse(body).content, body)
+
+    @override_settings(CALCULATOR_JSON_BACKEND="calculator.tests.test_json_encoding.upper_dumps")
+    def test_custom_backend(self):
+        self.assertEqual(dumps({"a": "b"}), b'{"A":"B"}')
+
+
+class CatalogBodyCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        Advantage.objects.create(title="Fast", description="1 hour")
+
+    def test_cache_hit_skips_view(self):
+        url = reverse("calculator:advantages_api")
+        body = self.client.get(url).content
+
+        with mock.patch("calculator.views.aget_catalog_section") as section:
+            response = self.client.get(url)
+        section.assert_not_called()
+        self.assertEqual(response.content, body)
+
+        Advantage.objects.create(title="Clean", description="Always")
+        titles = [item["title"] for item in self.client.get(url).json()]
+        self.assertIn("Clean", titles)
+
+    def test_benchmark_reports_largest_payloads(self):
+        results = run_encoding_benchmark(iterations=5, top=2)
+        payloads = list(dict.fromkeys(result.payload for result in results))
+        self.assertEqual(len(payloads), 2)
+        encoders = {result.encoder for result in results}
+        self.assertTrue({"django_json_response", "fast_json", "pre_encoded"} <= encoders)
@@ -0,0 +1,137 @@
+"""
+Тесты outbox заявок: постановка в одной транзакции с заявкой, повторы
+с задержкой, зависшие задачи
+"""
+import datetime
+import json
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from calculator import outbox
+from calculator.circuit_breaker import CircuitOpen
+from calculator.models import Order, OrderOutbox
+
+
+@override_settings(
+    OUTBOX_MAX_ATTEMPTS=3, OUTBOX_RETRY_BASE=30, OUTBOX_RETRY_MAX=3600, OUTBOX_STUCK_AFTER=600,
+    RATE_LIMIT_ENABLED=False,
+)
+class OrderOutboxTests(TestCase):
+
+    def setUp(self):
+        self.sent = []
+        self.handler = mock.Mock(side_effect=self.sent.extend)
+        patcher = mock.patch.dict(outbox.OUTBOX_HANDLERS, {OrderOutbox.KIND_SHEETS_APPEND: self.handler})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_order(self):
+        order = Order.objects.create(
+            name="Anna", phone="+420123456789", cleaning_level="basic",
+            area=Decimal("40"), total_price=Decimal("1400"),
+        )
+        return order, outbox.enqueue_order(order)
+
+    def test_order_api_enqueues_without_sending(self):
+        data = {
+            "name": "Anna", "phone": "+420123456789", "service_type": "cargo",
+            "level": "basic", "area": 1, "total_price": 500,
+        }
+        response = self.client.post(
+            reverse("calculator:orders_api"), json.dumps(data), content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        item = OrderOutbox.objects.get()
+        self.assertEqual(item.order_id, response.json()["order_id"])
+        self.assertEqual(item.status, OrderOutbox.STATUS_PENDING)
+        self.handler.assert_not_called()
+
+    def test_success_marks_done(self):
+        order, item = self.make_order()
+        self.assertEqual(outbox.drain_outbox(10), (1, 0))
+        item.refresh_from_db()
+        self.assertEqual(item.status, OrderOutbox.STATUS_DONE)
+        self.assertEqual(item.attempts, 1)
+        self.assertIsNotNone(item.processed_at)
+        self.assertEqual(self.sent, [order])
+        # Выполненная задача больше не забирается
+        self.assertEqual(outbox.drain_outbox(10), (0, 0))
+
+    def test_batch_is_sent_in_one_call(self):
+        orders = [self.make_order()[0] for _ in range(3)]
+        self.assertEqual(outbox.drain_outbox(10), (3, 0))
+        self.handler.assert_called_once()
+        self.assertEqual(self.sent, orders)
+
+    def test_failure_is_retried_with_backoff(self):
+        _, item = self.make_order()
+        self.handler.side_effect = RuntimeError("quota exceeded")
+        before = timezone.now()
+        self.assertEqual(outbox.drain_outbox(10), (0, 1))
+        item.refresh_from_db()
+        self.assertEqual(item.status, OrderOutbox.STATUS_PENDING)
+        self.assertIn("quota exceeded", item.last_error)
+        self.assertGreaterEqual(item.next_attempt_at, before + datetime.timedelta(seconds=30))
+        # Повтор ещё не наступил
+        self.assertEqual(outbox.drain_outbox(10), (0, 0))
+
+    def test_open_circuit_defers_without_counting_attempt(self):
+        _, item = self.make_order()
+        self.handler.side_effect = CircuitOpen("google_sheets", 120)
+        before = timezone.now()
+        self.assertEqual(outbox.drain_outbox(10), (0, 1))
+        item.refresh_from_db()
+        self.assertEqual(item.status, OrderOutbox.STATUS_PENDING)
+        self.assertEqual(item.attempts, 0)
+        self.assertGreaterEqual(item.next_attempt_at, before + datetime.timedelta(seconds=120))
+
+    def test_retry_delay_grows_and_is_capped(self):
+        self.assertEqual(outbox.retry_delay(1), datetime.timedelta(seconds=30))
+        self.assertEqual(outbox.retry_delay(3), datetime.timedelta(seconds=120))
+        self.assertEqual(outbox.retry_delay(20), datetime.timedelta(seconds=3600))
+
+    def test_failed_after_max_attempts(self):
+        _, item = self.make_order()
+        self.handler.side_effect = RuntimeError("boom")
+        for _ in range(3):
+            OrderOutbox.objects.filter(pk=item.pk).update(next_attempt_at=timezone.now())
+            outbox.drain_outbox(10)
+        item.refresh_from_db()
+        self.assertEqual(item.status, OrderOutbox.STATUS_FAILED)
+        self.assertEqual(item.attempts, 3)
+        OrderOutbox.objects.filter(pk=item.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(outbox.drain_outbox(10), (0, 0))
+
+    def test_stuck_item_is_reclaimed(self):
+        _, item = self.make_order()
+        OrderOutbox.objects.filter(pk=item.pk).update(
+            status=OrderOutbox.STATUS_PROCESSING,
+            attempts=1,
+            locked_at=timezone.now() - datetime.timedelta(seconds=601),
+        )
+        self.assertEqual(outbox.outbox_stats()["stuck"], 1)
+        self.assertEqual(outbox.drain_outbox(10), (1, 0))
+        item.refresh_from_db()
+        self.assertEqual(item.status, OrderOutbox.STATUS_DONE)
+        self.assertEqual(item.attempts, 2)
+
+    def test_recent_processing_item_is_not_reclaimed(self):
+        _, item = self.make_order()
+        OrderOutbox.objects.filter(pk=item.pk).update(
+            status=OrderOutbox.STATUS_PROCESSING, locked_at=timezone.now()
+        )
+        self.assertEqual(outbox.drain_outbox(10), (0, 0))
+
+    def test_stats(self):
+        self.make_order()
+        _, done = self.make_order()
+        OrderOutbox.objects.filter(pk=done.pk).update(status=OrderOutbox.STATUS_DONE)
+        stats = outbox.outbox_stats()
+        self.assertEqual(stats["pending"], 1)
+        self.assertEqual(stats["done"], 1)
+        self.assertEqual(stats["stuck"], 0)
+        self.assertIsNotNone(stats["oldest_pending_seconds"])
@@ -0,0 +1,377 @@
+"""
+Тесты API расчёта цены
+"""
+import datetime
+import json
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from calculator.models import (
+    PricingSettings, CleaningPrice, PromoText, ExtraService, DryCleaningService, DateDiscount, Order
+)
+from calculator.quote_tokens import read_quote_token
+from calculator.services import (
+    CATALOG_VERSION_CACHE_KEY,
+    QuoteCache,
+    forget_catalog_version,
+    get_catalog_version,
+    invalidate_catalog_snapshot,
+    quote_cache,
+)
+
+# PricingSettings, CleaningPrice, ExtraService, DryCleaningService, PromoText
+CATALOG_SNAPSHOT_QUERIES = 5
+
+# Кэши как в production без Redis (см. CACHES в settings)
+DATABASE_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "test_cache"},
+    "state": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "test_state_cache"},
+}
+
+
+@override_settings(RATE_LIMIT_ENABLED=False)
+class PriceApiTestCase(TestCase):
+    """Общие тестовые данные для API цен"""
+
+    def setUp(self):
+        PricingSettings.objects.update_or_create(
+            pk=1,
+            defaults={"price_per_room": Decimal("20"), "price_per_bathroom": Decimal("15")},
+        )
+        CleaningPrice.objects.create(
+            level="basic", title="До 50 m²", area_from=0, area_to=50,
+            price=Decimal("1400"), old_price=Decimal("1750"), sort_order=1
+        )
+        CleaningPrice.objects.create(
+            level="basic", title="50–80 m²", area_from=51, area_to=80,
+            price=Decimal("1640"), sort_order=2
+        )
+        CleaningPrice.objects.create(
+            level="basic", title="+10 m²", area_from=81, area_to=None,
+            price=Decimal("120"), sort_order=3
+        )
+        PromoText.objects.create(text="20% do 15.01", is_active=True)
+        self.windows = ExtraService.objects.create(
+            name="Окна", price_type="fixed", price=Decimal("300")
+        )
+        self.sofa = DryCleaningService.objects.create(
+            name="Диван", price=Decimal("800"), unit="item"
+        )
+
+
+class PriceApiTests(PriceApiTestCase):
+    """Тесты /api/price/"""
+
+    def test_price_with_extras_and_old_price(self):
+        response = self.client.get(reverse("calculator:price_api"), {
+            "level": "basic",
+            "area": "40",
+            "rooms": "2",
+            "bathrooms": "1",
+            "extra_services": json.dumps([self.windows.id]),
+            "dry_cleaning": json.dumps({str(self.sofa.id): 2}),
+        })
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        # 55 + 1400 + 300 + 2 * 800
+        self.assertEqual(Decimal(data["price"]), Decimal("3355"))
+        self.assertEqual(Decimal(data["old_price"]), Decimal("3705"))
+        self.assertEqual(data["promo_text"], "20% do 15.01")
+
+    def test_query_budget(self):
+        params = {
+            "level": "basic",
+            "area": "60",
+            "rooms": "1",
+            "extra_services": json.dumps([self.windows.id]),
+            "dry_cleaning": json.dumps({str(self.sofa.id): 1}),
+        }
+        invalidate_catalog_snapshot()
+        with self.assertNumQueries(CATALOG_SNAPSHOT_QUERIES):
+            self.client.get(reverse("calculator:price_api"), params)
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("calculator:price_api"), params)
+        self.assertEqual(Decimal(response.json()["price"]), Decimal("2760"))
+
+    def test_snapshot_refreshed_after_admin_edit(self):
+        url = reverse("calculator:price_api")
+        self.client.get(url, {"level": "basic", "area": "40"})
+        PromoText.objects.update(is_active=False)
+        PromoText.objects.create(text="AKCE", is_active=True)
+        response = self.client.get(url, {"level": "basic", "area": "40"})
+        self.assertEqual(response.json()["promo_text"], "AKCE")
+
+    def test_invalid_level(self):
+        response = self.client.get(reverse("calculator:price_api"), {"level": "vip"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("error", response.json())
+
+    def test_unexpected_error_is_logged(self):
+        with mock.patch("calculator.views.calculate_quote_cached", side_effect=RuntimeError("boom")):
+            with self.assertLogs("calculator.views", level="ERROR") as logs:
+                response = self.client.get(reverse("calculator:price_api"), {"area": "40"})
+        self.assertEqual(response.status_code, 500)
+        self.assertIn("Traceback", logs.output[0])
+
+
+@override_settings(CACHES=DATABASE_CACHES, CATALOG_VERSION_TTL=60)
+class DatabaseCachePriceApiTests(PriceApiTests):
+    """Те же проверки с DatabaseCache: версия каталога не читается из базы на каждый запрос"""
+
+    def setUp(self):
+        call_command("createcachetable", verbosity=0)
+        forget_catalog_version()
+        super().setUp()
+
+    def tearDown(self):
+        forget_catalog_version()
+
+    def test_version_read_once_per_ttl(self):
+        version = get_catalog_version()
+        forget_catalog_version()
+        with self.assertNumQueries(1):
+            self.assertEqual(get_catalog_version(), version)
+        with self.assertNumQueries(0):
+            get_catalog_version()
+
+    def test_version_from_other_process(self):
+        url = reverse("calculator:price_api")
+        self.client.get(url, {"area": "40"})
+        # Другой процесс: цена и версия изменены без сигналов этого процесса
+        CleaningPrice.objects.filter(area_to=50).update(price=Decimal("1500"))
+        caches["state"].incr(CATALOG_VERSION_CACHE_KEY)
+        response = self.client.get(url, {"area": "40"})
+        self.assertEqual(Decimal(response.json()["price"]), Decimal("1400"))
+        # TTL истёк
+        forget_catalog_version()
+        response = self.client.get(url, {"area": "40"})
+        self.assertEqual(Decimal(response.json()["price"]), Decimal("1500"))
+
+
+class QuoteCacheTests(PriceApiTestCase):
+    """Тесты LRU-кэша котировок /api/price/"""
+
+    def setUp(self):
+        super().setUp()
+        quote_cache.hits = quote_cache.misses = 0
+
+    def test_equivalent_requests_hit_cache(self):
+        url = reverse("calculator:price_api")
+        self.client.get(url, {"area": "40.2", "extra_services": json.dumps([self.windows.id])})
+        # Та же целая площадь, тот же набор услуг в другом порядке
+        response = self.client.get(url, {
+            "area": "40.7", "extra_services": json.dumps([self.windows.id, self.windows.id]),
+        })
+        self.assertEqual(Decimal(response.json()["price"]), Decimal("1700"))
+        self.assertEqual((quote_cache.hits, quote_cache.misses), (1, 1))
+
+    def test_cleared_when_prices_change(self):
+        url = reverse("calculator:price_api")
+        self.client.get(url, {"area": "40"})
+        price = CleaningPrice.objects.get(area_to=50)
+        price.price = Decimal("1500")
+        price.save()
+        response = self.client.get(url, {"area": "40"})
+        self.assertEqual(Decimal(response.json()["price"]), Decimal("1500"))
+        self.assertEqual(quote_cache.hits, 0)
+
+    def test_lru_eviction(self):
+        cache = QuoteCache(maxsize=2)
+        for key in ("a", "b"):
+            cache.put(key, key, cache.generation)
+        cache.get("a")
+        cache.put("c", "c", cache.generation)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "a")
+        self.assertEqual(cache.stats()["size"], 2)
+
+    def test_stale_quote_not_stored(self):
+        cache = QuoteCache(maxsize=2)
+        generation = cache.generation
+        cache.clear()
+        cache.put("a", "a", generation)
+        self.assertIsNone(cache.get("a"))
+
+    def test_stats_require_staff(self):
+        response = self.client.get(reverse("calculator:price_cache_stats_api"))
+        self.assertEqual(response.status_code, 403)
+
+
+class PriceBatchApiTests(PriceApiTestCase):
+    """Тесты /api/price/batch/"""
+
+    def post(self, payload):
+        return self.client.post(
+            reverse("calculator:price_batch_api"),
+            data=json.dumps(payload),
+            content_type="application/json",
+        )
+
+    def test_batch_matches_single_quotes(self):
+        items = [
+            {"level": "basic", "area": 40, "rooms": 2, "bathrooms": 1},
+            {"level": "basic", "area": 95, "extra_services": [self.windows.id]},
+            {"level": "basic", "area": 0, "dry_cleaning": {str(self.sofa.id): 1}},
+        ]
+        response = self.post(items)
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual(len(results), 3)
+
+        for item, result in zip(items, results):
+            params = {
+                key: json.dumps(value) if isinstance(value, (list, dict)) else value
+                for key, value in item.items()
+            }
+            single = self.client.get(reverse("calculator:price_api"), params).json()
+            # Токены подписаны с отметкой времени — сравниваем содержимое
+            self.assertEqual(
+                read_quote_token(result.pop("quote_token")), read_quote_token(single.pop("quote_token"))
+            )
+            self.assertEqual(result, single)
+
+    def test_batch_reports_errors_per_item(self):
+        response = self.post([
+            {"level": "basic", "area": 40},
+            {"level": "vip", "area": 40},
+            {"level": "basic", "area": -1},
+            "not an object",
+        ])
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual(Decimal(results[0]["price"]), Decimal("1400"))
+        for result in results[1:]:
+            self.assertIn("error", result)
+            self.assertEqual(result["status"], 400)
+
+    def test_batch_loads_catalog_once(self):
+        items = [
+            {"level": "basic", "area": area, "rooms": 1,
+             "extra_services": [self.windows.id],
+             "dry_cleaning": {str(self.sofa.id): 1}}
+            for area in range(10, 200, 5)
+        ]
+        # Холодный снимок: по одному запросу на таблицу каталога
+        invalidate_catalog_snapshot()
+        with self.assertNumQueries(CATALOG_SNAPSHOT_QUERIES):
+            response = self.post(items)
+        self.assertEqual(len(response.json()["results"]), len(items))
+
+        # Тёплый снимок: ни одного запроса
+        with self.assertNumQueries(0):
+            self.post(items)
+
+    def test_batch_requires_array(self):
+        response = self.post({"level": "basic"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_batch_method_not_allowed(self):
+        response = self.client.get(reverse("calculator:price_batch_api"))
+        self.assertEqual(response.status_code, 405)
+
+
+class PriceCurveApiTests(PriceApiTestCase):
+    """Тесты /api/price/curve/"""
+
+    def price_from_curve(self, curve, level, area):
+        """Та же формула, что в calculator.js (computeLocalPrice)"""
+        level_curve = curve["levels"][level]
+        area_int = int(area)
+        step = level_curve["step"]
+        if area_int <= step["area_from"]:
+            tier = next(t for t in level_curve["tiers"] if area_int <= t["area_to"])
+            return Decimal(tier["price"]), tier["old_price"]
+        steps = -(-(area_int - step["area_from"]) // step["size"])
+        return Decimal(step["base_price"]) + steps * Decimal(step["price"]), None
+
+    def test_curve_matches_price_api(self):
+        curve = self.client.get(reverse("calculator:price_curve_api")).json()
+        self.assertEqual(curve["max_area"], 50000)
+        self.assertIsNone(curve["levels"]["general"])
+        self.assertEqual(
+            curve["extra_services"][str(self.windows.id)],
+            {"price": "300.00", "price_type": "fixed"}
+        )
+
+        for area in ["0.5", "10", "50", "51", "80", "81", "95", "1000", "50000"]:
+            expected = self.client.get(
+                reverse("calculator:price_api"), {"level": "basic", "area": area}
+            ).json()
+            price, old_price = self.price_from_curve(curve, "basic", Decimal(area))
+            self.assertEqual(price, Decimal(expected["price"]), area)
+            self.assertEqual(old_price, expected.get("old_price"), area)
+
+
+class QuoteTokenTests(PriceApiTestCase):
+    """Тесты подписанных котировок /api/price/ → /api/orders/"""
+
+    def setUp(self):
+        super().setUp()
+        self.date = datetime.date.today() + datetime.timedelta(days=3)
+        DateDiscount.objects.create(date=self.date, discount_percent=10)
+
+    def quote(self, **params):
+        params = {"level": "basic", "area": "40", "date": self.date.isoformat(), **params}
+        return self.client.get(reverse("calculator:price_api"), params).json()
+
+    def order(self, **fields):
+        data = {
+            "name": "Anna", "phone": "+420123456789",
+            "level": "basic", "area": 40, "total_price": 1,
+            "desired_date": self.date.isoformat(), "service_type": "cleaning",
+            **fields,
+        }
+        return self.client.post(
+            reverse("calculator:orders_api"), json.dumps(data), content_type="application/json"
+        )
+
+    def test_quote_includes_discount_and_token(self):
+        data = self.quote()
+        self.assertEqual(data["discount_percent"], 10)
+        # 1400 * 0.9
+        self.assertEqual(Decimal(data["final_price"]), Decimal("1260"))
+        self.assertTrue(data["quote_token"])
+
+    def test_order_accepts_signed_total_without_pricing(self):
+        token = self.quote()["quote_token"]
+        with mock.patch("calculator.views._priced_quote") as priced:
+            response = self.order(quote_token=token)
+        self.assertEqual(response.status_code, 201, response.content)
+        priced.assert_not_called()
+        order = Order.objects.get()
+        self.assertEqual(order.total_price, Decimal("1260"))
+        self.assertEqual(order.applied_discount_percent, 10)
+
+    def test_tampered_token_rejected(self):
+        token = self.quote()["quote_token"]
+        response = self.order(quote_token=token[:-2] + ("AA" if token[-2:] != "AA" else "BB"))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+    def test_token_for_other_date_rejected(self):
+        token = self.quote()["quote_token"]
+        other = (self.date + datetime.timedelta(days=1)).isoformat()
+        response = self.order(quote_token=token, desired_date=other)
+        self.assertEqual(response.status_code, 400)
+
+    def test_recomputed_after_catalog_change(self):
+        token = self.quote()["quote_token"]
+        CleaningPrice.objects.filter(area_to=50).update(price=Decimal("2000"))
+        # update() не шлёт сигналы — меняем каталог через save()
+        PricingSettings.objects.get(pk=1).save()
+        response = self.order(quote_token=token)
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(Order.objects.get().total_price, Decimal("1800"))
+
+    def test_order_without_token_is_recomputed(self):
+        response = self.order(extra_services=[self.windows.id])
+        self.assertEqual(response.status_code, 201, response.content)
+        order = Order.objects.get()
+        # (1400 + 300) * 0.9
+        self.assertEqual(order.total_price, Decimal("1530"))
+        self.assertIn("Окна", order.extra_services)
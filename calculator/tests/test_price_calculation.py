@@ -6,10 +6,13 @@ from django.test import TestCase
 
 from calculator.models import PricingSettings, CleaningPrice, PromoText, DryCleaningService
 from calculator.services import (
+    bump_catalog_version,
     calculate_room_bathroom_price,
     calculate_cleaning_price_by_level,
     calculate_dry_cleaning_price,
+    calculate_quote,
     calculate_total_price,
+    invalidate_catalog_snapshot,
     PriceCalculationError
 )
 
@@ -20,9 +23,9 @@ class PriceCalculationTests(TestCase):
     def setUp(self):
         """Настройка тестовых данных"""
         # Настройки цен за комнату и туалет
-        self.pricing = PricingSettings.objects.create(
-            price_per_room=Decimal("20"),
-            price_per_bathroom=Decimal("15")
+        self.pricing, _ = PricingSettings.objects.update_or_create(
+            pk=1,
+            defaults={"price_per_room": Decimal("20"), "price_per_bathroom": Decimal("15")},
         )
 
         # Цены для уборки
@@ -213,3 +216,201 @@ class PriceCalculationTests(TestCase):
         # 60 м² по новой формуле = 1640 (51-80 м²)
         self.assertEqual(total, Decimal("1640.00"))
 
+
+
+class CompiledPriceTableTests(TestCase):
+    """Тесты скомпилированной таблицы цен"""
+
+    def setUp(self):
+        self.price_basic_50 = CleaningPrice.objects.create(
+            level="basic", title="До 50 m²", area_from=0, area_to=50,
+            price=Decimal("1400"), sort_order=1
+        )
+        CleaningPrice.objects.create(
+            level="basic", title="50–80 m²", area_from=51, area_to=80,
+            price=Decimal("1640"), sort_order=2
+        )
+        CleaningPrice.objects.create(
+            level="basic", title="+10 m²", area_from=81, area_to=None,
+            price=Decimal("120"), sort_order=3
+        )
+
+    def test_quote_without_queries(self):
+        """После первой сборки расчёт не делает запросов к базе"""
+        calculate_cleaning_price_by_level(Decimal("40"), "basic")
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                calculate_cleaning_price_by_level(Decimal("95"), "basic"),
+                Decimal("1880.00")
+            )
+
+    def test_rebuilt_after_save(self):
+        """Изменение CleaningPrice сбрасывает таблицу"""
+        calculate_cleaning_price_by_level(Decimal("40"), "basic")
+        self.price_basic_50.price = Decimal("1500")
+        self.price_basic_50.save()
+        self.assertEqual(
+            calculate_cleaning_price_by_level(Decimal("40"), "basic"),
+            Decimal("1500")
+        )
+
+    def test_rebuilt_after_version_change(self):
+        """Новая версия каталога (изменение в другом процессе) сбрасывает таблицу"""
+        calculate_cleaning_price_by_level(Decimal("40"), "basic")
+        # update() не шлёт сигналов — как сохранение в другом воркере
+        CleaningPrice.objects.filter(pk=self.price_basic_50.pk).update(price=Decimal("1500"))
+        bump_catalog_version()
+        self.assertEqual(
+            calculate_cleaning_price_by_level(Decimal("40"), "basic"),
+            Decimal("1500")
+        )
+
+    def test_rebuilt_after_delete(self):
+        """Удаление CleaningPrice сбрасывает таблицу"""
+        calculate_cleaning_price_by_level(Decimal("40"), "basic")
+        CleaningPrice.objects.filter(level="basic").delete()
+        with self.assertRaises(PriceCalculationError):
+            calculate_cleaning_price_by_level(Decimal("40"), "basic")
+
+    def test_step_price_derived_when_missing(self):
+        """Без строки «+10 m²» цена шага вычисляется из диапазонов"""
+        CleaningPrice.objects.filter(title="+10 m²").delete()
+        # (1640 - 1400) / 30 * 10 = 80
+        self.assertEqual(
+            calculate_cleaning_price_by_level(Decimal("81"), "basic"),
+            Decimal("1720.00")
+        )
+
+    def test_inexact_step_price_rounds_like_decimal(self):
+        """Цена шага не кратна халержу — округление как прежде, до 0.01"""
+        CleaningPrice.objects.filter(title="+10 m²").delete()
+        CleaningPrice.objects.filter(area_to=80).update(price=Decimal("1650"))
+        invalidate_catalog_snapshot()
+        # 1650 + (1650 - 1400) / 30 * 10 = 1733.333…
+        self.assertEqual(
+            calculate_cleaning_price_by_level(Decimal("81"), "basic"),
+            Decimal("1733.33")
+        )
+
+
+class QuoteEngineTests(TestCase):
+    """Тесты движка котировок calculate_quote"""
+
+    def setUp(self):
+        PricingSettings.objects.update_or_create(
+            pk=1,
+            defaults={"price_per_room": Decimal("20"), "price_per_bathroom": Decimal("15")},
+        )
+        CleaningPrice.objects.create(
+            level="basic", title="До 50 m²", area_from=0, area_to=50,
+            price=Decimal("1400"), old_price=Decimal("1750"), sort_order=1
+        )
+        CleaningPrice.objects.create(
+            level="basic", title="50–80 m²", area_from=51, area_to=80,
+            price=Decimal("1640"), sort_order=2
+        )
+        CleaningPrice.objects.create(
+            level="basic", title="+10 m²", area_from=81, area_to=None,
+            price=Decimal("120"), sort_order=3
+        )
+        self.sofa = DryCleaningService.objects.create(
+            name="Диван", price=Decimal("800"), unit="item"
+        )
+        self.carpet = DryCleaningService.objects.create(
+            name="Ковер", price=Decimal("120"), unit="m2"
+        )
+
+    def test_quote_breakdown_and_old_price(self):
+        quote = calculate_quote(
+            level="basic",
+            area=Decimal("40"),
+            rooms=2,
+            bathrooms=1,
+            dry_cleaning={self.sofa.id: Decimal("2"), self.carpet.id: Decimal("10")},
+        )
+        self.assertEqual(quote.rooms_bathrooms, Decimal("55.00"))
+        self.assertEqual(quote.cleaning, Decimal("1400"))
+        # 2 дивана + 10 м² ковра
+        self.assertEqual(quote.dry_cleaning, Decimal("2800"))
+        self.assertEqual(quote.total, Decimal("4255"))
+        self.assertEqual(quote.old_price, Decimal("4605"))
+
+    def test_fractional_quantities_are_exact(self):
+        """Дробные площади считаются в халержах без округления, как в Decimal"""
+        quote = calculate_quote(
+            level="basic",
+            area=Decimal("45.5"),
+            dry_cleaning={self.carpet.id: Decimal("2.25")},
+        )
+        self.assertEqual(quote.dry_cleaning, Decimal("270.00"))
+        self.assertEqual(str(quote.dry_cleaning), "270.0000")
+        self.assertEqual(quote.total, Decimal("1400") + Decimal("120") * Decimal("2.25"))
+        self.assertEqual(quote.total_minor, 167000 * 100)
+
+    def test_dry_cleaning_quantity_matches_api(self):
+        """calculate_total_price учитывает количество так же, как /api/price/"""
+        total = calculate_total_price(
+            dry_cleaning_items=[self.sofa],
+            dry_cleaning_areas={self.sofa.id: Decimal("3")},
+        )
+        self.assertEqual(total, Decimal("2400.00"))
+
+    def test_query_budget(self):
+        """Холодный снимок — запрос на таблицу, тёплый — ни одного"""
+        invalidate_catalog_snapshot()
+        with self.assertNumQueries(5):
+            calculate_total_price(rooms=1, area=Decimal("90"))
+        with self.assertNumQueries(0):
+            total = calculate_total_price(
+                rooms=1,
+                area=Decimal("90"),
+                dry_cleaning_items=[self.sofa],
+            )
+        self.assertEqual(total, Decimal("2580.00"))
+
+
+class TieredPriceRulesTests(TestCase):
+    """Тесты произвольных ступеней и шага из CleaningPrice"""
+
+    def setUp(self):
+        for sort_order, (area_to, price) in enumerate([(30, "900"), (60, "1300"), (100, "1900")]):
+            CleaningPrice.objects.create(
+                level="general", title=f"До {area_to} m²", area_to=area_to,
+                price=Decimal(price), sort_order=sort_order
+            )
+        CleaningPrice.objects.create(
+            level="general", title="Каждые 25 m²", area_from=101, area_to=None,
+            step_area=25, price=Decimal("200"), sort_order=10
+        )
+
+    def test_tier_boundaries(self):
+        cases = {
+            "1": "900", "30": "900", "30.9": "900", "31": "1300",
+            "60": "1300", "61": "1900", "100": "1900",
+        }
+        for area, expected in cases.items():
+            self.assertEqual(
+                calculate_cleaning_price_by_level(Decimal(area), "general"),
+                Decimal(expected),
+                area
+            )
+
+    def test_custom_step_size(self):
+        # 101–125 = 1 шаг, 126–150 = 2 шага
+        self.assertEqual(
+            calculate_cleaning_price_by_level(Decimal("125"), "general"),
+            Decimal("2100.00")
+        )
+        self.assertEqual(
+            calculate_cleaning_price_by_level(Decimal("126"), "general"),
+            Decimal("2300.00")
+        )
+
+    def test_inactive_tier_is_skipped(self):
+        CleaningPrice.objects.filter(area_to=60).update(is_active=False)
+        # update() не шлёт сигналов — сбрасываем снимок вручную
+        invalidate_catalog_snapshot()
+        self.assertEqual(
+            calculate_cleaning_price_by_level(Decimal("45"), "general"),
+            Decimal("1900")
+        )
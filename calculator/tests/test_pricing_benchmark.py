@@ -0,0 +1,60 @@
+"""
+Бенчмарк расчёта цены в тестах: бюджеты по времени и запросам к БД
+"""
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+
+from calculator.benchmarks.pricing import (
+    check_budgets,
+    get_budgets,
+    run_pricing_benchmarks,
+    seed_catalog,
+)
+from calculator.services import forget_catalog_version
+from calculator.tests.test_price_api import DATABASE_CACHES
+
+# Разрешающий путь лимитера занимает микросекунды: на общих CI-раннерах шум
+# больше самого бюджета, поэтому в тестах — с 20-кратным запасом. Точный
+# бюджет (DEFAULT_BUDGETS) проверяет команда bench_pricing
+TEST_BUDGET_OVERRIDES = {"rate_limit_allow": {"p95_ms": 1.0}}
+
+
+class PricingBenchmarkTests(TestCase):
+    """Прогретый расчёт цены укладывается в бюджеты"""
+
+    def setUp(self):
+        seed_catalog()
+
+    def test_within_budgets(self):
+        results = run_pricing_benchmarks(iterations=200)
+        self.assertEqual(
+            [result.name for result in results],
+            ["calculate_cleaning_price_by_level", "calculate_total_price", "price_api", "rate_limit_allow"],
+        )
+        self.assertEqual(check_budgets(results, get_budgets(TEST_BUDGET_OVERRIDES)), [])
+
+    @override_settings(CACHES=DATABASE_CACHES, CATALOG_VERSION_TTL=60)
+    def test_no_queries_with_database_cache(self):
+        call_command("createcachetable", verbosity=0)
+        forget_catalog_version()
+        try:
+            results = run_pricing_benchmarks(iterations=50)
+        finally:
+            forget_catalog_version()
+        queries = {result.name: result.queries_per_call for result in results}
+        for name in ("calculate_cleaning_price_by_level", "calculate_total_price", "price_api"):
+            self.assertEqual(queries[name], 0, name)
+
+    def test_command_fails_on_regression(self):
+        with self.assertRaisesMessage(CommandError, "price_api"):
+            call_command(
+                "bench_pricing", "--iterations", "20", "--budget", "price_api.queries=-1",
+                stdout=StringIO(),
+            )
+
+    def test_budget_overrides(self):
+        budgets = get_budgets({"price_api": {"p95_ms": 5}})
+        self.assertEqual(budgets["price_api"], {"p95_ms": 5, "queries": 0})
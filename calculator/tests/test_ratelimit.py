@@ -0,0 +1,109 @@
+"""
+Тесты ограничения частоты запросов к /api/price/ и /api/orders/
+"""
+import json
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from calculator.ratelimit import RateLimiter, client_ip
+
+
+class FakeClock:
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class RateLimiterTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.clock = FakeClock()
+
+    def limiter(self, per_minute=60, burst=4, cache_alias="default"):
+        return RateLimiter("test", per_minute=per_minute, burst=burst, cache_alias=cache_alias, clock=self.clock)
+
+    def test_burst_then_refill(self):
+        limiter = self.limiter()
+        self.assertEqual([limiter.hit("1.1.1.1") for _ in range(4)], [0.0] * 4)
+        self.assertAlmostEqual(limiter.hit("1.1.1.1"), 1.0)
+        # Другой IP — свой bucket
+        self.assertEqual(limiter.hit("2.2.2.2"), 0.0)
+
+        self.clock.now += 1
+        self.assertEqual(limiter.hit("1.1.1.1"), 0.0)
+        self.assertGreater(limiter.hit("1.1.1.1"), 0)
+
+    @override_settings(CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "shared": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "test_ratelimit_cache"},
+    })
+    def test_budget_shared_between_processes(self):
+        # Два процесса с общим кэшем в базе: вместе не больше per_minute + burst за окно
+        call_command("createcachetable", verbosity=0)
+        first, second = (self.limiter(per_minute=6, burst=4, cache_alias="shared") for _ in range(2))
+        allowed = 0
+        for _ in range(20):
+            for limiter in (first, second):
+                if limiter.hit("1.1.1.1") == 0:
+                    allowed += 1
+            self.clock.now += 0.5
+        self.assertLessEqual(allowed, 10)
+        self.assertGreater(allowed, 4)
+
+    def test_allow_path_uses_cache_once_per_lease(self):
+        limiter = self.limiter(per_minute=600, burst=40)
+        limiter.hit("1.1.1.1")
+        key = f"calculator:ratelimit:test:1.1.1.1:{int(self.clock.now // 60)}"
+        self.assertEqual(cache.get(key), limiter.lease)
+        for _ in range(limiter.lease - 1):
+            self.assertEqual(limiter.hit("1.1.1.1"), 0.0)
+        self.assertEqual(cache.get(key), limiter.lease)
+
+    def test_client_ip(self):
+        request = RequestFactory().get("/", REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="6.6.6.6, 5.5.5.5")
+        self.assertEqual(client_ip(request), "10.0.0.1")
+        with override_settings(RATE_LIMIT_PROXY_COUNT=1):
+            self.assertEqual(client_ip(request), "5.5.5.5")
+
+
+@override_settings(RATE_LIMITS={
+    "price": {"per_minute": 1, "burst": 3},
+    "orders": {"per_minute": 1, "burst": 1},
+})
+class RateLimitApiTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_price_api_429(self):
+        url = reverse("calculator:price_api")
+        statuses = [
+            self.client.get(url, {"level": "vip"}, REMOTE_ADDR="10.1.0.1").status_code
+            for _ in range(4)
+        ]
+        self.assertEqual(statuses, [400, 400, 400, 429])
+
+        response = self.client.get(url, {"level": "vip"}, REMOTE_ADDR="10.1.0.1")
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response["Retry-After"]), 1)
+        self.assertIn("error", response.json())
+
+        self.assertEqual(self.client.get(url, {"level": "vip"}, REMOTE_ADDR="10.1.0.2").status_code, 400)
+
+    def test_orders_budget_is_separate(self):
+        orders = reverse("calculator:orders_api")
+        post = lambda: self.client.post(
+            orders, json.dumps({}), content_type="application/json", REMOTE_ADDR="10.2.0.1"
+        )
+        self.assertEqual(post().status_code, 400)
+        self.assertEqual(post().status_code, 429)
+        # Бюджет /api/price/ не тронут
+        response = self.client.get(reverse("calculator:price_api"), {"level": "vip"}, REMOTE_ADDR="10.2.0.1")
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,77 @@
+"""
+Тесты сверки заявок с Google Sheets (команда reconcile_sheet)
+"""
+from decimal import Decimal
+
+from django.core.cache import caches
+from django.test import TestCase
+
+from calculator.fake_gspread import FakeCredentials, FakeGspread
+from calculator.google_sheets import BREAKER_OPTIONS, SHEET_NAME, SheetsClient, TokenBucket, send_orders_to_sheet
+from calculator.models import Order, OrderOutbox, SheetsCheckpoint
+from calculator.sheets_reconcile import parse_sheet_ids, reconcile_sheet
+
+
+class ReconcileSheetTests(TestCase):
+
+    def setUp(self):
+        caches[BREAKER_OPTIONS["cache_alias"]].clear()
+        self.fake = FakeGspread()
+        self.client = SheetsClient(
+            gspread_module=self.fake, credentials=FakeCredentials(), bucket=TokenBucket(1e9, 1e9)
+        )
+        self.orders = [
+            Order.objects.create(
+                name=f"Client {index}", phone="+420123456789", cleaning_level="basic",
+                area=Decimal("40"), total_price=Decimal("1400"),
+            )
+            for index in range(7)
+        ]
+        # В таблице только 1, 2 и 4; у 6-й задача outbox ещё не выполнена
+        send_orders_to_sheet([self.orders[0], self.orders[1], self.orders[3]], client=self.client)
+        self.pending = OrderOutbox.objects.create(order=self.orders[5])
+        self.fake.calls.clear()
+
+    def sheet_ids(self):
+        return [row[0] for row in self.fake.worksheet(SHEET_NAME).rows[1:]]
+
+    def test_uploads_missing_in_chunks(self):
+        result = reconcile_sheet(client=self.client, chunk_size=2)
+        self.assertEqual((result.checked, result.present, result.missing, result.pending), (7, 3, 3, 1))
+        ids = [order.id for order in self.orders]
+        self.assertEqual(self.sheet_ids(), [ids[0], ids[1], ids[3], ids[2], ids[4], ids[6]])
+        # Столбец ID читается один раз, append_rows — по окну с недостающими
+        self.assertEqual(self.fake.calls, {"col_values": 1, "append_rows": 3})
+        # Контрольная точка не заходит за заявку, которую ещё отправит outbox
+        self.assertEqual(result.checkpoint, ids[4])
+
+    def test_rerun_is_incremental(self):
+        reconcile_sheet(client=self.client, chunk_size=2)
+        send_orders_to_sheet([self.orders[5]], client=self.client)
+        self.pending.status = OrderOutbox.STATUS_DONE
+        self.pending.save()
+
+        result = reconcile_sheet(client=self.client, chunk_size=2)
+        self.assertEqual((result.checked, result.present, result.missing), (2, 2, 0))
+        self.assertEqual(result.checkpoint, self.orders[-1].id)
+        self.assertEqual(
+            SheetsCheckpoint.objects.get(sheet_name=SHEET_NAME).last_order_id, self.orders[-1].id
+        )
+        self.assertEqual(len(self.sheet_ids()), 7)
+
+    def test_dry_run_writes_nothing(self):
+        result = reconcile_sheet(client=self.client, dry_run=True)
+        self.assertEqual(result.missing, 3)
+        self.assertEqual(len(self.sheet_ids()), 3)
+        self.assertEqual(SheetsCheckpoint.objects.get(sheet_name=SHEET_NAME).last_order_id, 0)
+
+    def test_failed_outbox_items_are_closed(self):
+        failed = OrderOutbox.objects.create(order=self.orders[2], status=OrderOutbox.STATUS_FAILED)
+        reconcile_sheet(client=self.client)
+        failed.refresh_from_db()
+        self.assertEqual(failed.status, OrderOutbox.STATUS_DONE)
+        self.pending.refresh_from_db()
+        self.assertEqual(self.pending.status, OrderOutbox.STATUS_PENDING)
+
+    def test_parse_sheet_ids(self):
+        self.assertEqual(parse_sheet_ids(["ID", "3", " 7 ", "", "x", 12], after=3), {7, 12})
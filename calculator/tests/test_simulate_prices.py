@@ -0,0 +1,130 @@
+"""
+Тесты команды simulate_prices
+"""
+import datetime
+import json
+import tempfile
+import unittest
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from calculator.models import CleaningPrice, Order, PricingSettings
+from calculator.services import CLEANING_LEVELS, calculate_cleaning_price_by_level, get_price_tables
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is optional
+    np = None
+
+
+@unittest.skipIf(np is None, "NumPy не установлен")
+class SimulatePricesTests(TestCase):
+    """Векторный расчёт совпадает с calculate_cleaning_price_by_level"""
+
+    def setUp(self):
+        PricingSettings.objects.update_or_create(pk=1)
+        CleaningPrice.objects.create(
+            level="basic", title="До 50 m²", area_from=0, area_to=50,
+            price=Decimal("1400"), sort_order=1
+        )
+        CleaningPrice.objects.create(
+            level="basic", title="50–80 m²", area_from=51, area_to=80,
+            price=Decimal("1640"), sort_order=2
+        )
+        CleaningPrice.objects.create(
+            level="basic", title="+10 m²", area_from=81, area_to=None,
+            price=Decimal("120"), sort_order=3
+        )
+
+    def write_table(self, data):
+        fh = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+        json.dump(data, fh)
+        fh.close()
+        return fh.name
+
+    def test_vectorized_matches_scalar(self):
+        from calculator.management.commands.simulate_prices import cleaning_prices_vectorized
+
+        areas = [0, 0.5, 1, 40, 50, 50.9, 51, 80, 80.5, 81, 90, 91, 100, 101, 555, 50000]
+        level_idx = np.full(len(areas), CLEANING_LEVELS.index("basic"))
+        prices = cleaning_prices_vectorized(np, get_price_tables(), level_idx, np.array(areas, dtype=float))
+
+        for area, price in zip(areas, prices):
+            expected = Decimal("0") if area <= 0 else calculate_cleaning_price_by_level(Decimal(str(area)), "basic")
+            self.assertAlmostEqual(float(expected), price, places=2, msg=area)
+
+    def test_revenue_delta_by_level_and_month(self):
+        for area, discount in [(40, 0), (95, 10)]:
+            Order.objects.create(
+                name="Тест", phone="+420", cleaning_level="basic", area=Decimal(area),
+                total_price=calculate_cleaning_price_by_level(Decimal(area), "basic")
+                * (100 - discount) / 100,
+                applied_discount_percent=discount,
+            )
+
+        path = self.write_table({"basic": {"tiers": [[50, 1500], [80, 1700]], "step_price": 150}})
+        out = StringIO()
+        call_command("simulate_prices", table=path, json=True, stdout=out)
+        result = json.loads(out.getvalue())
+
+        # 40 м²: +100; 95 м²: 1700 + 2*150 - 1880 = +120, со скидкой 10% → +108
+        self.assertEqual(result["summary"]["orders"], 2)
+        self.assertAlmostEqual(result["summary"]["delta"], 208.0)
+        self.assertEqual(len(result["rows"]), 1)
+        self.assertEqual(result["rows"][0]["level"], "basic")
+
+    def test_non_cleaning_orders_excluded(self):
+        Order.objects.create(
+            name="Уборка", phone="+420", cleaning_level="basic", area=Decimal("40"), total_price=Decimal("1400"),
+        )
+        # Химчистка (площадь 0) и перевозка (basic, площадь 1) — не уборка
+        Order.objects.create(
+            name="Химчистка", phone="+420", cleaning_level="basic", area=Decimal("0"),
+            total_price=Decimal("500"), dry_cleaning_items="Диван — 1 шт",
+        )
+        Order.objects.create(
+            name="Перевозка", phone="+420", cleaning_level="basic", area=Decimal("1"), total_price=Decimal("2000"),
+        )
+
+        path = self.write_table({"basic": {"tiers": [[50, 1500], [80, 1700]], "step_price": 150}})
+        out = StringIO()
+        call_command("simulate_prices", table=path, json=True, stdout=out)
+        summary = json.loads(out.getvalue())["summary"]
+        self.assertEqual(summary["orders"], 1)
+        self.assertEqual(summary["excluded_orders"], 2)
+        self.assertEqual(summary["revenue"], 1400.0)
+        self.assertAlmostEqual(summary["delta"], 100.0)
+
+    def test_months_in_local_timezone(self):
+        order = Order.objects.create(
+            name="Тест", phone="+420", cleaning_level="basic", area=Decimal("40"), total_price=Decimal("1400"),
+        )
+        # 31 января 23:30 UTC — уже 1 февраля в Праге
+        Order.objects.filter(pk=order.pk).update(
+            created_at=datetime.datetime(2025, 1, 31, 23, 30, tzinfo=datetime.timezone.utc)
+        )
+        path = self.write_table({"basic": {"tiers": [[50, 1400], [80, 1640]], "step_price": 120}})
+
+        out = StringIO()
+        call_command("simulate_prices", table=path, json=True, stdout=out)
+        self.assertEqual(json.loads(out.getvalue())["rows"][0]["month"], "2025-02")
+
+        out = StringIO()
+        call_command("simulate_prices", table=path, timezone="UTC", json=True, stdout=out)
+        self.assertEqual(json.loads(out.getvalue())["rows"][0]["month"], "2025-01")
+
+    def test_draft_rows_and_synthetic_orders(self):
+        path = self.write_table([
+            {"level": "basic", "title": "До 50 m²", "area_from": 0, "area_to": 50, "price": 1400},
+            {"level": "basic", "title": "50–80 m²", "area_from": 51, "area_to": 80, "price": 1640},
+            {"level": "basic", "title": "+10 m²", "area_from": 81, "price": 120},
+        ])
+        out = StringIO()
+        call_command("simulate_prices", table=path, synthetic=10000, json=True, stdout=out)
+        summary = json.loads(out.getvalue())["summary"]
+        # Черновик совпадает с текущими ценами — выручка не меняется
+        self.assertEqual(summary["orders"], 10000)
+        self.assertAlmostEqual(summary["delta"], 0.0, places=2)
@@ -8,6 +8,9 @@ urlpatterns = [
     path('about/', views.about_view, name='about'),
     path('calculator/', views.calculator_view, name='calculator'),
     path('api/price/', views.calculate_price_api, name='price_api'),
+    path('api/price/batch/', views.calculate_price_batch_api, name='price_batch_api'),
+    path('api/price/curve/', views.get_price_curve_api, name='price_curve_api'),
+    path('api/price/cache-stats/', views.price_cache_stats_api, name='price_cache_stats_api'),
     path('api/services/', views.get_services_api, name='services_api'),
     path('api/orders/', views.create_order_api, name='orders_api'),
     path('api/reviews/', views.get_reviews_api, name='reviews_api'),
@@ -16,6 +19,7 @@ urlpatterns = [
     path('api/company/', views.get_company_info_api, name='company_info_api'),
     path('api/cleaning-services/', views.get_cleaning_services_api, name='cleaning_services_api'),
     path('api/calendar-discounts/', views.get_calendar_discounts_api, name='calendar_discounts_api'),
+    path('api/calculator/bootstrap/', views.get_calculator_bootstrap_api, name='calculator_bootstrap_api'),
     path('api/cargo/', views.get_cargo_services_api, name='cargo_api'),
     path('api/shoe-cleaning/', views.get_shoe_cleaning_api, name='shoe_cleaning_api'),
 ]
@@ -1,299 +1,521 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.functional import SimpleLazyObject
+from django.utils.translation import get_language
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
+import datetime
 from decimal import Decimal, InvalidOperation
-import traceback
+from functools import wraps
+import hashlib
+import json
+import logging
 from .models import (
-    PricingSettings, PromoText, ExtraService, DryCleaningService, CleaningPrice,
-    Review, Advantage, GalleryItem, CompanyInfo, CleaningType,
-    CargoTariff, CargoOption, ShoeCleaningService, ServiceCategory
+    ExtraService, DryCleaningService, CleaningPrice, Review, CompanyInfo, GalleryItem
 )
+from .catalog import aget_catalog, aget_catalog_section, get_catalog, get_catalog_section
+from .discounts import (
+    DEFAULT_WINDOW_DAYS,
+    DiscountWindowError,
+    aget_calendar_discounts,
+    get_calendar_discounts,
+    get_date_discount,
+    parse_discount_window,
+)
+from .json_encoding import FastJsonResponse, dumps
+from .ratelimit import rate_limit
+from .quote_tokens import QuoteTokenError, make_quote_token, read_quote_token
+from .outbox import enqueue_order
+from .pagination import PaginationError, akeyset_page, parse_page_size
 from .services import (
-    calculate_cleaning_price_by_level,
-    calculate_room_bathroom_price,
+    aget_catalog_version,
+    apply_date_discount,
+    calculate_quote,
+    calculate_quote_cached,
+    get_catalog_snapshot,
+    get_catalog_version,
+    quote_cache,
     PriceCalculationError,
 )
 
+logger = logging.getLogger(__name__)
+
+
+def _catalog_etag_value(request, catalog_version):
+    key = f"{catalog_version}:{get_language()}:{request.get_full_path()}"
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def _catalog_etag(request, *args, **kwargs):
+    """
+    Сильный ETag для read-API каталога: версия каталога + язык + URL.
+    Совпавший If-None-Match даёт 304 без запросов к таблицам каталога
+    """
+    return _catalog_etag_value(request, get_catalog_version())
+
+
+catalog_etag = condition(etag_func=_catalog_etag)
+
+
+# Сколько хранится закодированное тело ответа каталога. После изменения
+# каталога ключ меняется, старые тела просто истекают
+CATALOG_RESPONSE_TIMEOUT = 24 * 60 * 60
+
+
+def async_catalog_etag(view):
+    """
+    catalog_etag для async-представлений: condition() в Django 4.2
+    поддерживает только синхронные представления.
+    Тело успешного ответа кэшируется закодированным (bytes) по тому же
+    ключу, что и ETag: при попадании представление не вызывается
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        etag_value = _catalog_etag_value(request, await aget_catalog_version())
+        etag = quote_etag(etag_value)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            key = f"calculator:api:{etag_value}"
+            body = await cache.aget(key)
+            if body is not None:
+                response = FastJsonResponse(body)
+            else:
+                response = await view(request, *args, **kwargs)
+                if response.status_code == 200:
+                    await cache.aset(key, response.content, timeout=CATALOG_RESPONSE_TIMEOUT)
+        if request.method in ('GET', 'HEAD'):
+            response.headers.setdefault('ETag', etag)
+        return response
+    return wrapper
+
+
+def _page_context(**context):
+    """
+    Общий контекст страниц для кэша фрагментов шаблонов.
+    Ключи фрагментов зависят от языка и версии каталога, поэтому изменение
+    в админке (сигнал меняет версию) сразу даёт новые фрагменты.
+    CompanyInfo и отзывы читаются лениво — только если фрагмент не в кэше
+    """
+    context['company_info'] = SimpleLazyObject(CompanyInfo.get_info)
+    context['catalog_version'] = get_catalog_version()
+    context['fragment_cache_timeout'] = settings.PAGE_FRAGMENT_CACHE_TIMEOUT
+    return context
+
 
 def home_view(request):
     """View для главной страницы"""
-    company_info = CompanyInfo.get_info()
-    advantages = Advantage.objects.filter(is_active=True).order_by('sort_order')[:4]
+    catalog = get_catalog()
     reviews = Review.objects.filter(is_active=True).order_by('-date', '-created_at')[:6]
-    cleaning_types = CleaningType.objects.filter(is_active=True)[:6]
-    dry_cleaning_services = DryCleaningService.objects.filter(is_active=True)[:6]
     
-    context = {
-        'company_info': company_info,
-        'advantages': advantages,
-        'reviews': reviews,
-        'cleaning_types': cleaning_types,
-        'dry_cleaning_services': dry_cleaning_services,
-    }
+    context = _page_context(
+        advantages=catalog['advantages'][:4],
+        reviews=reviews,
+        cleaning_types=catalog['cleaning_types'][:6],
+        dry_cleaning_services=catalog['dry_cleaning_services'][:6],
+    )
     
     return render(request, 'calculator/home.html', context)
 
 
 def about_view(request):
     """View для страницы О нас"""
-    company_info = CompanyInfo.get_info()
-    advantages = Advantage.objects.filter(is_active=True).order_by('sort_order')
-    gallery_items = GalleryItem.objects.filter(is_active=True).order_by('sort_order')[:6]
-    drycleaning_services = DryCleaningService.objects.filter(is_active=True).order_by('name')
+    catalog = get_catalog()
     
-    context = {
-        'company_info': company_info,
-        'advantages': advantages,
-        'gallery_items': gallery_items,
-        'drycleaning_services': drycleaning_services,
-    }
+    context = _page_context(
+        advantages=catalog['advantages'],
+        gallery_items=catalog['gallery'][:6],
+        drycleaning_services=catalog['dry_cleaning_services'],
+    )
     
     return render(request, 'calculator/about.html', context)
 
 
 def calculator_view(request):
     """View для калькулятора уборки"""
-    # Получаем настройки цен
-    pricing = PricingSettings.get_settings()
-    
-    # Получаем данные для шаблона из админки
-    company_info = CompanyInfo.get_info()
-    advantages = Advantage.objects.filter(is_active=True).order_by('sort_order')[:4]
-    reviews = Review.objects.filter(is_active=True).order_by('-date', '-created_at')[:3]
-    promo_text = PromoText.get_active()
-    
-    service_categories = ServiceCategory.objects.filter(is_active=True)
-    categories_dict = {cat.slug: cat for cat in service_categories}
-
-    context = {
-        'pricing': pricing,
-        'company_info': company_info,
-        'advantages': advantages,
-        'reviews': reviews,
-        'promo_text': promo_text,
-        'max_rooms': 30,
-        'max_bathrooms': 30,
-        'service_categories': categories_dict,
-    }
+    # Цены — из снимка каталога, переводимые данные — из каталога языка
+    snapshot = get_catalog_snapshot()
+    catalog = get_catalog()
+
+    context = _page_context(
+        pricing=snapshot.pricing,
+        advantages=catalog['advantages'][:4],
+        promo_text=catalog['promo'],
+        max_rooms=30,
+        max_bathrooms=30,
+        service_categories=catalog['service_categories'],
+        # Стартовые данные встраиваются в страницу — JS не делает лишних запросов
+        calculator_bootstrap=get_calculator_bootstrap(),
+    )
     
     return render(request, 'calculator/calculator.html', context)
 
 
 
-def calculate_price_api(request):
-    """API endpoint для получения итоговой цены уборки со всеми параметрами"""
-    # Получаем параметры из запроса
-    level = request.GET.get("level", "basic")
-    area_str = request.GET.get("area", "0")
-    rooms_str = request.GET.get("rooms", "0")
-    bathrooms_str = request.GET.get("bathrooms", "0")
-    extra_services_str = request.GET.get("extra_services", "")  # JSON array of IDs
-    dry_cleaning_str = request.GET.get("dry_cleaning", "")  # JSON object {id: area}
+VALID_LEVELS = ["basic", "general", "general_plus"]
+
+# Максимальная площадь для расчёта
+MAX_QUOTE_AREA = 50000
+
+# Максимум позиций в одном запросе /api/price/batch/
+MAX_PRICE_BATCH_ITEMS = 500
+
+
+class QuoteRequestError(Exception):
+    """Ошибка параметров или расчёта цены, которую нужно вернуть клиенту"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _parse_json_param(value):
+    """Параметр из GET приходит строкой JSON, из batch-запроса — уже разобранным"""
+    if isinstance(value, str):
+        if not value:
+            return None
+        try:
+            return json.loads(value)
+        except ValueError:
+            return None
+    return value
+
+
+def _parse_quote_params(params):
+    """Разобрать и провалидировать параметры расчёта (GET или элемент batch)"""
+    level = params.get("level", "basic")
+    area_raw = params.get("area", "0")
+    rooms_raw = params.get("rooms", "0")
+    bathrooms_raw = params.get("bathrooms", "0")
 
     # Валидация уровня
-    valid_levels = ["basic", "general", "general_plus"]
-    if level not in valid_levels:
-        return JsonResponse({
-            "error": f"Invalid level. Must be one of: {', '.join(valid_levels)}"
-        }, status=400)
+    if level not in VALID_LEVELS:
+        raise QuoteRequestError(
+            f"Invalid level. Must be one of: {', '.join(VALID_LEVELS)}"
+        )
 
     # Валидация и парсинг параметров
     try:
-        area = Decimal(area_str) if area_str else Decimal("0")
-        rooms = int(rooms_str) if rooms_str else 0
-        bathrooms = int(bathrooms_str) if bathrooms_str else 0
-        
-        if area < 0 or rooms < 0 or bathrooms < 0:
-            return JsonResponse({
-                "error": "Значения не могут быть отрицательными"
-            }, status=400)
-            
-        if rooms > 30 or bathrooms > 30:
-            return JsonResponse({
-                "error": "Максимум 30 комнат и 30 туалетов"
-            }, status=400)
-        
-        # Проверка максимальной площади (например, 50000 м²)
-        if area > 50000:
-            return JsonResponse({
-                "error": "Площадь не может превышать 50000 м²"
-            }, status=400)
-            
+        area = Decimal(str(area_raw)) if area_raw not in (None, "") else Decimal("0")
+        rooms = int(str(rooms_raw)) if rooms_raw not in (None, "") else 0
+        bathrooms = int(str(bathrooms_raw)) if bathrooms_raw not in (None, "") else 0
     except (InvalidOperation, ValueError, TypeError) as e:
-        return JsonResponse({
-            "error": f"Некорректные значения параметров: {str(e)}"
-        }, status=400)
+        raise QuoteRequestError(f"Некорректные значения параметров: {str(e)}")
 
-    # Парсинг дополнительных услуг
-    extra_services = []
-    if extra_services_str:
-        try:
-            import json
-            extra_service_ids = json.loads(extra_services_str)
-            if isinstance(extra_service_ids, list):
-                extra_services = ExtraService.objects.filter(
-                    id__in=extra_service_ids,
-                    is_active=True
-                )
-        except (json.JSONDecodeError, ValueError):
-            pass
-
-    # Парсинг химчистки
-    dry_cleaning_items = []
-    dry_cleaning_areas = {}
-    if dry_cleaning_str:
-        try:
-            import json
-            dry_cleaning_data = json.loads(dry_cleaning_str)
-            if isinstance(dry_cleaning_data, dict):
-                dry_cleaning_items = DryCleaningService.objects.filter(
-                    id__in=dry_cleaning_data.keys(),
-                    is_active=True
-                )
-                dry_cleaning_areas = {
-                    int(k): Decimal(str(v)) 
-                    for k, v in dry_cleaning_data.items()
-                }
-        except (json.JSONDecodeError, ValueError, TypeError):
-            pass
-
-    # Расчёт итоговой цены
-    try:
-        # 1. Цена за комнаты и туалеты
-        room_bathroom_price = calculate_room_bathroom_price(rooms, bathrooms)
-        
-        # 2. Цена за уборку (по площади и уровню)
-        cleaning_price = Decimal("0")
-        if area > 0:
+    if area < 0 or rooms < 0 or bathrooms < 0:
+        raise QuoteRequestError("Значения не могут быть отрицательными")
+
+    if rooms > 30 or bathrooms > 30:
+        raise QuoteRequestError("Максимум 30 комнат и 30 туалетов")
+
+    # Проверка максимальной площади
+    if area > MAX_QUOTE_AREA:
+        raise QuoteRequestError(f"Площадь не может превышать {MAX_QUOTE_AREA} м²")
+
+    # Дополнительные услуги: JSON array of IDs
+    extra_service_ids = []
+    extra_services_data = _parse_json_param(params.get("extra_services"))
+    if isinstance(extra_services_data, list):
+        for raw_id in extra_services_data:
             try:
-                cleaning_price = calculate_cleaning_price_by_level(area, level)
-            except PriceCalculationError as e:
-                # Если нет цен для уборки, возвращаем понятную ошибку
-                error_msg = str(e)
-                # Улучшаем сообщение об ошибке
-                if "not found" in error_msg.lower() or "not configured" in error_msg.lower():
-                    return JsonResponse({
-                        "error": f"Не настроены цены для уровня '{level}' и площади {int(area)} м². Проверьте настройки в админке."
-                    }, status=400)
-                return JsonResponse({
-                    "error": f"Ошибка расчёта: {error_msg}"
-                }, status=400)
-            except Exception as e:
-                # Другие ошибки при расчёте
-                import traceback
-                error_msg = str(e)
-                print(f"Error calculating cleaning price: {error_msg}")
-                print(traceback.format_exc())
-                # Более понятное сообщение для пользователя
-                return JsonResponse({
-                    "error": f"Ошибка расчёта цены для площади {int(area)} м². Проверьте настройки в админке или попробуйте другую площадь."
-                }, status=500)
-        
-        # 3. Цена за дополнительные услуги
-        extra_price = Decimal("0")
-        for service in extra_services:
-            if service.price_type == "fixed":
-                extra_price += service.price
-            elif service.price_type == "per_m2" and area > 0:
-                extra_price += service.price * area
-        
-        # 4. Цена за химчистку
-        dry_cleaning_price = Decimal("0")
-        for item in dry_cleaning_items:
-            if item.unit == "item":
-                # Для "item" умножаем цену на количество
-                quantity = dry_cleaning_areas.get(item.id, Decimal("1"))
-                dry_cleaning_price += item.price * quantity
-            elif item.unit == "m2" and item.id in dry_cleaning_areas:
-                # Для "m2" умножаем цену на площадь
-                dry_cleaning_price += item.price * dry_cleaning_areas[item.id]
-        
-        # Итоговая цена
-        total_price = room_bathroom_price + cleaning_price + extra_price + dry_cleaning_price
-        
-        # Получаем текст акции и старую цену (для уборки)
-        promo = PromoText.get_active()
-        old_price = None
-        
-        # Старая цена берётся из CleaningPrice для текущего уровня и площади
-        # Для площадей >80 м² старая цена не применяется (т.к. используется формула)
-        if area > 0 and int(area) <= 80:
-            price_obj = CleaningPrice.objects.filter(
-                level=level,
-                is_active=True,
-                area_from__lte=int(area),
-                area_to__gte=int(area)
-            ).first()
-            
-            if not price_obj:
-                # Ищем ближайший диапазон
-                if int(area) <= 50:
-                    price_obj = CleaningPrice.objects.filter(
-                        level=level,
-                        is_active=True,
-                        area_from__lte=0,
-                        area_to=50
-                    ).first()
-                elif int(area) <= 80:
-                    price_obj = CleaningPrice.objects.filter(
-                        level=level,
-                        is_active=True,
-                        area_from=51,
-                        area_to=80
-                    ).first()
-            
-            if price_obj and price_obj.old_price:
-                # Старая цена только для уборки, не для всего
-                old_price = str(price_obj.old_price + room_bathroom_price + extra_price + dry_cleaning_price)
-        
-        response_data = {
-            "price": str(total_price),
-            "breakdown": {
-                "rooms_bathrooms": str(room_bathroom_price),
-                "cleaning": str(cleaning_price),
-                "extra_services": str(extra_price),
-                "dry_cleaning": str(dry_cleaning_price),
+                extra_service_ids.append(int(raw_id))
+            except (ValueError, TypeError):
+                continue
+
+    # Химчистка: JSON object {id: quantity/area}
+    dry_cleaning = {}
+    dry_cleaning_data = _parse_json_param(params.get("dry_cleaning"))
+    if isinstance(dry_cleaning_data, dict):
+        try:
+            dry_cleaning = {
+                int(k): Decimal(str(v))
+                for k, v in dry_cleaning_data.items()
             }
+        except (ValueError, TypeError, InvalidOperation):
+            dry_cleaning = {}
+
+    return {
+        "level": level,
+        "area": area,
+        "rooms": rooms,
+        "bathrooms": bathrooms,
+        "extra_service_ids": extra_service_ids,
+        "dry_cleaning": dry_cleaning,
+    }
+
+
+def _quote_response(quote):
+    """Котировка в формате ответа /api/price/"""
+    response_data = {
+        "price": quote.total,
+        "breakdown": {
+            "rooms_bathrooms": quote.rooms_bathrooms,
+            "cleaning": quote.cleaning,
+            "extra_services": quote.extra_services,
+            "dry_cleaning": quote.dry_cleaning,
         }
-        
-        # Добавляем опциональные поля только если они есть
-        if old_price:
-            response_data["old_price"] = old_price
-        
-        if promo and promo.text:
-            response_data["promo_text"] = promo.text
-        
-        return JsonResponse(response_data)
-        
-    except Exception as e:
-        import traceback
+    }
+
+    # Добавляем опциональные поля только если они есть
+    if quote.old_price is not None:
+        response_data["old_price"] = quote.old_price
+
+    if quote.promo_text:
+        response_data["promo_text"] = quote.promo_text
+
+    return response_data
+
+
+def _priced_quote(params, snapshot=None):
+    """
+    Quote по разобранным параметрам.
+    Без snapshot — по текущему каталогу через кэш котировок
+    """
+    level = params["level"]
+    area = params["area"]
+
+    try:
+        if snapshot is None:
+            return calculate_quote_cached(**params)
+        return calculate_quote(snapshot=snapshot, **params)
+    except PriceCalculationError as e:
+        # Если нет цен для уборки, возвращаем понятную ошибку
         error_msg = str(e)
-        # Логируем полную ошибку для отладки
-        print(f"API Error: {error_msg}")
-        print(traceback.format_exc())
-        return JsonResponse({
-            "error": f"Ошибка расчёта: {error_msg}"
-        }, status=500)
+        if "not found" in error_msg.lower() or "not configured" in error_msg.lower():
+            raise QuoteRequestError(
+                f"Не настроены цены для уровня '{level}' и площади {int(area)} м². Проверьте настройки в админке."
+            )
+        raise QuoteRequestError(f"Ошибка расчёта: {error_msg}")
+    except Exception as e:
+        logger.exception("Ошибка расчёта котировки: level=%s, area=%s", level, area)
+        raise QuoteRequestError(f"Ошибка расчёта: {e}", status=500)
+
+
+def _signed_quote_response(params, quote, date, version):
+    """
+    Ответ /api/price/: котировка, скидка календаря на date и quote_token
+    (version — версия каталога, взятая до расчёта)
+    """
+    discount_percent = get_date_discount(date)
+    final_price = apply_date_discount(quote.total, discount_percent)
+    response_data = _quote_response(quote)
+    if date:
+        response_data["discount_percent"] = discount_percent
+        response_data["final_price"] = final_price
+    response_data["quote_token"] = make_quote_token(params, final_price, discount_percent, date, version)
+    return response_data
+
+
+def _parse_quote_date(value):
+    """Дата уборки для скидки календаря (?date=YYYY-MM-DD), необязательна"""
+    if not value:
+        return None
+    try:
+        return datetime.date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise QuoteRequestError("date должна быть в формате YYYY-MM-DD")
+
+
+@rate_limit('price')
+def calculate_price_api(request):
+    """
+    API endpoint для получения итоговой цены уборки со всеми параметрами.
+    С ?date= учитывается скидка календаря. quote_token — подписанная
+    котировка, которую калькулятор передаёт в /api/orders/
+    """
+    try:
+        params = _parse_quote_params(request.GET)
+        date = _parse_quote_date(request.GET.get("date"))
+        # Версию берём до расчёта: если каталог изменится во время расчёта,
+        # токен окажется устаревшим и заявка пересчитается
+        version = get_catalog_version()
+        quote = _priced_quote(params)
+    except QuoteRequestError as e:
+        return FastJsonResponse({"error": str(e)}, status=e.status)
+
+    return FastJsonResponse(_signed_quote_response(params, quote, date, version))
+
+
+def price_cache_stats_api(request):
+    """Счётчики кэша котировок этого процесса (для подбора QUOTE_CACHE_SIZE)"""
+    if not request.user.is_staff:
+        return FastJsonResponse({"error": "Forbidden"}, status=403)
+    return FastJsonResponse(quote_cache.stats())
+
+
+@csrf_exempt
+@rate_limit('price')
+def calculate_price_batch_api(request):
+    """
+    API endpoint для расчёта цен многих конфигураций за один запрос.
+    Тело — JSON-массив объектов с теми же полями, что и у /api/price/
+    (level, area, rooms, bathrooms, extra_services, dry_cleaning, date).
+    Все позиции считаются по одному снимку каталога, у каждой успешной —
+    свой quote_token, как у /api/price/.
+    """
+    if request.method != 'POST':
+        return FastJsonResponse({"error": "Method not allowed"}, status=405)
+
+    try:
+        items = json.loads(request.body)
+    except ValueError:
+        return FastJsonResponse({"error": "Некорректный JSON"}, status=400)
+
+    if not isinstance(items, list):
+        return FastJsonResponse({"error": "Ожидается JSON-массив"}, status=400)
+
+    if len(items) > MAX_PRICE_BATCH_ITEMS:
+        return FastJsonResponse({
+            "error": f"Максимум {MAX_PRICE_BATCH_ITEMS} позиций в одном запросе"
+        }, status=400)
+
+    # Версию берём до снимка, как в calculate_price_api
+    version = get_catalog_version()
+    snapshot = get_catalog_snapshot()
+    results = []
+    for item in items:
+        try:
+            if not isinstance(item, dict):
+                raise QuoteRequestError("Позиция должна быть JSON-объектом")
+            params = _parse_quote_params(item)
+            date = _parse_quote_date(item.get("date"))
+            quote = _priced_quote(params, snapshot)
+            results.append(_signed_quote_response(params, quote, date, version))
+        except QuoteRequestError as e:
+            results.append({"error": str(e), "status": e.status})
+
+    return FastJsonResponse({"results": results})
+
+
+def _build_level_price_curve(snapshot, level):
+    """
+    Кривая цены уборки одного уровня — скомпилированная таблица цен:
+    ступени по верхней границе площади (с old_price) и шаг выше последней
+    """
+    table = snapshot.price_tables.get(level)
+    if table is None or not table.breakpoints:
+        return None
+
+    return {
+        "tiers": [
+            {
+                "area_to": area_to,
+                "price": price,
+                "old_price": old_price or None,
+            }
+            for area_to, price, old_price in zip(table.breakpoints, table.prices, table.old_prices)
+        ],
+        "step": {
+            "area_from": table.step_from,
+            "size": table.step_size,
+            "base_price": table.prices[-1],
+            "price": table.step_price,
+        },
+    }
 
 
-def get_services_api(request):
+def _price_curve_payload(snapshot):
+    """Кривая цен для калькулятора (ответ /api/price/curve/)"""
+    return {
+        "max_area": MAX_QUOTE_AREA,
+        "levels": {
+            level: _build_level_price_curve(snapshot, level)
+            for level in VALID_LEVELS
+        },
+        "price_per_room": snapshot.pricing.price_per_room,
+        "price_per_bathroom": snapshot.pricing.price_per_bathroom,
+        "extra_services": {
+            service.id: {"price": service.price, "price_type": service.price_type}
+            for service in snapshot.extra_services.values()
+        },
+        "dry_cleaning_services": {
+            item.id: {"price": item.price, "unit": item.unit}
+            for item in snapshot.dry_cleaning_services.values()
+        },
+        "promo_text": snapshot.promo.text if snapshot.promo and snapshot.promo.text else None,
+    }
+
+
+def get_price_curve_api(request):
+    """
+    API endpoint с полной кривой цен (0–MAX_QUOTE_AREA м²) по уровням
+    и ценами комнат, доп. услуг и химчистки. Калькулятор получает её один
+    раз и считает цену локально, без запроса на /api/price/ при каждом
+    движении слайдера. Уровень без настроенных цен отдаётся как null.
+    """
+    return FastJsonResponse(_price_curve_payload(get_catalog_snapshot()))
+
+
+def _services_payload(catalog):
+    return {
+        "extra_services": catalog['extra_services'],
+        "dry_cleaning_services": [
+            {key: item[key] for key in ('id', 'name', 'price', 'unit')}
+            for item in catalog['dry_cleaning_services']
+        ],
+    }
+
+
+@async_catalog_etag
+async def get_services_api(request):
     """API endpoint для получения списка услуг"""
-    extra_services = ExtraService.objects.filter(is_active=True).values(
-        'id', 'name', 'price', 'price_type'
-    )
-    dry_cleaning_services = DryCleaningService.objects.filter(is_active=True).values(
-        'id', 'name', 'price', 'unit'
-    )
-    
-    return JsonResponse({
-        "extra_services": list(extra_services),
-        "dry_cleaning_services": list(dry_cleaning_services),
-    })
+    return FastJsonResponse(_services_payload(await aget_catalog()))
+
+
+# Услуги, цену которых считает /api/price/. Грузоперевозки и химчистку
+# обуви калькулятор считает сам — для них сумма берётся из заявки
+QUOTED_SERVICE_TYPES = ('cleaning', 'drycleaning')
+
+
+def _order_pricing(data, desired_date, submitted_total):
+    """
+    (итог, скидка %, параметры расчёта или None) для новой заявки.
+    С quote_token: подпись верна и версия каталога та же — итог из токена
+    без расчёта; каталог изменился — пересчёт по параметрам из токена.
+    Без токена — пересчёт по полям заявки
+    """
+    token = data.get('quote_token')
+    service_type = data.get('service_type') or 'cleaning'
+    if token:
+        try:
+            signed = read_quote_token(token)
+        except QuoteTokenError as e:
+            raise QuoteRequestError(str(e))
+        if signed.date != desired_date:
+            raise QuoteRequestError("Котировка рассчитана на другую дату, рассчитайте цену заново")
+        if signed.catalog_version == get_catalog_version():
+            return signed.total, signed.discount_percent, signed.params
+        params = signed.params
+    elif service_type in QUOTED_SERVICE_TYPES:
+        params = _parse_quote_params({
+            "level": data.get('level'),
+            # Для химчистки калькулятор передаёт условную площадь,
+            # а цену считает без уборки
+            "area": data.get('area') if service_type == 'cleaning' else 0,
+            "rooms": data.get('rooms', 0),
+            "bathrooms": data.get('bathrooms', 0),
+            "extra_services": data.get('extra_services'),
+            "dry_cleaning": data.get('dry_cleaning_items'),
+        })
+    else:
+        try:
+            discount_percent = int(data.get('applied_discount_percent', 0))
+        except (TypeError, ValueError):
+            raise QuoteRequestError("Некорректные числовые значения")
+        return submitted_total, discount_percent, None
 
+    quote = _priced_quote(params)
+    discount_percent = get_date_discount(desired_date)
+    return apply_date_discount(quote.total, discount_percent), discount_percent, params
 
+
+@rate_limit('orders')
 def create_order_api(request):
     """API endpoint для создания заявки"""
     if request.method != 'POST':
-        return JsonResponse({"error": "Method not allowed"}, status=405)
+        return FastJsonResponse({"error": "Method not allowed"}, status=405)
     
     import json
     from .models import Order
@@ -304,10 +526,10 @@ def create_order_api(request):
         
         # Валидация обязательных полей
         if not data.get('name') or not data.get('phone'):
-            return JsonResponse({"error": "Имя и телефон обязательны"}, status=400)
+            return FastJsonResponse({"error": "Имя и телефон обязательны"}, status=400)
         
         if not data.get('level') or not data.get('area'):
-            return JsonResponse({"error": "Уровень уборки и площадь обязательны"}, status=400)
+            return FastJsonResponse({"error": "Уровень уборки и площадь обязательны"}, status=400)
         
         # Валидация и парсинг данных
         try:
@@ -316,12 +538,12 @@ def create_order_api(request):
             bathrooms = int(data.get('bathrooms', 0))
             total_price = Decimal(str(data.get('total_price', 0)))
         except (ValueError, InvalidOperation, TypeError):
-            return JsonResponse({"error": "Некорректные числовые значения"}, status=400)
+            return FastJsonResponse({"error": "Некорректные числовые значения"}, status=400)
         
         # Валидация уровня уборки
         valid_levels = ["basic", "general", "general_plus"]
         if data.get('level') not in valid_levels:
-            return JsonResponse({"error": f"Некорректный уровень уборки"}, status=400)
+            return FastJsonResponse({"error": f"Некорректный уровень уборки"}, status=400)
         
         # Парсинг даты и времени (если есть)
         desired_date = None
@@ -340,25 +562,41 @@ def create_order_api(request):
             except (ValueError, TypeError):
                 pass
         
-        # Парсинг скидки
-        applied_discount_percent = int(data.get('applied_discount_percent', 0))
+        # Цена заявки — из подписанной котировки или пересчётом на сервере
+        try:
+            total_price, applied_discount_percent, quote_params = _order_pricing(
+                data, desired_date, total_price
+            )
+        except QuoteRequestError as e:
+            return FastJsonResponse({"error": str(e)}, status=e.status)
+
+        if quote_params:
+            area = quote_params['area']
+            rooms = quote_params['rooms']
+            bathrooms = quote_params['bathrooms']
+            extra_services_ids = quote_params['extra_service_ids']
+            dry_cleaning_payload = quote_params['dry_cleaning']
+        else:
+            extra_services_ids = data.get('extra_services') or []
+            if not isinstance(extra_services_ids, list):
+                extra_services_ids = []
+            dry_cleaning_payload = data.get('dry_cleaning_items') or {}
+            if not isinstance(dry_cleaning_payload, dict):
+                dry_cleaning_payload = {}
+
+        # Названия услуг — из снимка каталога, без запросов к БД
+        snapshot = get_catalog_snapshot()
 
         # Обработка дополнительных услуг
-        extra_services_ids = data.get('extra_services') or []
-        if not isinstance(extra_services_ids, list):
-            extra_services_ids = []
-
         extra_services_text = None
         if extra_services_ids:
-            services_qs = ExtraService.objects.filter(id__in=extra_services_ids)
-            services_map = {service.id: service for service in services_qs}
             lines = []
             for raw_id in extra_services_ids:
                 try:
                     service_id = int(raw_id)
                 except (ValueError, TypeError):
                     continue
-                service = services_map.get(service_id)
+                service = snapshot.extra_services.get(service_id)
                 if not service:
                     continue
                 price_display = f"{service.price} Kč" if service.price_type == 'fixed' else f"{service.price} Kč/м²"
@@ -367,21 +605,8 @@ def create_order_api(request):
                 extra_services_text = "\n".join(lines)
 
         # Обработка объектов химчистки
-        dry_cleaning_payload = data.get('dry_cleaning_items') or {}
-        if not isinstance(dry_cleaning_payload, dict):
-            dry_cleaning_payload = {}
-
         dry_cleaning_text = None
         if dry_cleaning_payload:
-            dry_ids = []
-            for raw_id in dry_cleaning_payload.keys():
-                try:
-                    dry_ids.append(int(raw_id))
-                except (ValueError, TypeError):
-                    continue
-
-            services_qs = DryCleaningService.objects.filter(id__in=dry_ids)
-            services_map = {service.id: service for service in services_qs}
             lines = []
             for raw_id, qty in dry_cleaning_payload.items():
                 try:
@@ -391,7 +616,7 @@ def create_order_api(request):
                     continue
                 if quantity <= 0:
                     continue
-                service = services_map.get(service_id)
+                service = snapshot.dry_cleaning_services.get(service_id)
                 if not service:
                     continue
                 unit_label = 'м²' if service.unit == 'm2' else 'шт'
@@ -399,25 +624,28 @@ def create_order_api(request):
             if lines:
                 dry_cleaning_text = "\n".join(lines)
 
-        # Создание заявки
-        order = Order.objects.create(
-            name=data.get('name'),
-            phone=data.get('phone'),
-            email=data.get('email') or None,
-            cleaning_level=data.get('level'),
-            area=area,
-            rooms=rooms,
-            bathrooms=bathrooms,
-            total_price=total_price,
-            address=data.get('address') or None,
-            desired_date=desired_date,
-            desired_time=desired_time,
-            applied_discount_percent=applied_discount_percent,
-            comment=data.get('comment') or None,
-            extra_services=extra_services_text,
-            dry_cleaning_items=dry_cleaning_text,
-            status='new'
-        )
+        # Заявка и задача outbox на отправку в Google Sheets — в одной
+        # транзакции: отправку выполняет воркер process_outbox, ответ её не ждёт
+        with transaction.atomic():
+            order = Order.objects.create(
+                name=data.get('name'),
+                phone=data.get('phone'),
+                email=data.get('email') or None,
+                cleaning_level=quote_params['level'] if quote_params else data.get('level'),
+                area=area,
+                rooms=rooms,
+                bathrooms=bathrooms,
+                total_price=total_price,
+                address=data.get('address') or None,
+                desired_date=desired_date,
+                desired_time=desired_time,
+                applied_discount_percent=applied_discount_percent,
+                comment=data.get('comment') or None,
+                extra_services=extra_services_text,
+                dry_cleaning_items=dry_cleaning_text,
+                status='new'
+            )
+            enqueue_order(order)
         
         # Формируем текст для отправки в Google Forms или WhatsApp
         order_text = format_order_for_external(order, data)
@@ -428,21 +656,7 @@ def create_order_api(request):
             whatsapp_number = "77077801708" # Номер основателя по умолчанию
         google_forms_url = ""  # Можно добавить в CompanyInfo
         
-        # Отправка в Google Sheets (асинхронно, чтобы не блокировать ответ)
-        def _append_to_sheet_async(order_id):
-            try:
-                from .models import Order as OrderModel
-                from .google_sheets import append_to_google_sheet
-                instance = OrderModel.objects.filter(id=order_id).first()
-                if instance:
-                    append_to_google_sheet(instance)
-            except Exception as async_exc:
-                print(f"Failed to append to Google Sheet async: {async_exc}")
-
-        import threading
-        threading.Thread(target=_append_to_sheet_async, args=(order.id,), daemon=True).start()
-
-        return JsonResponse({
+        return FastJsonResponse({
             "success": True,
             "message": "Заявка успешно создана",
             "order_id": order.id,
@@ -452,47 +666,88 @@ def create_order_api(request):
         }, status=201)
         
     except json.JSONDecodeError:
-        return JsonResponse({"error": "Некорректный JSON"}, status=400)
+        return FastJsonResponse({"error": "Некорректный JSON"}, status=400)
     except Exception as e:
         import traceback
         print(f"Error creating order: {e}")
         print(traceback.format_exc())
-        return JsonResponse({"error": f"Ошибка создания заявки: {str(e)}"}, status=500)
+        return FastJsonResponse({"error": f"Ошибка создания заявки: {str(e)}"}, status=500)
 
 
-def get_reviews_api(request):
-    """API endpoint для получения списка отзывов"""
-    reviews = Review.objects.filter(is_active=True).values(
-        'id', 'name', 'text', 'rating', 'photo_url', 'date'
-    )
-    # Преобразуем date в строку
-    reviews_list = []
-    for review in reviews:
-        review['date'] = review['date'].strftime('%Y-%m-%d') if review['date'] else None
-        reviews_list.append(review)
-    
-    return JsonResponse(list(reviews_list), safe=False)
+# Ключи keyset-пагинации: порядок как на сайте, id — для однозначности
+REVIEWS_ORDERING = ('-date', '-created_at', '-id')
+GALLERY_ORDERING = ('sort_order', '-created_at', '-id')
+
+
+def _wants_full_list(request):
+    """?all=1 — прежний ответ одним списком для старых клиентов"""
+    return request.GET.get('all') in ('1', 'true')
+
+
+async def _paginated_response(request, queryset, ordering, fields, serialize=None):
+    """
+    Страница списка: {"results": [...], "next_cursor": "..." | null}.
+    Параметры: limit (не больше MAX_PAGE_SIZE), cursor из предыдущего ответа
+    """
+    try:
+        rows, next_cursor = await akeyset_page(
+            queryset,
+            ordering,
+            fields,
+            cursor=request.GET.get('cursor'),
+            page_size=parse_page_size(request.GET.get('limit')),
+        )
+    except PaginationError as e:
+        return FastJsonResponse({"error": str(e)}, status=400)
+
+    if serialize:
+        rows = [serialize(row) for row in rows]
+    return FastJsonResponse({"results": rows, "next_cursor": next_cursor})
+
 
+def _review_payload(review):
+    review['date'] = review['date'].strftime('%Y-%m-%d') if review['date'] else None
+    return review
 
-def get_advantages_api(request):
+
+@async_catalog_etag
+async def get_reviews_api(request):
+    """API endpoint для получения списка отзывов (постранично)"""
+    reviews = Review.objects.filter(is_active=True)
+    fields = ('id', 'name', 'text', 'rating', 'photo_url', 'date')
+
+    if _wants_full_list(request):
+        return FastJsonResponse(
+            [_review_payload(review) async for review in reviews.values(*fields)], safe=False
+        )
+
+    return await _paginated_response(request, reviews, REVIEWS_ORDERING, fields, _review_payload)
+
+
+@async_catalog_etag
+async def get_advantages_api(request):
     """API endpoint для получения списка преимуществ"""
-    advantages = Advantage.objects.filter(is_active=True).values(
-        'id', 'title', 'description', 'icon'
-    )
-    return JsonResponse(list(advantages), safe=False)
+    return FastJsonResponse(await aget_catalog_section('advantages'), safe=False)
+
 
+@async_catalog_etag
+async def get_gallery_api(request):
+    """API endpoint для получения галереи до/после (постранично)"""
+    if _wants_full_list(request):
+        return FastJsonResponse(await aget_catalog_section('gallery'), safe=False)
 
-def get_gallery_api(request):
-    """API endpoint для получения галереи до/после"""
-    gallery = GalleryItem.objects.filter(is_active=True).values(
-        'id', 'before_image', 'after_image', 'caption'
+    return await _paginated_response(
+        request,
+        GalleryItem.objects.filter(is_active=True),
+        GALLERY_ORDERING,
+        ('id', 'before_image', 'after_image', 'caption'),
     )
-    return JsonResponse(list(gallery), safe=False)
 
 
-def get_company_info_api(request):
+@async_catalog_etag
+async def get_company_info_api(request):
     """API endpoint для получения информации о компании"""
-    company = CompanyInfo.get_info()
+    company = await CompanyInfo.aget_info()
     
     # Формируем ответ с социальными сетями
     data = {
@@ -511,36 +766,30 @@ def get_company_info_api(request):
         data['map_lat'] = float(company.map_lat)
         data['map_lng'] = float(company.map_lng)
     
-    return JsonResponse(data)
+    return FastJsonResponse(data)
+
+
+def _calendar_discounts_payload(today):
+    """Скидки по датам на 2 месяца вперёд: {'2026-01-10': 20, ...}"""
+    return get_calendar_discounts(today, today + datetime.timedelta(days=DEFAULT_WINDOW_DAYS))
 
 
-def get_calendar_discounts_api(request):
-    """API endpoint для получения скидок по датам для календаря"""
+async def get_calendar_discounts_api(request):
+    """
+    API endpoint для получения скидок по датам для календаря.
+    Окно: ?month=YYYY-MM или ?from=YYYY-MM-DD&to=YYYY-MM-DD,
+    по умолчанию — 2 месяца от сегодняшнего дня
+    """
     from django.utils import timezone
-    from datetime import timedelta
-    from .models import DateDiscount
-    
-    today = timezone.now().date()
-    end_date = today + timedelta(days=60)  # на 2 месяца вперёд
-    
-    discounts = DateDiscount.objects.filter(
-        date__gte=today,
-        date__lte=end_date,
-        is_active=True
-    ).order_by('date', '-discount_percent')  # Если на одну дату несколько скидок, берём максимальную
-    
-    # Создаём словарь для быстрого поиска: {'2026-01-10': 20, ...}
-    # Если на одну дату несколько скидок, берём максимальную
-    discount_map = {}
-    for discount in discounts:
-        date_str = discount.date.strftime('%Y-%m-%d')
-        # Если уже есть скидка на эту дату, берём максимальную
-        if date_str not in discount_map or discount.discount_percent > discount_map[date_str]:
-            discount_map[date_str] = discount.discount_percent
-    
-    return JsonResponse(discount_map)
+
+    try:
+        start, end = parse_discount_window(request.GET, timezone.now().date())
+    except DiscountWindowError as e:
+        return FastJsonResponse({"error": str(e)}, status=400)
+    return FastJsonResponse(await aget_calendar_discounts(start, end))
 
 
+@catalog_etag
 def get_cleaning_services_api(request):
     """API endpoint для получения описаний уровней уборки"""
     # Используем данные из CleaningPrice для формирования описаний
@@ -582,7 +831,7 @@ def get_cleaning_services_api(request):
                 'included_items': service_info['included_items'],
             })
     
-    return JsonResponse(services, safe=False)
+    return FastJsonResponse(services, safe=False)
 
 
 def format_order_for_external(order, data):
@@ -657,25 +906,76 @@ def format_order_for_external(order, data):
     return "\n".join(lines)
 
 
-def get_cargo_services_api(request):
+def _cargo_payload(catalog):
+    return {
+        'tariffs': catalog['cargo_tariffs'],
+        'options': catalog['cargo_options'],
+    }
+
+
+@async_catalog_etag
+async def get_cargo_services_api(request):
     """API endpoint для получения тарифов и опций грузоперевозок"""
-    tariffs = CargoTariff.objects.filter(is_active=True).values(
-        'id', 'name', 'price_per_hour', 'min_hours'
-    )
-    options = CargoOption.objects.filter(is_active=True).values(
-        'id', 'name', 'price'
-    )
-    return JsonResponse({
-        'tariffs': list(tariffs),
-        'options': list(options),
-    })
+    return FastJsonResponse(_cargo_payload(await aget_catalog()))
+
+
+def _shoe_cleaning_payload(services):
+    return {
+        'services': services,
+    }
 
 
-def get_shoe_cleaning_api(request):
+@async_catalog_etag
+async def get_shoe_cleaning_api(request):
     """API endpoint для получения услуг химчистки обуви"""
-    services = ShoeCleaningService.objects.filter(is_active=True).values(
-        'id', 'name', 'price_per_pair'
-    )
-    return JsonResponse({
-        'services': list(services),
-    })
+    return FastJsonResponse(_shoe_cleaning_payload(await aget_catalog_section('shoe_cleaning_services')))
+
+
+# ----------------------------
+# СТАРТОВЫЕ ДАННЫЕ КАЛЬКУЛЯТОРА
+# ----------------------------
+def get_calculator_bootstrap():
+    """
+    Всё, что калькулятор раньше получал пятью запросами: скидки календаря,
+    услуги, грузоперевозки, химчистка обуви и кривая цен. Кэшируется по языку,
+    версии каталога и дате (окно скидок считается от сегодняшнего дня)
+    """
+    from django.utils import timezone
+
+    today = timezone.now().date()
+    payload = cache.get(_calculator_bootstrap_key(today))
+    if payload is None:
+        catalog = get_catalog()
+        payload = {
+            'calendar_discounts': _calendar_discounts_payload(today),
+            'services': _services_payload(catalog),
+            'cargo': _cargo_payload(catalog),
+            'shoe_cleaning': _shoe_cleaning_payload(catalog['shoe_cleaning_services']),
+            'price_curve': _price_curve_payload(get_catalog_snapshot()),
+        }
+        cache.set(_calculator_bootstrap_key(today), payload, timeout=24 * 60 * 60)
+    return payload
+
+
+def _calculator_bootstrap_key(today):
+    return f"calculator:bootstrap:{get_language()}:{get_catalog_version()}:{today.isoformat()}"
+
+
+def _calculator_bootstrap_etag(request, *args, **kwargs):
+    from django.utils import timezone
+
+    return f"{_catalog_etag(request)}-{timezone.now().date():%Y%m%d}"
+
+
+@condition(etag_func=_calculator_bootstrap_etag)
+def get_calculator_bootstrap_api(request):
+    """API endpoint со стартовыми данными калькулятора (для текущего языка)"""
+    from django.utils import timezone
+
+    # Рядом со словарём для шаблона хранится уже закодированное тело
+    key = f"{_calculator_bootstrap_key(timezone.now().date())}:json"
+    body = cache.get(key)
+    if body is None:
+        body = dumps(get_calculator_bootstrap())
+        cache.set(key, body, timeout=24 * 60 * 60)
+    return FastJsonResponse(body)
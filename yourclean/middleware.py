@@ -1,41 +1,59 @@
 """
 CORS middleware для Django (простая версия без django-cors-headers)
+и сжатие динамических ответов.
+
+Все middleware работают и в синхронной, и в асинхронной цепочке: под ASGI
+Django не переводит async-представления каталога в поток из-за них.
 """
+import gzip
+import hashlib
 import os
+import re
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.http import JsonResponse
 from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli необязателен
+    brotli = None
 
 
 class CorsMiddleware:
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
         # Handle preflight requests
         if request.method == 'OPTIONS':
-            response = JsonResponse({})
-            origin = request.META.get('HTTP_ORIGIN', '')
-            allowed_origins = getattr(settings, 'CORS_ALLOWED_ORIGINS', [])
-            
-            if allowed_origins and origin in allowed_origins:
-                response['Access-Control-Allow-Origin'] = origin
-            elif allowed_origins:
-                response['Access-Control-Allow-Origin'] = allowed_origins[0]
-            else:
-                response['Access-Control-Allow-Origin'] = origin or '*'
-            
-            response['Access-Control-Allow-Methods'] = 'GET, POST, PUT, PATCH, DELETE, OPTIONS'
-            response['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, X-CSRFToken'
-            response['Access-Control-Allow-Credentials'] = 'true'
-            response['Access-Control-Max-Age'] = '86400'
-            return response
+            return self.preflight_response(request)
 
         response = self.get_response(request)
+        return self.add_cors_headers(request, response)
 
-        # Add CORS headers to all responses
+    async def __acall__(self, request):
+        if request.method == 'OPTIONS':
+            return self.preflight_response(request)
+
+        response = await self.get_response(request)
+        return self.add_cors_headers(request, response)
+
+    def allow_origin(self, request, response):
         origin = request.META.get('HTTP_ORIGIN', '')
         allowed_origins = getattr(settings, 'CORS_ALLOWED_ORIGINS', [])
-        
+
         if allowed_origins and origin in allowed_origins:
             response['Access-Control-Allow-Origin'] = origin
         elif allowed_origins:
@@ -43,10 +61,221 @@ class CorsMiddleware:
         else:
             # В продакшене можно разрешить все, но лучше указать конкретные домены
             response['Access-Control-Allow-Origin'] = origin or '*'
-        
-        response['Access-Control-Allow-Credentials'] = 'true'
+
+    def preflight_response(self, request):
+        response = JsonResponse({})
+        self.allow_origin(request, response)
         response['Access-Control-Allow-Methods'] = 'GET, POST, PUT, PATCH, DELETE, OPTIONS'
         response['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, X-CSRFToken'
+        response['Access-Control-Allow-Credentials'] = 'true'
+        response['Access-Control-Max-Age'] = '86400'
+        return response
 
+    def add_cors_headers(self, request, response):
+        # Add CORS headers to all responses
+        self.allow_origin(request, response)
+        response['Access-Control-Allow-Credentials'] = 'true'
+        response['Access-Control-Allow-Methods'] = 'GET, POST, PUT, PATCH, DELETE, OPTIONS'
+        response['Access-Control-Allow-Headers'] = 'Content-Type, Authorization, X-CSRFToken'
         return response
 
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise 6.x умеет только синхронный вызов. Статика по-прежнему
+    отдаётся синхронно (в потоке), остальные запросы проходят дальше
+    по асинхронной цепочке без перехода в поток
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    def _static_file(self, request):
+        if self.autorefresh:
+            return self.find_file(request.path_info)
+        return self.files.get(request.path_info)
+
+    async def __acall__(self, request):
+        # С autorefresh (DEBUG) поиск идёт по диску, иначе — по словарю в памяти
+        static_file = self._static_file(request)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+# Уже сжатые форматы: повторное сжатие только тратит CPU
+INCOMPRESSIBLE_TYPES = (
+    'image/', 'video/', 'audio/', 'font/woff',
+    'application/zip', 'application/gzip', 'application/x-gzip', 'application/x-brotli',
+    'application/pdf', 'application/octet-stream',
+)
+
+_no_transform_re = re.compile(r'\bno-transform\b')
+_not_shared_re = re.compile(r'\b(?:private|no-store)\b')
+
+
+def parse_accept_encoding(header):
+    """'gzip, br;q=0.5' → {'gzip': 1.0, 'br': 0.5}"""
+    accepted = {}
+    for part in header.split(','):
+        name, _, params = part.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip().replace(' ', '')
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+class CompressionMiddleware:
+    """
+    Сжатие динамических ответов (страницы, JSON API): brotli, если пакет
+    установлен и включён COMPRESSION_BROTLI, иначе gzip — по Accept-Encoding
+    клиента, при равном q предпочитается brotli.
+
+    Не сжимаются потоковые ответы, ответы меньше COMPRESSION_MIN_SIZE байт,
+    уже сжатые форматы и ответы с Content-Encoding. Vary: Accept-Encoding
+    ставится на всё, что могло бы сжиматься, даже если клиент сжатие не
+    принимает, — иначе общий кэш отдаст сжатое не тому клиенту.
+
+    Ответы с сильным ETag кэшируются сжатыми: одинаковый ETag значит
+    одинаковые байты, повторно они не сжимаются. ETag сжатого ответа
+    становится слабым, как у GZipMiddleware Django, — If-None-Match
+    сравнивается слабо, поэтому 304 продолжают работать.
+
+    HTML с CSRF-токеном (форма в base.html) отражает путь запроса рядом с
+    секретом — сжатие такой страницы открывает атаку BREACH. Она сжимается
+    только gzip со случайной длиной заголовка, как в GZipMiddleware Django
+    ("Heal The BREACH"), и в кэш не попадает
+    """
+    sync_capable = True
+    async_capable = True
+
+    gzip_level = 6
+    brotli_quality = 5
+    # Наибольшая длина случайного дополнения gzip-заголовка (байт) для страниц с CSRF-токеном
+    max_random_bytes = 100
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 500)
+        self.cache_timeout = getattr(settings, 'COMPRESSION_CACHE_TIMEOUT', 24 * 60 * 60)
+        use_brotli = brotli is not None and getattr(settings, 'COMPRESSION_BROTLI', True)
+        self.encodings = ('br', 'gzip') if use_brotli else ('gzip',)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        response = self.get_response(request)
+        encoding = self.negotiate(request, response)
+        if encoding is None:
+            return response
+
+        key = self.cache_key(request, response, encoding)
+        body = cache.get(key) if key else None
+        if body is None:
+            body = self.compress(response.content, encoding, padded=self.carries_csrf_token(request, response))
+            if key:
+                cache.set(key, body, timeout=self.cache_timeout)
+        return self.apply(response, body, encoding)
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        encoding = self.negotiate(request, response)
+        if encoding is None:
+            return response
+
+        key = self.cache_key(request, response, encoding)
+        body = await cache.aget(key) if key else None
+        if body is None:
+            body = self.compress(response.content, encoding, padded=self.carries_csrf_token(request, response))
+            if key:
+                await cache.aset(key, body, timeout=self.cache_timeout)
+        return self.apply(response, body, encoding)
+
+    def compressible(self, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return False
+        if len(response.content) < self.min_size:
+            return False
+        if _no_transform_re.search(response.get('Cache-Control', '')):
+            return False
+        content_type = response.get('Content-Type', '').lower()
+        return not content_type.startswith(INCOMPRESSIBLE_TYPES)
+
+    def carries_csrf_token(self, request, response):
+        """
+        HTML, в который мог попасть CSRF-токен: CSRF_COOKIE появляется в
+        META, как только за запрос понадобился токен (get_token())
+        """
+        return (
+            'CSRF_COOKIE' in request.META
+            and response.get('Content-Type', '').lower().startswith('text/html')
+        )
+
+    def negotiate(self, request, response):
+        """Кодировка для ответа или None, если сжимать не нужно"""
+        if not self.compressible(response):
+            return None
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        accepted = parse_accept_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        wildcard = accepted.get('*', 0.0)
+        # Для brotli случайного дополнения нет
+        encodings = ('gzip',) if self.carries_csrf_token(request, response) else self.encodings
+        best, best_quality = None, 0.0
+        for encoding in encodings:
+            quality = accepted.get(encoding, wildcard)
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def cache_key(self, request, response, encoding):
+        """Ключ сжатого тела или None, если ответ нельзя переиспользовать"""
+        etag = response.get('ETag', '')
+        if not etag.startswith('"') or response.cookies:
+            return None
+        if self.carries_csrf_token(request, response):
+            return None
+        if _not_shared_re.search(response.get('Cache-Control', '')):
+            return None
+        digest = hashlib.md5(f"{request.get_full_path()}:{etag}".encode()).hexdigest()
+        return f"yourclean:compressed:{encoding}:{digest}"
+
+    def compress(self, content, encoding, padded=False):
+        if encoding == 'br':
+            return brotli.compress(content, quality=self.brotli_quality)
+        if padded:
+            return compress_string(content, max_random_bytes=self.max_random_bytes)
+        # mtime=0 — одинаковые байты на входе дают одинаковые на выходе
+        return gzip.compress(content, compresslevel=self.gzip_level, mtime=0)
+
+    def apply(self, response, body, encoding):
+        # Сжатие не помогло (маленький или плохо сжимаемый ответ)
+        if len(body) >= len(response.content):
+            return response
+        response.content = body
+        response.headers['Content-Length'] = str(len(body))
+        response.headers['Content-Encoding'] = encoding
+        etag = response.get('ETag', '')
+        if etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        return response
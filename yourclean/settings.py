@@ -84,7 +84,9 @@ MIDDLEWARE = [
 
     'django.middleware.security.SecurityMiddleware',
 
-    'whitenoise.middleware.WhiteNoiseMiddleware',  # WhiteNoise для статических файлов
+    'yourclean.middleware.AsyncWhiteNoiseMiddleware',  # WhiteNoise для статических файлов (sync и async)
+
+    'yourclean.middleware.CompressionMiddleware',  # gzip/brotli для страниц и JSON API
 
     'django.contrib.sessions.middleware.SessionMiddleware',
 
@@ -182,6 +184,8 @@ TEMPLATES = [
 
                 'django.template.context_processors.request',
 
+                'django.template.context_processors.i18n',
+
                 'django.contrib.auth.context_processors.auth',
 
                 'django.contrib.messages.context_processors.messages',
@@ -253,6 +257,115 @@ if 'default' in DATABASES:
 
 
 
+# Кэши общие для всех воркеров и process_outbox. REDIS_URL — Redis (нужен
+
+# пакет redis), на Render — таблицы в базе (python manage.py createcachetable),
+
+# локально — память процесса.
+
+#   default — ответы API, фрагменты страниц, сжатые тела. Таблица ограничена
+
+#             CACHE_MAX_ENTRIES записями, при переполнении удаляется
+
+#             1/CACHE_CULL_FREQUENCY записей
+
+#   state   — управляющие ключи: версия каталога и состояние breaker'а
+
+#             Google Sheets. Отдельная таблица, очистка default её не задевает
+
+
+
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '10000'))
+
+CACHE_CULL_FREQUENCY = int(os.getenv('CACHE_CULL_FREQUENCY', '4'))
+
+
+
+if os.environ.get('REDIS_URL'):
+
+    CACHES = {
+
+        'default': {
+
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+
+            'LOCATION': os.environ.get('REDIS_URL'),
+
+        },
+
+        'state': {
+
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+
+            'LOCATION': os.environ.get('REDIS_URL'),
+
+            'KEY_PREFIX': 'state',
+
+        },
+
+    }
+
+elif os.environ.get('DATABASE_URL'):
+
+    CACHES = {
+
+        'default': {
+
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+
+            'LOCATION': os.getenv('CACHE_TABLE', 'yourclean_cache'),
+
+            'OPTIONS': {
+
+                'MAX_ENTRIES': CACHE_MAX_ENTRIES,
+
+                'CULL_FREQUENCY': CACHE_CULL_FREQUENCY,
+
+            },
+
+        },
+
+        'state': {
+
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+
+            'LOCATION': os.getenv('STATE_CACHE_TABLE', 'yourclean_state'),
+
+            # Живых ключей единицы; очистка сначала удаляет истёкшие счётчики
+
+            # breaker'а, до живых ключей с таким запасом она не доходит
+
+            'OPTIONS': {'MAX_ENTRIES': 1000000},
+
+        },
+
+    }
+
+else:
+
+    CACHES = {
+
+        'default': {
+
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+
+            'LOCATION': 'default',
+
+        },
+
+        'state': {
+
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+
+            'LOCATION': 'state',
+
+        },
+
+    }
+
+
+
+
 
 
 
@@ -362,6 +475,136 @@ GOOGLE_SHEETS_CREDENTIALS_PATH = os.path.join(BASE_DIR, 'yourclean-sheets-fae04e
 
 GOOGLE_SHEETS_NAME = 'Заявки YourClean'
 
+# Квота Sheets API: запросов в минуту на процесс и допустимый всплеск
+
+GOOGLE_SHEETS_REQUESTS_PER_MINUTE = int(os.getenv('GOOGLE_SHEETS_REQUESTS_PER_MINUTE', '60'))
+
+GOOGLE_SHEETS_REQUEST_BURST = int(os.getenv('GOOGLE_SHEETS_REQUEST_BURST', '5'))
+
+# Circuit breaker Sheets: размыкается, если в окне (сек) было не меньше MIN_CALLS
+
+# вызовов и доля ошибок не меньше FAILURE_RATE; пробный вызов — через RESET_TIMEOUT (сек)
+
+GOOGLE_SHEETS_BREAKER_FAILURE_RATE = float(os.getenv('GOOGLE_SHEETS_BREAKER_FAILURE_RATE', '0.5'))
+
+GOOGLE_SHEETS_BREAKER_MIN_CALLS = int(os.getenv('GOOGLE_SHEETS_BREAKER_MIN_CALLS', '5'))
+
+GOOGLE_SHEETS_BREAKER_WINDOW = int(os.getenv('GOOGLE_SHEETS_BREAKER_WINDOW', '60'))
+
+GOOGLE_SHEETS_BREAKER_RESET_TIMEOUT = int(os.getenv('GOOGLE_SHEETS_BREAKER_RESET_TIMEOUT', '30'))
+
+# Кэш состояния breaker'а: должен быть общим с process_outbox (см. CACHES)
+
+GOOGLE_SHEETS_BREAKER_CACHE = os.getenv('GOOGLE_SHEETS_BREAKER_CACHE', 'state')
+
+
+
+# Pricing
+
+# Размер LRU-кэша котировок /api/price/ в каждом процессе (0 — выключен)
+
+QUOTE_CACHE_SIZE = int(os.getenv('QUOTE_CACHE_SIZE', '1024'))
+
+
+
+# Срок действия подписанной котировки /api/price/ для оформления заявки (сек)
+
+QUOTE_TOKEN_MAX_AGE = int(os.getenv('QUOTE_TOKEN_MAX_AGE', '86400'))
+
+
+
+# Кодирование ответов API: auto (orjson, если установлен), orjson, json
+
+# или путь к своей функции dumps(data) -> bytes
+
+CALCULATOR_JSON_BACKEND = os.getenv('CALCULATOR_JSON_BACKEND', 'auto')
+
+
+
+# Outbox заявок (python manage.py process_outbox)
+
+# Попыток до статуса «Ошибка»; задержка повтора — база * 2^(попытка-1), не больше максимума (сек)
+
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '8'))
+
+OUTBOX_RETRY_BASE = int(os.getenv('OUTBOX_RETRY_BASE', '30'))
+
+OUTBOX_RETRY_MAX = int(os.getenv('OUTBOX_RETRY_MAX', '3600'))
+
+# Через сколько секунд задача в статусе «Обрабатывается» считается зависшей
+
+OUTBOX_STUCK_AFTER = int(os.getenv('OUTBOX_STUCK_AFTER', '600'))
+
+
+
+# Версия каталога (ETag, снимок цен, фрагменты): кэш, где она хранится, и
+
+# сколько секунд процесс доверяет прочитанному значению, не обращаясь к кэшу.
+
+# Изменения из другого процесса видны не позже чем через CATALOG_VERSION_TTL
+
+CATALOG_VERSION_CACHE = os.getenv('CATALOG_VERSION_CACHE', 'state')
+
+CATALOG_VERSION_TTL = float(os.getenv('CATALOG_VERSION_TTL', '1'))
+
+
+
+# Время жизни кэшированных фрагментов страниц (сек). Ключ фрагмента включает
+
+# версию каталога, так что изменения в админке видны сразу
+
+PAGE_FRAGMENT_CACHE_TIMEOUT = int(os.getenv('PAGE_FRAGMENT_CACHE_TIMEOUT', '86400'))
+
+
+
+# Сжатие динамических ответов: минимальный размер (байт), brotli (если
+
+# установлен пакет Brotli) и сколько хранятся сжатые ответы с ETag (сек)
+
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '500'))
+
+COMPRESSION_BROTLI = os.getenv('COMPRESSION_BROTLI', 'True') == 'True'
+
+COMPRESSION_CACHE_TIMEOUT = int(os.getenv('COMPRESSION_CACHE_TIMEOUT', '86400'))
+
+
+
+# Ограничение частоты запросов по IP: /api/price/ (и /api/price/batch/) и /api/orders/.
+
+# Бюджет — запросов в минуту и допустимый всплеск сверх них
+
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'True') == 'True'
+
+RATE_LIMITS = {
+
+    'price': {
+
+        'per_minute': int(os.getenv('RATE_LIMIT_PRICE_PER_MINUTE', '60')),
+
+        'burst': int(os.getenv('RATE_LIMIT_PRICE_BURST', '20')),
+
+    },
+
+    'orders': {
+
+        'per_minute': int(os.getenv('RATE_LIMIT_ORDERS_PER_MINUTE', '5')),
+
+        'burst': int(os.getenv('RATE_LIMIT_ORDERS_BURST', '5')),
+
+    },
+
+}
+
+# Кэш общего бюджета; лимит действует на все воркеры, если кэш общий (см. CACHES)
+
+RATE_LIMIT_CACHE = os.getenv('RATE_LIMIT_CACHE', 'default')
+
+# Сколько доверенных прокси перед приложением (на Render — 1): IP клиента
+
+# берётся из X-Forwarded-For, а не из REMOTE_ADDR
+
+RATE_LIMIT_PROXY_COUNT = int(os.getenv('RATE_LIMIT_PROXY_COUNT', '0'))
+
 
 
 # Default primary key field type